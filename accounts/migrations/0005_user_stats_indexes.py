@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_password_reset_expires_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'total_spent'], name='accounts_us_user_ty_8dea94_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'total_orders'], name='accounts_us_user_ty_243a84_idx'),
+        ),
+    ]
@@ -90,6 +90,11 @@ class User(AbstractUser):
         verbose_name = _('Utilisateur')
         verbose_name_plural = _('Utilisateurs')
         ordering = ['-date_joined']
+        indexes = [
+            # Liste des clients triée ou filtrée par montant dépensé / nombre de commandes
+            models.Index(fields=['user_type', 'total_spent']),
+            models.Index(fields=['user_type', 'total_orders']),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
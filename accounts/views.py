@@ -1,4 +1,5 @@
 from datetime import timedelta
+from decimal import Decimal, InvalidOperation
 import os
 import uuid
 from django.shortcuts import render, redirect, get_object_or_404
@@ -6,6 +7,7 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from accounts.models import User, UserAddress
+from products.reservations import release_reservations
 from django.http import JsonResponse
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
@@ -177,12 +179,24 @@ def login_page(request):
 
 @login_required
 def logout_user(request):
+    # Le stock réservé pour le paiement est rendu sans attendre l'expiration
+    release_reservations(request.user)
     logout(request)
     messages.success(request, "Vous avez été déconnecté.")
     return redirect("login")
 
 
 
+# Tris de la liste des clients, sur les statistiques tenues à jour dans User (sans agrégat sur Order)
+CUSTOMER_SORTS = {
+    '-date_joined': 'Plus récents',
+    '-total_spent': 'Plus gros dépensiers',
+    'total_spent': 'Plus petits dépensiers',
+    '-total_orders': 'Plus de commandes',
+    '-last_order_date': 'Dernière commande',
+}
+
+
 @login_required
 def admin_customers(request):
     if not (request.user.is_admin or request.user.is_super_admin):
@@ -192,6 +206,13 @@ def admin_customers(request):
     # Filtres
     search_query = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
+    sort = request.GET.get('sort', '')
+    if sort not in CUSTOMER_SORTS:
+        sort = '-date_joined'
+    try:
+        min_spent = Decimal(request.GET.get('min_spent', '') or '0')
+    except InvalidOperation:
+        min_spent = Decimal('0')
 
     # Base queryset
     customers = User.objects.filter(user_type='CLIENT')
@@ -207,6 +228,11 @@ def admin_customers(request):
     if status_filter:
         customers = customers.filter(account_status=status_filter == 'active')
 
+    if min_spent > 0:
+        customers = customers.filter(total_spent__gte=min_spent)
+
+    customers = customers.order_by(sort, '-id')
+
     # Gérer le blocage/déblocage
     if request.method == 'POST':
         customer_id = request.POST.get('customer_id')
@@ -228,7 +254,10 @@ def admin_customers(request):
     context = {
         'customer_count':customer_count,
         'customers': customers,
-        'selected_status': status_filter
+        'selected_status': status_filter,
+        'sorts': CUSTOMER_SORTS,
+        'selected_sort': sort,
+        'min_spent': min_spent if min_spent > 0 else '',
     }
     
     return render(request, 'dashboard/customer.html', context)
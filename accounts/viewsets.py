@@ -46,9 +46,15 @@ class IsOwnerOrAdmin(permissions.BasePermission):
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['user_type', 'account_status', 'email_confirmed']
+    filterset_fields = {
+        'user_type': ['exact'],
+        'account_status': ['exact'],
+        'email_confirmed': ['exact'],
+        'total_spent': ['gte', 'lte'],
+        'total_orders': ['gte', 'lte'],
+    }
     search_fields = ['email', 'first_name', 'last_name', 'phone']
-    ordering_fields = ['date_joined', 'last_login', 'total_orders', 'total_spent']
+    ordering_fields = ['date_joined', 'last_login', 'total_orders', 'total_spent', 'last_order_date']
     ordering = ['-date_joined']
 
     def get_serializer_class(self):
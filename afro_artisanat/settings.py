@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     'notifications',
     'apropos',
     'artisans',
+    'jobs',
 
 
 
@@ -134,6 +135,28 @@ DATABASES = {
 }
 
 
+# Cache
+# Verrous des blocs du tableau de bord, compteurs de notifications non lues, versions des
+# instantanés de commandes... Avec plusieurs workers, ces valeurs doivent être partagées :
+# définir REDIS_URL (paquet redis ; add/incr/decr y sont atomiques), obligatoire en production.
+# Sans REDIS_URL, cache mémoire local (défaut de Django) : propre à chaque processus, il ne
+# convient qu'au développement ou à un déploiement à un seul worker.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,152 @@
+# cart/carts.py
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import Product
+from products.reservations import release_reservations
+from .models import Cart, CartItem, options_key
+from .pricing import price_lines
+
+# Clé de session du panier anonyme (conservée par login(), contrairement à la clé de session)
+CART_SESSION_KEY = 'cart_id'
+
+# Durée de conservation des paniers anonymes inactifs
+ANONYMOUS_CART_TTL = getattr(settings, 'ANONYMOUS_CART_TTL', timedelta(days=30))
+
+
+def get_cart(request, create=False):
+    """Panier du client connecté ou de la session ; None s'il n'existe pas et create=False"""
+    if request.user.is_authenticated:
+        if create:
+            return Cart.objects.get_or_create(user=request.user)[0]
+        return Cart.objects.filter(user=request.user).first()
+
+    cart_id = request.session.get(CART_SESSION_KEY)
+    cart = Cart.objects.filter(id=cart_id, user__isnull=True).first() if cart_id else None
+    if cart is None and create:
+        cart = Cart.objects.create()
+        request.session[CART_SESSION_KEY] = cart.id
+    return cart
+
+
+def get_cart_lines(cart):
+    """Lignes du panier au format de orders.checkout, produits chargés en une requête"""
+    if cart is None:
+        return [], {}
+    lines = []
+    products = {}
+    for item in cart.items.select_related('product'):
+        products[item.product_id] = item.product
+        lines.append({
+            'product_id': item.product_id,
+            'name': item.product.name,
+            'sku': item.product.sku or '',
+            'quantity': item.quantity,
+            'price': item.product.price,
+            'options': item.options,
+        })
+    return lines, products
+
+
+def price_cart(cart, coupon_code=None):
+    """Montants du panier avec son code promo ou coupon_code (voir cart.pricing.price_lines)"""
+    if coupon_code is None and cart is not None:
+        coupon_code = cart.coupon_code
+    return price_lines(*get_cart_lines(cart), coupon_code=coupon_code)
+
+
+def set_cart_lines(cart, lines):
+    """Remplace le contenu du panier par les lignes données (synchronisation depuis le navigateur)"""
+    merged = OrderedDict()
+    for line in lines:
+        if not line['product_id']:
+            continue
+        key = (line['product_id'], options_key(line['options']))
+        if key in merged:
+            merged[key]['quantity'] += line['quantity']
+        else:
+            merged[key] = {'options': line['options'] or None, 'quantity': line['quantity']}
+
+    known = set(Product.objects.filter(id__in={pid for pid, key in merged}).values_list('id', flat=True))
+    with transaction.atomic():
+        cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=pid, options=line['options'], options_key=key, quantity=line['quantity'])
+            for (pid, key), line in merged.items()
+            if pid in known
+        ])
+        cart.save(update_fields=['updated_at'])
+
+
+def add_to_cart(cart, product_id, quantity=1, options=None):
+    """Ajoute quantity exemplaires du produit (UPDATE relatif si la ligne existe déjà)"""
+    with transaction.atomic():
+        updated = CartItem.objects.filter(
+            cart=cart, product_id=product_id, options_key=options_key(options)
+        ).update(quantity=F('quantity') + quantity)
+        if not updated:
+            CartItem.objects.create(cart=cart, product_id=product_id, quantity=quantity, options=options)
+        cart.save(update_fields=['updated_at'])
+
+
+def merge_carts(source, target):
+    """
+    Fusionne le panier source dans target puis supprime source. Pour une même ligne on garde
+    la plus grande quantité : le panier anonyme est le plus souvent le même panier, repris
+    depuis le navigateur, et non des articles à ajouter une seconde fois.
+    """
+    with transaction.atomic():
+        existing = {(item.product_id, item.options_key): item for item in target.items.all()}
+        changed = []
+        added = []
+        for item in source.items.all():
+            current = existing.get((item.product_id, item.options_key))
+            if current is None:
+                added.append(CartItem(
+                    cart=target, product_id=item.product_id, quantity=item.quantity,
+                    options=item.options, options_key=item.options_key
+                ))
+            elif item.quantity > current.quantity:
+                current.quantity = item.quantity
+                changed.append(current)
+        CartItem.objects.bulk_update(changed, ['quantity'])
+        source.delete()
+        CartItem.objects.bulk_create(added)
+        target.save(update_fields=['updated_at'])
+
+
+def attach_session_cart(request, user):
+    """À la connexion : le panier anonyme de la session devient (ou rejoint) celui du client"""
+    cart_id = request.session.pop(CART_SESSION_KEY, None)
+    session_cart = Cart.objects.filter(id=cart_id, user__isnull=True).first() if cart_id else None
+    if session_cart is None:
+        return
+
+    user_cart = Cart.objects.filter(user=user).first()
+    if user_cart is None:
+        session_cart.user = user
+        session_cart.save(update_fields=['user', 'updated_at'])
+    else:
+        merge_carts(session_cart, user_cart)
+
+
+def clear_cart(cart):
+    if cart is not None:
+        cart.items.all().delete()
+        if cart.coupon_code:
+            cart.coupon_code = ''
+            cart.save(update_fields=['coupon_code', 'updated_at'])
+        # Réservations restantes (articles retirés du panier avant la commande) : stock rendu tout de suite
+        if cart.user_id:
+            release_reservations(cart.user)
+
+
+def purge_abandoned_carts(ttl=ANONYMOUS_CART_TTL):
+    """Supprime les paniers anonymes inactifs. Retourne le nombre de paniers supprimés"""
+    deleted, per_model = Cart.objects.filter(user__isnull=True, updated_at__lt=timezone.now() - ttl).delete()
+    return per_model.get(Cart._meta.label, 0)
@@ -0,0 +1,10 @@
+# cart/management/commands/purge_carts.py
+from django.core.management.base import BaseCommand
+from cart.carts import purge_abandoned_carts
+
+class Command(BaseCommand):
+    help = 'Supprime les paniers anonymes inactifs depuis plus de ANONYMOUS_CART_TTL'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_abandoned_carts()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} panier(s) supprimé(s)"))
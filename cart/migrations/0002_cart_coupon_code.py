@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='coupon_code',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Code promo'),
+        ),
+    ]
@@ -1,3 +1,63 @@
+import hashlib
+import json
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from products.models import Product
+
+
+def options_key(options):
+    """Empreinte des options d'un article (même produit + mêmes options = même ligne)"""
+    if not options:
+        return ''
+    return hashlib.sha1(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Cart(models.Model):
+    # Panier d'un client connecté, ou panier anonyme référencé par la session (clé 'cart_id')
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="cart",
+        verbose_name="Client"
+    )
+    coupon_code = models.CharField(max_length=50, blank=True, default='', verbose_name="Code promo")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
+
+    def __str__(self):
+        return f"Panier de {self.user}" if self.user_id else f"Panier anonyme #{self.pk}"
+
+    class Meta:
+        verbose_name = "Panier"
+        verbose_name_plural = "Paniers"
+        indexes = [
+            models.Index(fields=['updated_at']),  # Purge des paniers anonymes abandonnés
+        ]
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items", verbose_name="Panier")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cart_items", verbose_name="Produit")
+    quantity = models.PositiveIntegerField(default=1, verbose_name="Quantité")
+    options = models.JSONField(null=True, blank=True, verbose_name="Options")
+    options_key = models.CharField(max_length=40, blank=True, default='', editable=False)
+    added_at = models.DateTimeField(auto_now_add=True, verbose_name="Date d'ajout")
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name}"
+
+    def save(self, *args, **kwargs):
+        self.options_key = options_key(self.options)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        verbose_name = "Article du panier"
+        verbose_name_plural = "Articles du panier"
+        ordering = ['added_at', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product', 'options_key'], name='unique_cart_line'),
+        ]
@@ -0,0 +1,54 @@
+# cart/pricing.py
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+
+from coupons.engine import CouponError, evaluate_coupon
+
+# TVA et frais de livraison appliqués au panier (les montants envoyés par le navigateur sont ignorés)
+TAX_RATE = Decimal(str(getattr(settings, 'CART_TAX_RATE', '0.20')))
+SHIPPING_COST = Decimal(str(getattr(settings, 'CART_SHIPPING_COST', '0.00')))
+
+CENT = Decimal('0.01')
+
+
+def price_lines(lines, products, coupon_code=None):
+    """
+    Montants du panier calculés à partir des prix en base uniquement.
+
+    lines : lignes au format de orders.checkout.normalize_cart_lines
+    products : {id: Product} déjà chargés (en une requête) par l'appelant
+    coupon_code : code promo éventuel, évalué sur les règles compilées (sans requête) ;
+    s'il est refusé, la remise est nulle et coupon_error contient le motif.
+    Les lignes dont le produit est inconnu sont écartées.
+    """
+    priced = []
+    subtotal = Decimal('0.00')
+    for line in lines:
+        product = products.get(line['product_id'])
+        if product is None:
+            continue
+        total_price = product.price * line['quantity']
+        priced.append(dict(line, product=product, unit_price=product.price, total_price=total_price))
+        subtotal += total_price
+
+    coupon, coupon_error, discount_amount = None, None, Decimal('0.00')
+    if coupon_code and priced:
+        try:
+            coupon, discount_amount = evaluate_coupon(coupon_code, priced, subtotal)
+        except CouponError as e:
+            coupon_error = str(e)
+
+    # La TVA s'applique au montant remisé
+    tax_amount = ((subtotal - discount_amount) * TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP)
+    shipping_cost = SHIPPING_COST if priced else Decimal('0.00')
+    return {
+        'lines': priced,
+        'subtotal': subtotal,
+        'discount_amount': discount_amount,
+        'coupon': coupon,
+        'coupon_error': coupon_error,
+        'tax_amount': tax_amount,
+        'shipping_cost': shipping_cost,
+        'total_amount': subtotal - discount_amount + tax_amount + shipping_cost,
+    }
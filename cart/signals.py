@@ -0,0 +1,11 @@
+# cart/signals.py
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .carts import attach_session_cart
+
+
+@receiver(user_logged_in)
+def attach_cart_on_login(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        attach_session_cart(request, user)
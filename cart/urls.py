@@ -2,5 +2,9 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('', views.cart_page, name='cart')
-]
\ No newline at end of file
+    path('', views.cart_page, name='cart'),
+    path('api/', views.cart_detail, name='cart_detail'),
+    path('api/sync/', views.sync_cart, name='cart_sync'),
+    path('api/items/', views.add_cart_item, name='cart_add_item'),
+    path('api/coupon/', views.apply_coupon, name='cart_apply_coupon'),
+]
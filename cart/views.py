@@ -1,5 +1,98 @@
+import json
+
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from orders.checkout import first_product_images, normalize_cart_lines
+from products.models import Product
+from coupons.engine import normalize_code
+from .carts import add_to_cart, get_cart, price_cart, set_cart_lines
+
 
 # Create your views here.
 def cart_page(request):
-    return render(request, 'website/cart.html')
\ No newline at end of file
+    return render(request, 'website/cart.html')
+
+
+def cart_payload(cart):
+    """Contenu du panier et montants calculés côté serveur"""
+    pricing = price_cart(cart)
+    images = first_product_images({line['product_id'] for line in pricing['lines']}) if pricing['lines'] else {}
+    return {
+        'items': [{
+            'id': line['product_id'],
+            'name': line['name'],
+            'sku': line['sku'],
+            'quantity': line['quantity'],
+            'options': line['options'],
+            'price': float(line['unit_price']),
+            'total_price': float(line['total_price']),
+            'image': images.get(line['product_id']),
+        } for line in pricing['lines']],
+        'count': sum(line['quantity'] for line in pricing['lines']),
+        'subtotal': float(pricing['subtotal']),
+        'coupon_code': pricing['coupon'].code if pricing['coupon'] else None,
+        'coupon_error': pricing['coupon_error'],
+        'discount_amount': float(pricing['discount_amount']),
+        'tax_amount': float(pricing['tax_amount']),
+        'shipping_cost': float(pricing['shipping_cost']),
+        'total_amount': float(pricing['total_amount']),
+    }
+
+
+@require_http_methods(["GET"])
+def cart_detail(request):
+    return JsonResponse({'success': True, 'cart': cart_payload(get_cart(request))})
+
+
+@require_http_methods(["POST"])
+def sync_cart(request):
+    """Remplace le panier serveur par le panier du navigateur ({'items': [{id, quantity, options}]})"""
+    try:
+        items = json.loads(request.body or '{}').get('items', [])
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Données invalides'}, status=400)
+    if not isinstance(items, list):
+        return JsonResponse({'success': False, 'error': 'Données invalides'}, status=400)
+
+    cart = get_cart(request, create=True)
+    set_cart_lines(cart, normalize_cart_lines([item for item in items if isinstance(item, dict)]))
+    return JsonResponse({'success': True, 'cart': cart_payload(cart)})
+
+
+@require_http_methods(["POST"])
+def add_cart_item(request):
+    try:
+        data = json.loads(request.body or '{}')
+        product_id = int(data.get('id'))
+        quantity = int(data.get('quantity', 1))
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Données invalides'}, status=400)
+    if quantity <= 0:
+        return JsonResponse({'success': False, 'error': 'Quantité invalide'}, status=400)
+    if not Product.objects.filter(id=product_id).exists():
+        return JsonResponse({'success': False, 'error': 'Produit non trouvé'}, status=404)
+
+    cart = get_cart(request, create=True)
+    add_to_cart(cart, product_id, quantity, data.get('options') or None)
+    return JsonResponse({'success': True, 'cart': cart_payload(cart)})
+
+
+@require_http_methods(["POST"])
+def apply_coupon(request):
+    """Applique le code promo {'code': ...} au panier ; un code vide retire le code en cours"""
+    try:
+        code = normalize_code(json.loads(request.body or '{}').get('code'))
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Données invalides'}, status=400)
+
+    cart = get_cart(request, create=True)
+    if code:
+        pricing = price_cart(cart, coupon_code=code)
+        if not pricing['coupon']:
+            error = pricing['coupon_error'] or "Votre panier est vide."
+            return JsonResponse({'success': False, 'error': error}, status=400)
+    cart.coupon_code = code
+    cart.save(update_fields=['coupon_code', 'updated_at'])
+    return JsonResponse({'success': True, 'cart': cart_payload(cart)})
@@ -1,3 +1,20 @@
 from django.contrib import admin
+from .models import Coupon, CouponRedemption
 
-# Register your models here.
+
+@admin.register(Coupon)
+class CouponAdmin(admin.ModelAdmin):
+    list_display = ['code', 'discount_type', 'value', 'scope', 'used_count', 'max_uses', 'valid_until', 'is_active']
+    list_filter = ['is_active', 'discount_type', 'scope']
+    search_fields = ['code', 'description']
+    filter_horizontal = ['categories', 'products']
+    readonly_fields = ['used_count', 'created_at', 'updated_at']
+
+
+@admin.register(CouponRedemption)
+class CouponRedemptionAdmin(admin.ModelAdmin):
+    list_display = ['coupon', 'user', 'order', 'discount_amount', 'created_at']
+    list_filter = ['coupon']
+    search_fields = ['coupon__code', 'user__email', 'order__order_number']
+    raw_id_fields = ['user', 'order']
+    readonly_fields = ['coupon', 'user', 'order', 'discount_amount', 'created_at']
@@ -0,0 +1,141 @@
+# coupons/engine.py
+import time
+import uuid
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Coupon, CouponRedemption
+
+# Les règles actives sont compilées en mémoire et recompilées lorsque cette version change
+RULES_VERSION_KEY = 'coupons:rules:version'
+
+# Âge maximum des règles compilées, même sans invalidation (cache non partagé entre processus)
+COUPON_RULES_TTL = getattr(settings, 'COUPON_RULES_TTL', 5 * 60)
+
+CENT = Decimal('0.01')
+
+
+class CouponError(Exception):
+    """Code promo refusé ; le message peut être affiché au client"""
+
+
+class CompiledCoupon:
+    """Règle d'un code promo actif, évaluée sans requête (catégories et produits pré-chargés)"""
+
+    def __init__(self, coupon):
+        self.id = coupon.id
+        self.code = coupon.code
+        self.discount_type = coupon.discount_type
+        self.value = coupon.value
+        self.scope = coupon.scope
+        self.category_ids = frozenset(category.id for category in coupon.categories.all())
+        self.product_ids = frozenset(product.id for product in coupon.products.all())
+        self.min_subtotal = coupon.min_subtotal
+        self.max_uses = coupon.max_uses
+        self.max_uses_per_user = coupon.max_uses_per_user
+        self.used_count = coupon.used_count
+        self.valid_from = coupon.valid_from
+        self.valid_until = coupon.valid_until
+
+    def applies_to(self, product):
+        if self.scope == 'category':
+            return product.category_id in self.category_ids
+        if self.scope == 'product':
+            return product.id in self.product_ids
+        return True
+
+    def discount(self, lines):
+        """Remise sur les lignes tarifées (cart.pricing), plafonnée au montant des articles concernés"""
+        eligible = sum((line['total_price'] for line in lines if self.applies_to(line['product'])), Decimal('0.00'))
+        if self.discount_type == 'percentage':
+            amount = (eligible * self.value / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+        else:
+            amount = self.value
+        return min(amount, eligible)
+
+
+_compiled = {'version': None, 'loaded_at': 0.0, 'rules': {}}
+
+
+def _rules_version():
+    version = cache.get(RULES_VERSION_KEY)
+    if version is None:
+        cache.add(RULES_VERSION_KEY, uuid.uuid4().hex[:12], None)
+        version = cache.get(RULES_VERSION_KEY)
+    return version
+
+
+def get_rules():
+    """{code: CompiledCoupon} des codes actifs, compilés une fois par processus et par version"""
+    version = _rules_version()
+    if _compiled['version'] != version or time.monotonic() - _compiled['loaded_at'] > COUPON_RULES_TTL:
+        coupons = Coupon.objects.filter(is_active=True).prefetch_related('categories', 'products')
+        _compiled['rules'] = {coupon.code: CompiledCoupon(coupon) for coupon in coupons}
+        _compiled['version'] = version
+        _compiled['loaded_at'] = time.monotonic()
+    return _compiled['rules']
+
+
+def invalidate_rules():
+    """Force la recompilation des règles dans tous les processus, après validation de la transaction"""
+    transaction.on_commit(lambda: cache.delete(RULES_VERSION_KEY))
+
+
+def normalize_code(code):
+    return (code or '').strip().upper()
+
+
+def evaluate_coupon(code, lines, subtotal):
+    """
+    Retourne (règle, remise) pour le code et les lignes tarifées du panier, ou lève CouponError.
+    Aucune requête : seules les règles compilées sont consultées. Le nombre d'utilisations
+    est celui de la compilation ; redeem_coupon fait foi au moment de la commande.
+    """
+    rule = get_rules().get(normalize_code(code))
+    if rule is None:
+        raise CouponError("Code promo invalide.")
+
+    now = timezone.now()
+    if rule.valid_from and now < rule.valid_from:
+        raise CouponError("Ce code promo n'est pas encore valable.")
+    if rule.valid_until and now >= rule.valid_until:
+        raise CouponError("Ce code promo a expiré.")
+    if rule.max_uses is not None and rule.used_count >= rule.max_uses:
+        raise CouponError("Ce code promo a atteint sa limite d'utilisation.")
+    if subtotal < rule.min_subtotal:
+        raise CouponError(f"Ce code promo nécessite un sous-total d'au moins {rule.min_subtotal} F CFA.")
+
+    discount = rule.discount(lines)
+    if discount <= 0:
+        raise CouponError("Ce code promo ne s'applique à aucun article de votre panier.")
+    return rule, discount
+
+
+def redeem_coupon(rule, user, order, discount_amount):
+    """
+    Consomme une utilisation du code pour la commande. À appeler dans la transaction
+    de la commande : l'incrément est un UPDATE conditionnel (used_count < max_uses),
+    sans lecture préalable, donc deux commandes simultanées ne peuvent pas dépasser la limite.
+    Cet UPDATE verrouille aussi la ligne du code jusqu'à la fin de la transaction : les
+    utilisations simultanées du même code passent l'une après l'autre, et le décompte par
+    client qui suit voit les utilisations déjà validées.
+    """
+    with transaction.atomic():
+        updated = Coupon.objects.filter(id=rule.id, is_active=True).filter(
+            Q(max_uses__isnull=True) | Q(used_count__lt=F('max_uses'))
+        ).update(used_count=F('used_count') + 1)
+        if not updated:
+            raise CouponError("Ce code promo a atteint sa limite d'utilisation.")
+
+        if rule.max_uses_per_user is not None:
+            used = CouponRedemption.objects.filter(coupon_id=rule.id, user=user).count()
+            if used >= rule.max_uses_per_user:
+                # Le point de sauvegarde annule l'incrément
+                raise CouponError("Vous avez déjà utilisé ce code promo.")
+
+        return CouponRedemption.objects.create(coupon_id=rule.id, user=user, order=order, discount_amount=discount_amount)
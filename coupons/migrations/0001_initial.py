@@ -0,0 +1,63 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('orders', '0012_order_discount_amount'),
+        ('products', '0003_stockreservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Coupon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True, verbose_name='Code')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Description')),
+                ('discount_type', models.CharField(choices=[('percentage', 'Pourcentage'), ('fixed', 'Montant fixe')], default='percentage', max_length=10, verbose_name='Type de remise')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valeur')),
+                ('scope', models.CharField(choices=[('cart', 'Tout le panier'), ('category', 'Catégories'), ('product', 'Produits')], default='cart', max_length=10, verbose_name='Portée')),
+                ('min_subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Sous-total minimum')),
+                ('max_uses', models.PositiveIntegerField(blank=True, null=True, verbose_name='Utilisations maximum')),
+                ('max_uses_per_user', models.PositiveIntegerField(blank=True, null=True, verbose_name='Utilisations maximum par client')),
+                ('used_count', models.PositiveIntegerField(default=0, verbose_name='Utilisations')),
+                ('valid_from', models.DateTimeField(blank=True, null=True, verbose_name='Valable à partir du')),
+                ('valid_until', models.DateTimeField(blank=True, null=True, verbose_name="Valable jusqu'au")),
+                ('is_active', models.BooleanField(default=True, verbose_name='Actif')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de mise à jour')),
+                ('categories', models.ManyToManyField(blank=True, related_name='coupons', to='products.category', verbose_name='Catégories')),
+                ('products', models.ManyToManyField(blank=True, related_name='coupons', to='products.product', verbose_name='Produits')),
+            ],
+            options={
+                'verbose_name': 'Code promo',
+                'verbose_name_plural': 'Codes promo',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CouponRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discount_amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Remise')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date')),
+                ('coupon', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='redemptions', to='coupons.coupon', verbose_name='Code promo')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemption', to='orders.order', verbose_name='Commande')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coupon_redemptions', to=settings.AUTH_USER_MODEL, verbose_name='Client')),
+            ],
+            options={
+                'verbose_name': 'Utilisation de code promo',
+                'verbose_name_plural': 'Utilisations de codes promo',
+                'indexes': [models.Index(fields=['coupon', 'user'], name='coupons_cou_coupon__5ef611_idx')],
+            },
+        ),
+    ]
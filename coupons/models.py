@@ -1,3 +1,83 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from products.models import Category, Product
+
+
+class Coupon(models.Model):
+    DISCOUNT_TYPE_CHOICES = [
+        ('percentage', 'Pourcentage'),
+        ('fixed', 'Montant fixe'),
+    ]
+
+    SCOPE_CHOICES = [
+        ('cart', 'Tout le panier'),
+        ('category', 'Catégories'),
+        ('product', 'Produits'),
+    ]
+
+    code = models.CharField(max_length=50, unique=True, verbose_name="Code")
+    description = models.CharField(max_length=255, blank=True, verbose_name="Description")
+    discount_type = models.CharField(max_length=10, choices=DISCOUNT_TYPE_CHOICES, default='percentage', verbose_name="Type de remise")
+    value = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valeur")
+
+    # Articles concernés par la remise
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, default='cart', verbose_name="Portée")
+    categories = models.ManyToManyField(Category, blank=True, related_name="coupons", verbose_name="Catégories")
+    products = models.ManyToManyField(Product, blank=True, related_name="coupons", verbose_name="Produits")
+    min_subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Sous-total minimum")
+
+    # Limites d'utilisation (vides = illimité)
+    max_uses = models.PositiveIntegerField(null=True, blank=True, verbose_name="Utilisations maximum")
+    max_uses_per_user = models.PositiveIntegerField(null=True, blank=True, verbose_name="Utilisations maximum par client")
+    used_count = models.PositiveIntegerField(default=0, verbose_name="Utilisations")
+
+    valid_from = models.DateTimeField(null=True, blank=True, verbose_name="Valable à partir du")
+    valid_until = models.DateTimeField(null=True, blank=True, verbose_name="Valable jusqu'au")
+    is_active = models.BooleanField(default=True, verbose_name="Actif")
+
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
+
+    def __str__(self):
+        return self.code
+
+    def save(self, *args, **kwargs):
+        # Les codes sont saisis sans tenir compte de la casse
+        self.code = self.code.strip().upper()
+        super().save(*args, **kwargs)
+
+    class Meta:
+        verbose_name = "Code promo"
+        verbose_name_plural = "Codes promo"
+        ordering = ['-created_at']
+
+
+class CouponRedemption(models.Model):
+    """Utilisation d'un code promo par une commande"""
+    coupon = models.ForeignKey(Coupon, on_delete=models.PROTECT, related_name="redemptions", verbose_name="Code promo")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="coupon_redemptions",
+        verbose_name="Client"
+    )
+    order = models.OneToOneField(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name="coupon_redemption",
+        verbose_name="Commande"
+    )
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Remise")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date")
+
+    def __str__(self):
+        return f"{self.coupon.code} - {self.order}"
+
+    class Meta:
+        verbose_name = "Utilisation de code promo"
+        verbose_name_plural = "Utilisations de codes promo"
+        indexes = [
+            models.Index(fields=['coupon', 'user']),  # Limite d'utilisation par client
+        ]
@@ -0,0 +1,14 @@
+# coupons/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .engine import invalidate_rules
+from .models import Coupon
+
+
+@receiver([post_save, post_delete], sender=Coupon)
+@receiver(m2m_changed, sender=Coupon.categories.through)
+@receiver(m2m_changed, sender=Coupon.products.through)
+def invalidate_coupon_rules(sender, **kwargs):
+    """Les règles compilées ne sont plus valables dès qu'un code promo change"""
+    invalidate_rules()
@@ -1,3 +1,125 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from orders.checkout import CheckoutError, place_order
+from orders.models import Order
+from products.models import Category, Product
+from .engine import CouponError, evaluate_coupon, get_rules, redeem_coupon
+from .models import Coupon, CouponRedemption
+
+
+def make_user(email):
+    return User.objects.create_user(email=email, password='secret', first_name='Awa', last_name='Diop')
+
+
+def make_order(customer, order_number):
+    return Order.objects.create(
+        customer=customer, order_number=order_number, subtotal=Decimal('10.00'), total_amount=Decimal('10.00'),
+        payment_method='card', shipping_address_text='1 rue A', billing_address_text='1 rue A'
+    )
+
+
+class CouponEngineTests(TestCase):
+    """Évaluation des codes sur les règles compilées et consommation atomique"""
+
+    def setUp(self):
+        # Nouvelle version des règles : la compilation du test précédent n'est pas réutilisée
+        cache.clear()
+        self.customer = make_user('client@example.com')
+        self.jewels = Category.objects.create(name='Bijoux', icon='fas fa-gem')
+        self.bags = Category.objects.create(name='Sacs', icon='fas fa-bag')
+        self.ring = Product.objects.create(category=self.jewels, name='Bague', price=Decimal('40.00'), stock=10)
+        self.bag = Product.objects.create(category=self.bags, name='Sac', price=Decimal('60.00'), stock=10)
+
+    def priced(self, *products):
+        return [{'product': product, 'total_price': product.price} for product in products]
+
+    def test_percentage_on_category(self):
+        coupon = Coupon.objects.create(code=' bijoux10 ', value=Decimal('10'), scope='category')
+        coupon.categories.add(self.jewels)
+
+        rule, discount = evaluate_coupon('Bijoux10', self.priced(self.ring, self.bag), Decimal('100.00'))
+        self.assertEqual(rule.code, 'BIJOUX10')
+        self.assertEqual(discount, Decimal('4.00'))
+
+        with self.assertRaisesMessage(CouponError, "aucun article"):
+            evaluate_coupon('BIJOUX10', self.priced(self.bag), Decimal('60.00'))
+
+    def test_fixed_discount_is_capped_and_checks_conditions(self):
+        Coupon.objects.create(code='MOINS50', discount_type='fixed', value=Decimal('50'), min_subtotal=Decimal('30'))
+        Coupon.objects.create(code='FUTUR', value=Decimal('5'), valid_from=timezone.now() + timedelta(days=1))
+        Coupon.objects.create(code='INACTIF', value=Decimal('5'), is_active=False)
+
+        self.assertEqual(evaluate_coupon('MOINS50', self.priced(self.ring), Decimal('40.00'))[1], Decimal('40.00'))
+        with self.assertRaisesMessage(CouponError, "sous-total"):
+            evaluate_coupon('MOINS50', self.priced(self.ring), Decimal('20.00'))
+        with self.assertRaisesMessage(CouponError, "pas encore valable"):
+            evaluate_coupon('FUTUR', self.priced(self.ring), Decimal('40.00'))
+        with self.assertRaisesMessage(CouponError, "invalide"):
+            evaluate_coupon('INACTIF', self.priced(self.ring), Decimal('40.00'))
+
+    def test_rules_are_recompiled_after_a_change(self):
+        coupon = Coupon.objects.create(code='ETE', value=Decimal('10'))
+        self.assertIn('ETE', get_rules())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            coupon.is_active = False
+            coupon.save()
+        self.assertNotIn('ETE', get_rules())
+
+    def test_concurrent_redemptions_cannot_exceed_max_uses(self):
+        coupon = Coupon.objects.create(code='UNIQUE', value=Decimal('10'), max_uses=1)
+        # Deux paiements ont évalué le code avec la même compilation (used_count = 0)
+        rule = get_rules()['UNIQUE']
+        other = make_user('autre@example.com')
+
+        redeem_coupon(rule, self.customer, make_order(self.customer, 'CMD-1'), Decimal('1.00'))
+        with self.assertRaisesMessage(CouponError, "limite"):
+            redeem_coupon(rule, other, make_order(other, 'CMD-2'), Decimal('1.00'))
+
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 1)
+        self.assertEqual(CouponRedemption.objects.count(), 1)
+
+    def test_per_user_limit_releases_the_use(self):
+        coupon = Coupon.objects.create(code='CLIENT', value=Decimal('10'), max_uses=5, max_uses_per_user=1)
+        rule = get_rules()['CLIENT']
+
+        redeem_coupon(rule, self.customer, make_order(self.customer, 'CMD-1'), Decimal('1.00'))
+        with self.assertRaisesMessage(CouponError, "déjà utilisé"):
+            redeem_coupon(rule, self.customer, make_order(self.customer, 'CMD-2'), Decimal('1.00'))
+
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 1)
+
+    def place(self, code, order_number='CMD-1'):
+        line = {'product_id': self.ring.id, 'name': '', 'sku': '', 'quantity': 2, 'price': Decimal('0'), 'options': None}
+        return place_order(
+            [line], coupon_code=code, customer=self.customer, order_number=order_number, payment_method='card',
+            shipping_address_text='1 rue A', billing_address_text='1 rue A'
+        )
+
+    def test_checkout_records_the_redemption(self):
+        Coupon.objects.create(code='DIX', value=Decimal('10'))
+        order = self.place('dix')
+
+        self.assertEqual(order.discount_amount, Decimal('8.00'))
+        self.assertEqual(order.tax_amount, Decimal('14.40'))
+        self.assertEqual(order.coupon_redemption.discount_amount, Decimal('8.00'))
+
+    def test_refused_redemption_cancels_the_order(self):
+        Coupon.objects.create(code='CLIENT', value=Decimal('10'), max_uses_per_user=1)
+        self.place('CLIENT')
+
+        with self.assertRaises(CheckoutError):
+            self.place('CLIENT', order_number='CMD-2')
 
-# Create your tests here.
+        self.assertEqual(Order.objects.count(), 1)
+        self.ring.refresh_from_db()
+        self.assertEqual(self.ring.stock, 8)
+        self.assertEqual(Coupon.objects.get().used_count, 1)
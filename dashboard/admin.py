@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OrderDailyStats
+
+
+@admin.register(OrderDailyStats)
+class OrderDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'payment_status', 'orders', 'revenue', 'items_sold', 'new_customers')
+    list_filter = ('payment_status',)
+    date_hierarchy = 'date'
+    readonly_fields = ('date', 'payment_status', 'orders', 'revenue', 'items_sold', 'new_customers')
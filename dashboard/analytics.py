@@ -0,0 +1,101 @@
+# dashboard/analytics.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.checkout import first_product_images
+from orders.models import OrderItem
+from products.models import Category, Product
+
+# Couleur des ventes dont la catégorie n'existe plus
+DEFAULT_CATEGORY_COLOR = '#6b21a8'
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_order_items(date_from=None, date_to=None, payment_status='completed'):
+    """Articles des commandes créées entre date_from et date_to (inclus), au statut de paiement donné"""
+    items = OrderItem.objects.all()
+    if payment_status:
+        items = items.filter(order__payment_status=payment_status)
+    if date_from:
+        items = items.filter(order__created_at__gte=_start_of_day(date_from))
+    if date_to:
+        items = items.filter(order__created_at__lt=_start_of_day(date_to + timedelta(days=1)))
+    return items
+
+
+def category_revenue(date_from=None, date_to=None, payment_status='completed'):
+    """
+    Chiffre d'affaires par catégorie en une seule requête groupée (article → produit → catégorie).
+    La catégorie actuelle du produit prime ; pour un produit supprimé, la catégorie
+    enregistrée sur l'article au moment de la commande est utilisée. Les catégories
+    sans vente suivent, avec un chiffre d'affaires nul.
+    Retourne [{'id', 'name', 'color', 'revenue', 'items'}] par chiffre d'affaires décroissant.
+    """
+    rows = filter_order_items(date_from, date_to, payment_status).order_by().annotate(
+        group_id=Coalesce('product__category_id', 'category_id'),
+        group_name=Coalesce('product__category__name', 'category__name', 'category_name'),
+        group_color=Coalesce('product__category__color', 'category__color', Value(DEFAULT_CATEGORY_COLOR)),
+    ).values('group_id', 'group_name', 'group_color').annotate(
+        revenue=Sum('total_price'),
+        items=Sum('quantity'),
+    ).order_by(F('revenue').desc(nulls_last=True), 'group_name')
+
+    categories = [
+        {
+            'id': row['group_id'],
+            'name': row['group_name'] or 'Sans catégorie',
+            'color': row['group_color'],
+            'revenue': row['revenue'] or Decimal('0'),
+            'items': row['items'] or 0,
+        }
+        for row in rows
+    ]
+
+    # Ventes sans catégorie (id None) exclues : NOT IN avec NULL ne retiendrait aucune catégorie
+    sold = {category['id'] for category in categories if category['id'] is not None}
+    categories.extend(
+        {'id': category_id, 'name': name, 'color': color, 'revenue': Decimal('0'), 'items': 0}
+        for category_id, name, color in Category.objects.exclude(id__in=sold).order_by('name').values_list('id', 'name', 'color')
+    )
+    return categories
+
+
+def top_products(limit=5, date_from=None, date_to=None, category_id=None, payment_status=None):
+    """
+    Produits les plus vendus (quantité) : une requête groupée par produit, puis les produits
+    et leur première image chargés en deux requêtes. Les articles dont le produit a été
+    supprimé ne sont pas classés. Filtre optionnel sur la catégorie actuelle du produit.
+    Retourne [{'id', 'name', 'sku', 'sales', 'revenue', 'image'}] (image : URL ou None).
+    """
+    items = filter_order_items(date_from, date_to, payment_status).filter(product__isnull=False)
+    if category_id:
+        items = items.filter(product__category_id=category_id)
+    rows = list(items.order_by().values('product_id').annotate(
+        sales=Sum('quantity'),
+        revenue=Sum('total_price'),
+    ).order_by('-sales', 'product_id')[:limit])
+    if not rows:
+        return []
+
+    product_ids = [row['product_id'] for row in rows]
+    products = Product.objects.only('id', 'name', 'sku').in_bulk(product_ids)
+    images = first_product_images(product_ids)
+    return [
+        {
+            'id': row['product_id'],
+            'name': products[row['product_id']].name,
+            'sku': products[row['product_id']].sku,
+            'sales': row['sales'],
+            'revenue': row['revenue'] or Decimal('0'),
+            'image': images.get(row['product_id']),
+        }
+        for row in rows
+        if row['product_id'] in products
+    ]
@@ -0,0 +1,10 @@
+# dashboard/management/commands/rebuild_daily_stats.py
+from django.core.management.base import BaseCommand
+from dashboard.rollups import rebuild_daily_stats
+
+class Command(BaseCommand):
+    help = 'Recalcule les statistiques journalières des commandes (OrderDailyStats) à partir des commandes'
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"{rows} ligne(s) de statistiques journalières recalculée(s)"))
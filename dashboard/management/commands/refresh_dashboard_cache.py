@@ -0,0 +1,16 @@
+# dashboard/management/commands/refresh_dashboard_cache.py
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.widgets import refresh_widgets, widget_names
+
+class Command(BaseCommand):
+    help = 'Recalcule et met en cache les blocs du tableau de bord (à planifier pour garder le cache chaud)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('widgets', nargs='*', help=f"Blocs à recalculer, parmi : {', '.join(widget_names())} (tous par défaut)")
+
+    def handle(self, *args, **options):
+        unknown = set(options['widgets']) - set(widget_names())
+        if unknown:
+            raise CommandError(f"Bloc(s) inconnu(s) : {', '.join(sorted(unknown))}")
+        refresh_widgets(options['widgets'] or None)
+        self.stdout.write(self.style.SUCCESS("Blocs du tableau de bord mis en cache"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:22
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('payment_status', models.CharField(choices=[('pending', 'En attente'), ('completed', 'Payée'), ('failed', 'Échouée'), ('refunded', 'Remboursée')], max_length=20, verbose_name='Statut du paiement')),
+                ('orders', models.IntegerField(default=0, verbose_name='Commandes')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name="Chiffre d'affaires")),
+                ('items_sold', models.IntegerField(default=0, verbose_name='Articles vendus')),
+                ('new_customers', models.IntegerField(default=0, verbose_name='Nouveaux clients')),
+            ],
+            options={
+                'verbose_name': 'Statistiques journalières des commandes',
+                'verbose_name_plural': 'Statistiques journalières des commandes',
+                'ordering': ['date', 'payment_status'],
+                'indexes': [models.Index(fields=['payment_status', 'date'], name='dashboard_o_payment_91c79b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'payment_status'), name='unique_order_daily_stats')],
+            },
+        ),
+    ]
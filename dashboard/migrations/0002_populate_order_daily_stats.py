@@ -0,0 +1,50 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:22
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_order_daily_stats(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    OrderDailyStats = apps.get_model('dashboard', 'OrderDailyStats')
+    earlier = Order.objects.filter(customer_id=OuterRef('customer_id')).filter(
+        Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__lt=OuterRef('id'))
+    )
+    rows = {}
+    for row in Order.objects.order_by().annotate(
+        day=TruncDate('created_at'), first=~Exists(earlier)
+    ).values('day', 'payment_status').annotate(
+        orders=Count('id'),
+        revenue=Sum('total_amount'),
+        new_customers=Count('id', filter=Q(first=True)),
+    ):
+        rows[(row['day'], row['payment_status'])] = OrderDailyStats(
+            date=row['day'],
+            payment_status=row['payment_status'],
+            orders=row['orders'],
+            revenue=row['revenue'] or Decimal('0'),
+            new_customers=row['new_customers'],
+        )
+    for row in OrderItem.objects.order_by().annotate(day=TruncDate('order__created_at')).values(
+        'day', 'order__payment_status'
+    ).annotate(items=Sum('quantity')):
+        stats = rows.get((row['day'], row['order__payment_status']))
+        if stats is not None:
+            stats.items_sold = row['items'] or 0
+    OrderDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_order_daily_stats'),
+        ('orders', '0012_order_discount_amount'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_order_daily_stats, migrations.RunPython.noop),
+    ]
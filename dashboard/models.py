@@ -1,3 +1,44 @@
+from decimal import Decimal
+
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from orders.models import Order
+
+
+class OrderDailyStats(models.Model):
+    """
+    Agrégats des commandes par jour de création et statut de paiement, tenus à jour
+    à chaque écriture de commande (dashboard/signals.py) et recalculables avec rebuild_daily_stats
+    """
+    date = models.DateField(verbose_name=_("Date"))
+    payment_status = models.CharField(max_length=20, choices=Order.PAYMENT_STATUS_CHOICES, verbose_name=_("Statut du paiement"))
+    orders = models.IntegerField(default=0, verbose_name=_("Commandes"))
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), verbose_name=_("Chiffre d'affaires"))
+    items_sold = models.IntegerField(default=0, verbose_name=_("Articles vendus"))
+    new_customers = models.IntegerField(default=0, verbose_name=_("Nouveaux clients"))
+
+    class Meta:
+        ordering = ['date', 'payment_status']
+        verbose_name = _("Statistiques journalières des commandes")
+        verbose_name_plural = _("Statistiques journalières des commandes")
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'payment_status'], name='unique_order_daily_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['payment_status', 'date']),  # Séries du tableau de bord (commandes payées)
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.payment_status} : {self.orders} commande(s)"
 
-# Create your models here.
+    @classmethod
+    def apply(cls, deltas):
+        """Applique {(date, statut de paiement): {champ: variation}} avec des UPDATE relatifs (sans lecture préalable)"""
+        for (date, payment_status), changes in deltas.items():
+            updates = {field: models.F(field) + delta for field, delta in changes.items() if delta}
+            if not updates:
+                continue
+            if not cls.objects.filter(date=date, payment_status=payment_status).update(**updates):
+                cls.objects.get_or_create(date=date, payment_status=payment_status)
+                cls.objects.filter(date=date, payment_status=payment_status).update(**updates)
@@ -0,0 +1,143 @@
+# dashboard/rollups.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from .models import OrderDailyStats
+
+
+def order_day(order):
+    """Jour (fuseau courant) auquel la commande est comptée"""
+    return timezone.localdate(order.created_at)
+
+
+def is_first_order(order):
+    """Vrai si aucune commande du client n'est antérieure (created_at, id) à celle-ci"""
+    return not Order.objects.filter(customer_id=order.customer_id).filter(
+        Q(created_at__lt=order.created_at) | Q(created_at=order.created_at, id__lt=order.id)
+    ).exists()
+
+
+def order_items_count(order_id):
+    return OrderItem.objects.filter(order_id=order_id).aggregate(total=Sum('quantity'))['total'] or 0
+
+
+def order_share(order, items_sold, first):
+    """Part complète d'une commande dans sa ligne du rollup"""
+    return {
+        'orders': 1,
+        'revenue': order.total_amount or Decimal('0'),
+        'items_sold': items_sold,
+        'new_customers': 1 if first else 0,
+    }
+
+
+def negate(share):
+    return {field: -value for field, value in share.items()}
+
+
+def rebuild_daily_stats():
+    """
+    Recalcule la table OrderDailyStats à partir des commandes : une requête groupée
+    sur les commandes et une sur les articles. Retourne le nombre de lignes écrites.
+    """
+    earlier = Order.objects.filter(customer_id=OuterRef('customer_id')).filter(
+        Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__lt=OuterRef('id'))
+    )
+    rows = {}
+    for row in Order.objects.order_by().annotate(
+        day=TruncDate('created_at'), first=~Exists(earlier)
+    ).values('day', 'payment_status').annotate(
+        orders=Count('id'),
+        revenue=Sum('total_amount'),
+        new_customers=Count('id', filter=Q(first=True)),
+    ):
+        rows[(row['day'], row['payment_status'])] = OrderDailyStats(
+            date=row['day'],
+            payment_status=row['payment_status'],
+            orders=row['orders'],
+            revenue=row['revenue'] or Decimal('0'),
+            new_customers=row['new_customers'],
+        )
+
+    for row in OrderItem.objects.order_by().annotate(day=TruncDate('order__created_at')).values(
+        'day', 'order__payment_status'
+    ).annotate(items=Sum('quantity')):
+        stats = rows.get((row['day'], row['order__payment_status']))
+        if stats is not None:
+            stats.items_sold = row['items'] or 0
+
+    with transaction.atomic():
+        OrderDailyStats.objects.all().delete()
+        OrderDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def _series(kind, start, buckets, label):
+    """Chiffre d'affaires payé par période (jour, semaine ou mois) : une ligne lue par période"""
+    queryset = OrderDailyStats.objects.filter(payment_status='completed', date__gte=start)
+    if kind == 'day':
+        totals = {row['date']: row for row in queryset.values('date', 'revenue', 'orders')}
+    else:
+        trunc = TruncWeek if kind == 'week' else TruncMonth
+        totals = {
+            row['period']: row
+            for row in queryset.order_by().annotate(period=trunc('date')).values('period').annotate(
+                revenue=Sum('revenue'), orders=Sum('orders')
+            )
+        }
+    series = []
+    for bucket in buckets:
+        row = totals.get(bucket, {})
+        series.append({
+            'date': label(bucket),
+            'value': float(row.get('revenue') or 0),
+            'orders': row.get('orders') or 0,
+        })
+    return series
+
+
+def daily_sales(days=7):
+    today = timezone.localdate()
+    buckets = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+    return _series('day', buckets[0], buckets, lambda day: day.strftime('%a'))
+
+
+def weekly_sales(weeks=52):
+    monday = timezone.localdate() - timedelta(days=timezone.localdate().weekday())
+    buckets = [monday - timedelta(weeks=i) for i in range(weeks - 1, -1, -1)]
+    return _series('week', buckets[0], buckets, lambda week: week.strftime('%d/%m'))
+
+
+def monthly_sales(months=12):
+    month = timezone.localdate().replace(day=1)
+    buckets = [month]
+    for i in range(months - 1):
+        month = (month - timedelta(days=1)).replace(day=1)
+        buckets.insert(0, month)
+    return _series('month', buckets[0], buckets, lambda month: month.strftime('%m/%Y'))
+
+
+def sales_kpis(days=7):
+    """
+    Totaux du tableau de bord en une requête sur le rollup : commandes, chiffre d'affaires payé,
+    et les mêmes valeurs sur les `days` derniers jours et la période précédente.
+    """
+    today = timezone.localdate()
+    current = Q(date__gt=today - timedelta(days=days))
+    previous = Q(date__gt=today - timedelta(days=2 * days), date__lte=today - timedelta(days=days))
+    paid = Q(payment_status='completed')
+    result = OrderDailyStats.objects.aggregate(
+        total_orders=Sum('orders'),
+        total_revenue=Sum('revenue', filter=paid),
+        current_orders=Sum('orders', filter=current),
+        previous_orders=Sum('orders', filter=previous),
+        current_revenue=Sum('revenue', filter=paid & current),
+        previous_revenue=Sum('revenue', filter=paid & previous),
+    )
+    return {key: value or 0 for key, value in result.items()}
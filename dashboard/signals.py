@@ -0,0 +1,63 @@
+# dashboard/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from orders.models import Order, order_placed
+from .models import OrderDailyStats
+from .rollups import is_first_order, negate, order_day, order_items_count, order_share
+
+
+@receiver(post_save, sender=Order)
+def update_daily_stats(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        # Les articles sont ajoutés par order_placed, après l'insertion de la commande
+        OrderDailyStats.apply({
+            (order_day(instance), instance.payment_status): order_share(instance, 0, is_first_order(instance))
+        })
+        return
+
+    if update_fields is not None and not {'payment_status', 'total_amount'}.intersection(update_fields):
+        return
+    # Valeurs d'origine (encore celles chargées pendant post_save) ; inconnues : rebuild_daily_stats corrigera l'écart
+    old_status = (getattr(instance, '_loaded_statuses', None) or {}).get('payment_status')
+    old_total = getattr(instance, '_loaded_total', None)
+    if old_status is None or old_total is None:
+        return
+
+    day = order_day(instance)
+    if old_status != instance.payment_status:
+        share = order_share(instance, order_items_count(instance.id), is_first_order(instance))
+        OrderDailyStats.apply({
+            (day, old_status): negate(dict(share, revenue=old_total)),
+            (day, instance.payment_status): share,
+        })
+    elif old_total != instance.total_amount:
+        OrderDailyStats.apply({(day, instance.payment_status): {'revenue': instance.total_amount - old_total}})
+
+
+@receiver(order_placed, sender=Order)
+def add_daily_items_sold(sender, order, items_count, **kwargs):
+    OrderDailyStats.apply({(order_day(order), order.payment_status): {'items_sold': items_count}})
+
+
+@receiver(pre_delete, sender=Order)
+def remember_daily_share(sender, instance, **kwargs):
+    # Les articles et les commandes antérieures du client existent encore avant la suppression
+    instance._daily_share = order_share(instance, order_items_count(instance.id), is_first_order(instance))
+
+
+@receiver(post_delete, sender=Order)
+def deduct_daily_stats(sender, instance, **kwargs):
+    share = getattr(instance, '_daily_share', None)
+    if share is None:
+        return
+    deltas = {(order_day(instance), instance.payment_status): negate(share)}
+
+    # La commande suivante du client devient sa première commande
+    if share['new_customers']:
+        following = Order.objects.filter(customer_id=instance.customer_id).order_by('created_at', 'id').first()
+        if following is not None:
+            key = (order_day(following), following.payment_status)
+            deltas.setdefault(key, {})
+            deltas[key]['new_customers'] = deltas[key].get('new_customers', 0) + 1
+    OrderDailyStats.apply(deltas)
@@ -0,0 +1,14 @@
+# dashboard/tasks.py
+from jobs.queue import register
+from .widgets import REFRESH_DASHBOARD_WIDGETS, refresh_widgets
+
+
+@register(REFRESH_DASHBOARD_WIDGETS, batch_size=20)
+def refresh_dashboard_widgets(jobs):
+    """Recalcule en arrière-plan les blocs expirés du tableau de bord (une fois par bloc pour le lot)"""
+    names = []
+    for job in jobs:
+        for name in job.payload.get('widgets') or []:
+            if name not in names:
+                names.append(name)
+    refresh_widgets(names or None)
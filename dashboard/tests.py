@@ -1,3 +1,115 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from orders.checkout import place_order
+from orders.models import Order
+from products.models import Category, Product
+from .analytics import category_revenue
+from .models import OrderDailyStats
+from .rollups import rebuild_daily_stats, sales_kpis
+
+
+def make_user(email):
+    return User.objects.create_user(email=email, password='secret', first_name='Awa', last_name='Diop')
+
+
+class DashboardTestCase(TestCase):
+    def setUp(self):
+        self.customer = make_user('client@example.com')
+        self.jewels = Category.objects.create(name='Bijoux', icon='fas fa-gem')
+        self.bags = Category.objects.create(name='Sacs', icon='fas fa-bag')
+        self.shoes = Category.objects.create(name='Chaussures', icon='fas fa-shoe-prints')
+        self.ring = Product.objects.create(category=self.jewels, name='Bague', price=Decimal('20.00'), stock=50)
+        self.bag = Product.objects.create(category=self.bags, name='Sac', price=Decimal('50.00'), stock=50)
+
+    def place(self, order_number, *lines, customer=None, **fields):
+        return place_order(
+            [{'product_id': product.id, 'name': '', 'sku': '', 'quantity': quantity, 'price': Decimal('0'),
+              'options': None} for product, quantity in lines],
+            customer=customer or self.customer, order_number=order_number, payment_method='card',
+            shipping_address_text='1 rue A', billing_address_text='1 rue A', **fields
+        )
+
+
+class DailyStatsTests(DashboardTestCase):
+    """Rollup journalier tenu à jour par deltas : toujours égal à un recalcul complet"""
+
+    def stats(self):
+        # Une ligne vidée par les deltas n'existe pas après recalcul
+        return sorted(
+            row for row in OrderDailyStats.objects.values_list(
+                'date', 'payment_status', 'orders', 'revenue', 'items_sold', 'new_customers'
+            ) if any(row[2:])
+        )
+
+    def assertRollupInSync(self):
+        maintained = self.stats()
+        rebuild_daily_stats()
+        self.assertEqual(maintained, self.stats())
+
+    def test_deltas_match_rebuild(self):
+        first = self.place('CMD-1', (self.ring, 2), (self.bag, 1))
+        second = self.place('CMD-2', (self.ring, 1))
+        self.place('CMD-3', (self.bag, 3), customer=make_user('autre@example.com'), payment_status='completed')
+        self.assertRollupInSync()
+
+        second.payment_status = 'completed'
+        second.save()
+        self.assertRollupInSync()
+
+        second.total_amount = Decimal('99.00')
+        second.save(update_fields=['total_amount'])
+        self.assertRollupInSync()
+
+        # Le client reste nouveau : sa commande suivante devient la première
+        first.delete()
+        self.assertRollupInSync()
+        self.assertEqual(sum(row.new_customers for row in OrderDailyStats.objects.all()), 2)
+
+    def test_deleting_a_stale_instance(self):
+        order = self.place('CMD-1', (self.ring, 1))
+        Order.objects.filter(id=order.id).update(payment_status='completed')
+        rebuild_daily_stats()
+
+        order.delete()
+        self.assertRollupInSync()
+        self.assertEqual(self.stats(), [])
+
+    def test_kpis_read_the_rollup(self):
+        self.place('CMD-1', (self.ring, 1), payment_status='completed')
+        self.place('CMD-2', (self.bag, 1))
+
+        kpis = sales_kpis()
+        self.assertEqual(kpis['total_orders'], 2)
+        self.assertEqual(kpis['current_orders'], 2)
+        self.assertEqual(kpis['total_revenue'], Decimal('24.00'))
+
+
+class CategoryRevenueTests(DashboardTestCase):
+    """Chiffre d'affaires par catégorie"""
+
+    def test_every_category_is_listed(self):
+        self.place('CMD-1', (self.ring, 3), (self.bag, 1), payment_status='completed')
+        self.place('CMD-2', (self.bag, 5))
+
+        rows = [(row['name'], row['revenue'], row['items']) for row in category_revenue()]
+        self.assertEqual(rows, [
+            ('Bijoux', Decimal('60.00'), 3),
+            ('Sacs', Decimal('50.00'), 1),
+            ('Chaussures', Decimal('0'), 0),
+        ])
+
+    def test_deleted_product_keeps_its_category(self):
+        self.place('CMD-1', (self.bag, 1), payment_status='completed')
+        self.bag.delete()
+
+        self.assertEqual(category_revenue()[0]['name'], 'Sacs')
+        self.assertEqual(category_revenue()[0]['revenue'], Decimal('50.00'))
+
+    def test_no_sales(self):
+        self.assertEqual(
+            [(row['name'], row['revenue']) for row in category_revenue()],
+            [('Bijoux', Decimal('0')), ('Chaussures', Decimal('0')), ('Sacs', Decimal('0'))]
+        )
@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.dashboard, name='admin_dashboard'),
+    path('api/category-revenue/', views.category_revenue_data, name='dashboard_category_revenue'),
+    path('api/top-products/', views.top_products_data, name='dashboard_top_products'),
     path('profile/', views.admin_profile, name='admin_profile'),
     path('profile/address/', views.admin_address, name='admin_address'),
     path('profile/address/delete/<int:address_id>/', views.delete_address, name='delete_address'),
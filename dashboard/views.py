@@ -1,273 +1,117 @@
 # views.py
-from pyexpat.errors import messages
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Sum, Avg
-from django.utils import timezone
-from datetime import timedelta
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
 from django.utils.translation import gettext_lazy as _
+from datetime import datetime
 import json
 import os
 
+from accounts.models import UserAddress
+from orders.models import Order
+from . import analytics
+from .widgets import get_widgets
 
+@login_required
+def dashboard(request):
+    # Chaque bloc est mis en cache avec sa propre durée (dashboard/widgets.py)
+    widgets = get_widgets(['kpis', 'sales', 'categories', 'top_products', 'recent_orders'])
 
-from accounts.models import User, UserAddress
-from orders.models import Order, OrderItem
-from products.models import Product, Category
+    # Prepare chart data as JSON for JavaScript
+    chart_data = dict(widgets['sales'], categories=widgets['categories'])
+    
+    context = dict(
+        widgets['kpis'],
+        chart_data=json.dumps(chart_data),
+        top_products=widgets['top_products'],
+        recent_orders=widgets['recent_orders'],
+    )
+    
+    return render(request, 'dashboard/dashboard.html', context)
 
 
+def _report_filters(params):
+    """
+    Filtres communs des rapports JSON : date_from, date_to (AAAA-MM-JJ) et payment_status
+    ('completed' par défaut, 'all' pour tous). Lève ValueError si une valeur est invalide.
+    """
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        value = params.get(name, '')
+        try:
+            filters[name] = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        except ValueError:
+            raise ValueError(f'Date invalide pour {name} (format AAAA-MM-JJ)')
 
+    filters['payment_status'] = params.get('payment_status', 'completed')
+    if filters['payment_status'] not in dict(Order.PAYMENT_STATUS_CHOICES) and filters['payment_status'] != 'all':
+        raise ValueError('Statut de paiement invalide')
+    return filters
 
 
+def _report_query(filters):
+    """Arguments des fonctions de dashboard.analytics correspondant aux filtres"""
+    return {
+        'date_from': filters['date_from'],
+        'date_to': filters['date_to'],
+        'payment_status': None if filters['payment_status'] == 'all' else filters['payment_status'],
+    }
 
-# views.py
-from django.shortcuts import render
-from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Sum, Avg
-from django.utils import timezone
-from datetime import timedelta
-import json
 
-from accounts.models import User
-from orders.models import Order, OrderItem
-from products.models import Product, Category
+def _report_response(filters, **data):
+    return JsonResponse(dict({
+        'success': True,
+        'date_from': filters['date_from'].isoformat() if filters['date_from'] else None,
+        'date_to': filters['date_to'].isoformat() if filters['date_to'] else None,
+        'payment_status': filters['payment_status'],
+    }, **data))
+
 
 @login_required
-def dashboard(request):
-    # Default image SVG as data URI - no need for a file
-    DEFAULT_IMAGE = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='40' height='40' viewBox='0 0 40 40'%3E%3Crect width='40' height='40' fill='%23f3f4f6'/%3E%3Cpath d='M20 15C18.3431 15 17 16.3431 17 18C17 19.6569 18.3431 21 20 21C21.6569 21 23 19.6569 23 18C23 16.3431 21.6569 15 20 15Z' fill='%23a1a1aa'/%3E%3Cpath d='M14 25.6C14 25.0399 14.3668 24.5397 14.8944 24.3526C16.8738 23.6925 18.4426 23.3333 20 23.3333C21.5574 23.3333 23.1262 23.6925 25.1056 24.3526C25.6332 24.5397 26 25.0399 26 25.6V26.6667H14V25.6Z' fill='%23a1a1aa'/%3E%3Cpath d='M10 6.66667C8.15905 6.66667 6.66667 8.15905 6.66667 10V30C6.66667 31.841 8.15905 33.3333 10 33.3333H30C31.841 33.3333 33.3333 31.841 33.3333 30V10C33.3333 8.15905 31.841 6.66667 30 6.66667H10ZM30 10V30H10V10H30Z' fill='%23a1a1aa'/%3E%3C/svg%3E"
-    
-    # Get the current date and calculate dates for last week and last month
-    today = timezone.now()
-    last_week = today - timedelta(days=7)
-    last_month = today - timedelta(days=30)
-    
-    # Basic statistics
-    stats = {
-        'total_orders': Order.objects.count(),
-        'total_revenue': Order.objects.filter(payment_status='completed').aggregate(total=Sum('total_amount'))['total'] or 0,
-        'new_customers': User.objects.filter(date_joined__gte=last_month, user_type='CLIENT').count(),
-        'out_of_stock': Product.objects.filter(stock=0, status='active').count(),
-    }
-    
-    # Period comparison for percentages (last week vs previous week)
-    previous_week = last_week - timedelta(days=7)
-    
-    # Orders comparison
-    current_period_orders = Order.objects.filter(created_at__gte=last_week).count()
-    previous_period_orders = Order.objects.filter(created_at__gte=previous_week, created_at__lt=last_week).count()
-    if previous_period_orders > 0:
-        orders_percentage = ((current_period_orders - previous_period_orders) / previous_period_orders) * 100
-    else:
-        orders_percentage = 100 if current_period_orders > 0 else 0
-        
-    # Revenue comparison
-    current_revenue = Order.objects.filter(created_at__gte=last_week, payment_status='completed').aggregate(total=Sum('total_amount'))['total'] or 0
-    previous_revenue = Order.objects.filter(created_at__gte=previous_week, created_at__lt=last_week, payment_status='completed').aggregate(total=Sum('total_amount'))['total'] or 0
-    if previous_revenue > 0:
-        revenue_percentage = ((current_revenue - previous_revenue) / previous_revenue) * 100
-    else:
-        revenue_percentage = 100 if current_revenue > 0 else 0
-    
-    # Customers comparison
-    current_new_customers = User.objects.filter(date_joined__gte=last_week, user_type='CLIENT').count()
-    previous_new_customers = User.objects.filter(date_joined__gte=previous_week, date_joined__lt=last_week, user_type='CLIENT').count()
-    if previous_new_customers > 0:
-        customers_percentage = ((current_new_customers - previous_new_customers) / previous_new_customers) * 100
-    else:
-        customers_percentage = 100 if current_new_customers > 0 else 0
-    
-    # Stock comparison
-    current_out_of_stock = Product.objects.filter(stock=0, status='active').count()
-    # Since Product model doesn't have updated_at field, we can't do time-based comparison
-    # So we'll just keep a neutral comparison for stocks
-    previous_out_of_stock = 0
-    stock_percentage = 0  # Neutral for stock - it's not directly comparable
-    
-    # Daily sales data with better error handling and debug output
-    daily_sales = []
+@require_http_methods(["GET"])
+def category_revenue_data(request):
+    """Chiffre d'affaires par catégorie (JSON) ; paramètres date_from, date_to (AAAA-MM-JJ) et payment_status"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission refusée'}, status=403)
+
     try:
-        # For the past 7 days
-        for i in range(6, -1, -1):
-            day = today - timedelta(days=i)
-            day_total = Order.objects.filter(
-                created_at__date=day.date(),
-                payment_status='completed'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-            
-            # Add to the data list
-            daily_sales.append({
-                'date': day.strftime('%a'),
-                'value': float(day_total)
-            })
-        
-        # Debug output
-        print(f"Daily sales data: {daily_sales}")
-        
-    except Exception as e:
-        print(f"Error generating daily sales data: {e}")
-        # Provide default data on error
-        daily_sales = [
-            {'date': 'Lun', 'value': 0},
-            {'date': 'Mar', 'value': 0},
-            {'date': 'Mer', 'value': 0},
-            {'date': 'Jeu', 'value': 0},
-            {'date': 'Ven', 'value': 0},
-            {'date': 'Sam', 'value': 0},
-            {'date': 'Dim', 'value': 0}
-        ]
-    
-    # Category data for pie chart with better error handling
-    categories_data = []
+        filters = _report_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    categories = analytics.category_revenue(**_report_query(filters))
+    return _report_response(filters, categories=[dict(row, revenue=float(row['revenue'])) for row in categories])
+
+
+@login_required
+@require_http_methods(["GET"])
+def top_products_data(request):
+    """
+    Produits les plus vendus (JSON) ; paramètres limit (10 par défaut, 100 maximum), category,
+    date_from, date_to (AAAA-MM-JJ) et payment_status
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission refusée'}, status=403)
+
     try:
-        categories = Category.objects.all()
-        
-        # If there are no categories, create a default one
-        if not categories.exists():
-            categories_data.append({
-                'name': 'Pas de catégories',
-                'value': 100,
-                'color': '#6b21a8'
-            })
-        else:
-            for category in categories:
-                # Get all SKUs for products in this category
-                category_skus = Product.objects.filter(category=category).values_list('sku', flat=True)
-                
-                # Calculate total sales for these SKUs
-                category_total = 0
-                if category_skus:
-                    category_total = OrderItem.objects.filter(
-                        order__payment_status='completed',
-                        product_sku__in=category_skus
-                    ).aggregate(total=Sum('total_price'))['total'] or 0
-                
-                # Always add the category, even with zero sales
-                categories_data.append({
-                    'name': category.name,
-                    'value': float(category_total) if category_total else 0,
-                    'color': category.color
-                })
-                
-        # Debug output
-        print(f"Categories data: {categories_data}")
-        
-        # If all categories have 0 value, add a default
-        if all(cat['value'] == 0 for cat in categories_data):
-            categories_data = [{
-                'name': 'Pas de données de vente',
-                'value': 100,
-                'color': '#6b21a8'
-            }]
-            
-    except Exception as e:
-        print(f"Error generating categories data: {e}")
-        # Provide default data on error
-        categories_data = [{
-            'name': 'Erreur de données',
-            'value': 100,
-            'color': '#6b21a8'
-        }]
-    
-    # Top products - different approach with better error handling
-    top_products_data = []
-    
+        filters = _report_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     try:
-        # Get all order items with their quantities
-        order_items = OrderItem.objects.values('product_name', 'product_sku').annotate(
-            sales_count=Sum('quantity')
-        ).order_by('-sales_count')[:5]
-        
-        if order_items:
-            max_sales = order_items[0]['sales_count']
-            
-            for item in order_items:
-                product_sku = item['product_sku']
-                product_name = item['product_name']
-                sales_count = item['sales_count']
-                
-                # Try to find the corresponding product
-                try:
-                    product = Product.objects.get(sku=product_sku)
-                    product_image = product.media.filter(media_type='image').first()
-                    if product_image and product_image.file:
-                        image_url = product_image.file.url
-                    else:
-                        image_url = DEFAULT_IMAGE
-                except Product.DoesNotExist:
-                    # If product not found, still display with default image
-                    image_url = DEFAULT_IMAGE
-                except Exception as e:
-                    print(f"Error getting product image: {e}")
-                    image_url = DEFAULT_IMAGE
-                
-                # Add to the data list
-                top_products_data.append({
-                    'id': product.id if 'product' in locals() else '0',
-                    'name': product_name,
-                    'sales': sales_count,
-                    'image': image_url,
-                    'percentage': (sales_count / max_sales) * 100 if max_sales > 0 else 0
-                })
-        
-        # If no data, add a placeholder
-        if not top_products_data:
-            top_products_data.append({
-                'id': '0',
-                'name': 'Pas de données disponibles',
-                'sales': 0,
-                'image': DEFAULT_IMAGE,
-                'percentage': 0
-            })
-            
-    except Exception as e:
-        print(f"Error in top products calculation: {e}")
-        # Add a placeholder on error
-        top_products_data.append({
-            'id': '0',
-            'name': 'Erreur de chargement des données',
-            'sales': 0,
-            'image': DEFAULT_IMAGE,
-            'percentage': 0
-        })
-    
-    # Recent orders
-    recent_orders = Order.objects.select_related('customer').order_by('-created_at')[:10]
-    
-    recent_orders_data = []
-    for order in recent_orders:
-        items_count = order.items.count()
-        recent_orders_data.append({
-            'id': order.order_number,
-            'customer_name': order.customer.get_full_name(),
-            'customer_image': order.customer.profile_picture.url if order.customer.profile_picture else DEFAULT_IMAGE,
-            'products_count': items_count,
-            'total': order.total_amount,
-            'status': order.status,
-            'date': order.created_at.strftime('%Y-%m-%d'),
-        })
-    
-    # Prepare chart data as JSON for JavaScript
-    # Make sure all data is JSON serializable
-    chart_data = {
-        'dailySales': [{'date': item['date'], 'value': float(item['value'])} for item in daily_sales],
-        'weeklySales': [],  # You can implement weekly data similarly
-        'monthlySales': [],  # You can implement monthly data similarly
-        'categories': [{'name': item['name'], 'value': float(item['value']), 'color': item['color']} for item in categories_data],
-    }
-    
-    context = {
-        'stats': stats,
-        'orders_percentage': round(orders_percentage, 1),
-        'revenue_percentage': round(revenue_percentage, 1),
-        'customers_percentage': round(customers_percentage, 1),
-        'stock_percentage': stock_percentage,
-        'chart_data': json.dumps(chart_data),
-        'top_products': top_products_data,
-        'recent_orders': recent_orders_data,
-    }
-    
-    return render(request, 'dashboard/dashboard.html', context)
+        limit = min(max(int(request.GET.get('limit') or 10), 1), 100)
+        category_id = int(request.GET.get('category') or 0) or None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit et category doivent être des nombres entiers'}, status=400)
+
+    products = analytics.top_products(limit, category_id=category_id, **_report_query(filters))
+    return _report_response(
+        filters,
+        limit=limit,
+        category=category_id,
+        products=[dict(row, revenue=float(row['revenue'])) for row in products],
+    )
 
 
 
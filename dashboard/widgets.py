@@ -0,0 +1,218 @@
+# dashboard/widgets.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import User
+from jobs.queue import enqueue
+from orders.models import Order
+from products.models import Product
+from . import analytics, rollups
+
+# Durée de validité (secondes) des données de chaque bloc du tableau de bord
+DASHBOARD_WIDGET_TTLS = dict({
+    'kpis': 60,
+    'sales': 5 * 60,
+    'categories': 5 * 60,
+    'top_products': 5 * 60,
+    'recent_orders': 30,
+}, **getattr(settings, 'DASHBOARD_WIDGET_TTLS', {}))
+
+# Une valeur expirée reste servie pendant ce délai, le temps qu'un seul processus la recalcule
+DASHBOARD_WIDGET_STALE_TTL = getattr(settings, 'DASHBOARD_WIDGET_STALE_TTL', 60 * 60)
+# Durée maximale d'un recalcul : au-delà, le verrou est libéré pour un autre processus
+DASHBOARD_WIDGET_LOCK_TIMEOUT = getattr(settings, 'DASHBOARD_WIDGET_LOCK_TIMEOUT', 60)
+# Attente maximale (secondes) du recalcul d'un autre processus quand aucune valeur n'est en cache
+DASHBOARD_WIDGET_WAIT = getattr(settings, 'DASHBOARD_WIDGET_WAIT', 5)
+# True : les valeurs expirées sont recalculées par le worker (jobs) au lieu de la requête
+DASHBOARD_BACKGROUND_REFRESH = getattr(settings, 'DASHBOARD_BACKGROUND_REFRESH', False)
+
+REFRESH_DASHBOARD_WIDGETS = 'dashboard.refresh_widgets'
+
+# Image SVG par défaut (data URI) des produits et des clients sans photo
+DEFAULT_IMAGE = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='40' height='40' viewBox='0 0 40 40'%3E%3Crect width='40' height='40' fill='%23f3f4f6'/%3E%3Cpath d='M20 15C18.3431 15 17 16.3431 17 18C17 19.6569 18.3431 21 20 21C21.6569 21 23 19.6569 23 18C23 16.3431 21.6569 15 20 15Z' fill='%23a1a1aa'/%3E%3Cpath d='M14 25.6C14 25.0399 14.3668 24.5397 14.8944 24.3526C16.8738 23.6925 18.4426 23.3333 20 23.3333C21.5574 23.3333 23.1262 23.6925 25.1056 24.3526C25.6332 24.5397 26 25.0399 26 25.6V26.6667H14V25.6Z' fill='%23a1a1aa'/%3E%3Cpath d='M10 6.66667C8.15905 6.66667 6.66667 8.15905 6.66667 10V30C6.66667 31.841 8.15905 33.3333 10 33.3333H30C31.841 33.3333 33.3333 31.841 33.3333 30V10C33.3333 8.15905 31.841 6.66667 30 6.66667H10ZM30 10V30H10V10H30Z' fill='%23a1a1aa'/%3E%3C/svg%3E"
+
+_builders = {}
+
+
+def widget(name):
+    """Enregistre la fonction qui calcule les données du bloc `name`"""
+    def decorator(builder):
+        _builders[name] = builder
+        return builder
+    return decorator
+
+
+def widget_names():
+    return list(_builders)
+
+
+def _percentage(current, previous):
+    if previous > 0:
+        return round(((current - previous) / previous) * 100, 1)
+    return 100 if current > 0 else 0
+
+
+@widget('kpis')
+def build_kpis():
+    """Cartes de statistiques et évolution sur 7 jours"""
+    now = timezone.now()
+    last_week = now - timedelta(days=7)
+    previous_week = last_week - timedelta(days=7)
+
+    sales = rollups.sales_kpis()
+    customers = User.objects.filter(user_type='CLIENT').aggregate(
+        last_month=Count('id', filter=Q(date_joined__gte=now - timedelta(days=30))),
+        current=Count('id', filter=Q(date_joined__gte=last_week)),
+        previous=Count('id', filter=Q(date_joined__gte=previous_week, date_joined__lt=last_week)),
+    )
+    return {
+        'stats': {
+            'total_orders': sales['total_orders'],
+            'total_revenue': sales['total_revenue'],
+            'new_customers': customers['last_month'],
+            'out_of_stock': Product.objects.filter(stock=0, status='active').count(),
+        },
+        'orders_percentage': _percentage(sales['current_orders'], sales['previous_orders']),
+        'revenue_percentage': _percentage(sales['current_revenue'], sales['previous_revenue']),
+        'customers_percentage': _percentage(customers['current'], customers['previous']),
+        # Pas d'historique du stock : comparaison neutre
+        'stock_percentage': 0,
+    }
+
+
+@widget('sales')
+def build_sales():
+    """Séries du graphique des ventes : 7 jours, 52 semaines et 12 mois lus dans OrderDailyStats"""
+    return {
+        'dailySales': rollups.daily_sales(),
+        'weeklySales': rollups.weekly_sales(),
+        'monthlySales': rollups.monthly_sales(),
+    }
+
+
+@widget('categories')
+def build_categories():
+    """Répartition du chiffre d'affaires par catégorie (une requête groupée)"""
+    categories = [
+        {'name': row['name'], 'value': float(row['revenue']), 'color': row['color']}
+        for row in analytics.category_revenue()
+    ]
+    if not categories:
+        categories = [{'name': 'Pas de catégories', 'value': 100, 'color': '#6b21a8'}]
+    elif not any(category['value'] for category in categories):
+        categories = [{'name': 'Pas de données de vente', 'value': 100, 'color': '#6b21a8'}]
+    return categories
+
+
+@widget('top_products')
+def build_top_products():
+    """Cinq produits les plus vendus (voir analytics.top_products)"""
+    products = analytics.top_products(5)
+    max_sales = products[0]['sales'] if products else 0
+    top_products = [
+        {
+            'id': product['id'],
+            'name': product['name'],
+            'sales': product['sales'],
+            'image': product['image'] or DEFAULT_IMAGE,
+            'percentage': (product['sales'] / max_sales) * 100 if max_sales > 0 else 0
+        }
+        for product in products
+    ]
+
+    if not top_products:
+        top_products.append({
+            'id': '0',
+            'name': 'Pas de données disponibles',
+            'sales': 0,
+            'image': DEFAULT_IMAGE,
+            'percentage': 0
+        })
+    return top_products
+
+
+@widget('recent_orders')
+def build_recent_orders():
+    recent_orders = Order.objects.select_related('customer').annotate(
+        products_count=Count('items')
+    ).order_by('-created_at')[:10]
+    return [
+        {
+            'id': order.order_number,
+            'customer_name': order.customer.get_full_name(),
+            'customer_image': order.customer.profile_picture.url if order.customer.profile_picture else DEFAULT_IMAGE,
+            'products_count': order.products_count,
+            'total': order.total_amount,
+            'status': order.status,
+            'date': order.created_at.strftime('%Y-%m-%d'),
+        }
+        for order in recent_orders
+    ]
+
+
+def _cache_key(name):
+    return f"dashboard:widget:{name}"
+
+
+def _lock_key(name):
+    return f"dashboard:widget:{name}:lock"
+
+
+def refresh_widget(name):
+    """Recalcule le bloc et le met en cache ; retourne ses données"""
+    data = _builders[name]()
+    ttl = DASHBOARD_WIDGET_TTLS.get(name, 60)
+    cache.set(_cache_key(name), {'data': data, 'expires_at': time.time() + ttl}, ttl + DASHBOARD_WIDGET_STALE_TTL)
+    return data
+
+
+def refresh_widgets(names=None):
+    """Recalcule les blocs donnés (tous par défaut), par exemple depuis le worker ou une tâche planifiée"""
+    for name in names or list(_builders):
+        try:
+            refresh_widget(name)
+        finally:
+            cache.delete(_lock_key(name))
+
+
+def get_widget(name):
+    """
+    Données du bloc `name`, recalculées au plus une fois par expiration quel que soit
+    le nombre de requêtes simultanées : seul le processus qui obtient le verrou (cache.add)
+    recalcule, les autres servent la valeur expirée ou attendent la nouvelle.
+    Suppose un cache partagé entre les processus (settings.CACHES) : avec un cache local,
+    chaque processus recalcule de son côté.
+    """
+    entry = cache.get(_cache_key(name))
+    if entry is not None and entry['expires_at'] > time.time():
+        return entry['data']
+
+    if cache.add(_lock_key(name), 1, DASHBOARD_WIDGET_LOCK_TIMEOUT):
+        if entry is not None and DASHBOARD_BACKGROUND_REFRESH:
+            enqueue(REFRESH_DASHBOARD_WIDGETS, {'widgets': [name]}, max_attempts=1)
+            return entry['data']
+        try:
+            return refresh_widget(name)
+        finally:
+            cache.delete(_lock_key(name))
+
+    if entry is not None:
+        return entry['data']
+
+    # Premier calcul en cours dans un autre processus
+    deadline = time.monotonic() + DASHBOARD_WIDGET_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        entry = cache.get(_cache_key(name))
+        if entry is not None:
+            return entry['data']
+    return _builders[name]()
+
+
+def get_widgets(names):
+    return {name: get_widget(name) for name in names}
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'Tâches en arrière-plan'
+
+    def ready(self):
+        # Chaque application déclare ses tâches dans un module tasks.py
+        autodiscover_modules('tasks')
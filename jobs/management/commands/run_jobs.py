@@ -0,0 +1,27 @@
+# jobs/management/commands/run_jobs.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.queue import registered_kinds, run_pending
+
+class Command(BaseCommand):
+    help = 'Exécute les tâches en attente (e-mails de confirmation, exports...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Vider la file une seule fois puis quitter')
+        parser.add_argument('--kind', action='append', dest='kinds', help='Limiter à un type de tâche (répétable)')
+        parser.add_argument('--sleep', type=float, default=5, help='Pause en secondes entre deux passages')
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or registered_kinds()
+        unknown = set(kinds) - set(registered_kinds())
+        if unknown:
+            raise CommandError(f"Type(s) de tâche inconnu(s): {', '.join(sorted(unknown))}")
+
+        while True:
+            processed, succeeded = run_pending(kinds)
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"{succeeded}/{processed} tâche(s) exécutée(s) avec succès"))
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
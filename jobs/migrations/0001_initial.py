@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:58
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100, verbose_name='Type de tâche')),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Données')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminée'), ('dead', 'Abandonnée')], default='pending', max_length=10, verbose_name='Statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name="Nombre d'essais")),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name="Nombre maximal d'essais")),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Exécuter après')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('locked_by', models.CharField(blank=True, max_length=64, verbose_name='Verrouillée par')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Verrouillée le')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de fin')),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'kind', 'run_after'], name='jobs_job_status_96aa33_idx'), models.Index(fields=['status', 'locked_at'], name='jobs_job_status_156de5_idx')],
+            },
+        ),
+    ]
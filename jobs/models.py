@@ -0,0 +1,44 @@
+# jobs/models.py
+from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('dead', 'Abandonnée'),
+    ]
+
+    kind = models.CharField(_('Type de tâche'), max_length=100)
+    payload = models.JSONField(_('Données'), default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(_('Statut'), max_length=10, choices=STATUS_CHOICES, default='pending')
+
+    # Gestion des essais
+    attempts = models.PositiveSmallIntegerField(_('Nombre d\'essais'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('Nombre maximal d\'essais'), default=5)
+    run_after = models.DateTimeField(_('Exécuter après'), default=timezone.now)
+    last_error = models.TextField(_('Dernière erreur'), blank=True)
+
+    # Verrou posé par le worker qui traite la tâche
+    locked_by = models.CharField(_('Verrouillée par'), max_length=64, blank=True)
+    locked_at = models.DateTimeField(_('Verrouillée le'), null=True, blank=True)
+
+    # Métadonnées
+    created_at = models.DateTimeField(_('Date de création'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('Date de fin'), null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = _('Tâche')
+        verbose_name_plural = _('Tâches')
+        indexes = [
+            models.Index(fields=['status', 'kind', 'run_after']),
+            models.Index(fields=['status', 'locked_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.get_status_display()})"
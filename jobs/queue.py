@@ -0,0 +1,130 @@
+# jobs/queue.py
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Délai de base entre deux essais (doublé à chaque échec)
+JOBS_RETRY_DELAY = getattr(settings, 'JOBS_RETRY_DELAY', timedelta(seconds=30))
+# Une tâche verrouillée depuis plus longtemps est considérée comme abandonnée par son worker
+JOBS_LOCK_TIMEOUT = getattr(settings, 'JOBS_LOCK_TIMEOUT', timedelta(minutes=10))
+
+_handlers = {}
+
+
+def register(kind, batch_size=1):
+    """
+    Enregistre le gestionnaire d'un type de tâche.
+
+    Le gestionnaire reçoit une liste de tâches (au plus batch_size) et retourne
+    un dictionnaire {job.id: erreur} pour les tâches en échec, ou None si toutes ont réussi.
+    """
+    def decorator(handler):
+        _handlers[kind] = (handler, batch_size)
+        return handler
+    return decorator
+
+
+def registered_kinds():
+    return list(_handlers)
+
+
+def enqueue(kind, payload=None, max_attempts=5, on_commit=True):
+    """Ajoute une tâche à la file ; par défaut seulement après validation de la transaction en cours"""
+    def create():
+        Job.objects.create(kind=kind, payload=payload or {}, max_attempts=max_attempts)
+
+    if on_commit:
+        transaction.on_commit(create)
+    else:
+        create()
+
+
+def requeue_stale_jobs():
+    """Remet en file les tâches restées verrouillées par un worker interrompu"""
+    return Job.objects.filter(
+        status='running', locked_at__lt=timezone.now() - JOBS_LOCK_TIMEOUT
+    ).update(status='pending', locked_by='', locked_at=None)
+
+
+def claim_jobs(kind, limit):
+    """Verrouille au plus `limit` tâches prêtes avec un UPDATE conditionnel et les retourne"""
+    token = uuid.uuid4().hex
+    ready_ids = list(
+        Job.objects.filter(status='pending', kind=kind, run_after__lte=timezone.now())
+        .order_by('id')
+        .values_list('id', flat=True)[:limit]
+    )
+    if not ready_ids:
+        return []
+
+    Job.objects.filter(id__in=ready_ids, status='pending').update(
+        status='running', locked_by=token, locked_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    return list(Job.objects.filter(locked_by=token, status='running').order_by('id'))
+
+
+def _finish(jobs, errors):
+    now = timezone.now()
+    succeeded = [job.id for job in jobs if job.id not in errors]
+    if succeeded:
+        Job.objects.filter(id__in=succeeded).update(
+            status='done', finished_at=now, locked_by='', locked_at=None, last_error=''
+        )
+
+    for job in jobs:
+        if job.id not in errors:
+            continue
+        error = errors[job.id]
+        if job.attempts >= job.max_attempts:
+            # Dead letter : la tâche n'est plus relancée automatiquement
+            Job.objects.filter(id=job.id).update(
+                status='dead', finished_at=now, locked_by='', locked_at=None, last_error=str(error)
+            )
+        else:
+            Job.objects.filter(id=job.id).update(
+                status='pending',
+                run_after=now + JOBS_RETRY_DELAY * (2 ** (job.attempts - 1)),
+                locked_by='',
+                locked_at=None,
+                last_error=str(error)
+            )
+    return len(succeeded)
+
+
+def run_batch(kind):
+    """Traite un lot de tâches du type donné. Retourne (traitées, réussies)"""
+    handler, batch_size = _handlers[kind]
+    jobs = claim_jobs(kind, batch_size)
+    if not jobs:
+        return 0, 0
+
+    try:
+        errors = handler(jobs) or {}
+    except Exception as e:
+        logger.exception("Échec du lot de tâches %s", kind)
+        errors = {job.id: e for job in jobs}
+
+    return len(jobs), _finish(jobs, errors)
+
+
+def run_pending(kinds=None):
+    """Vide la file pour les types donnés (tous par défaut). Retourne (traitées, réussies)"""
+    requeue_stale_jobs()
+    processed = succeeded = 0
+    for kind in kinds or registered_kinds():
+        while True:
+            count, ok = run_batch(kind)
+            processed += count
+            succeeded += ok
+            if not count:
+                break
+    return processed, succeeded
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+
+class JobQueueTests(TestCase):
+    """File de tâches exécutée dans le processus de test, sans worker"""
+
+    def setUp(self):
+        self.calls = []
+
+    def tearDown(self):
+        for kind in ('tests.batch', 'tests.failing', 'tests.partial'):
+            queue._handlers.pop(kind, None)
+
+    def make_ready(self):
+        # Avance l'horloge des tâches reportées au lieu d'attendre le délai entre deux essais
+        Job.objects.filter(status='pending').update(run_after=timezone.now() - timedelta(seconds=1))
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            queue.enqueue('tests.batch', {'value': 1})
+            self.assertFalse(Job.objects.exists())
+
+        self.assertEqual(len(callbacks), 1)
+        job = Job.objects.get()
+        self.assertEqual(job.kind, 'tests.batch')
+        self.assertEqual(job.payload, {'value': 1})
+        self.assertEqual(job.status, 'pending')
+
+    def test_enqueue_without_on_commit_is_immediate(self):
+        queue.enqueue('tests.batch', {'value': 1}, on_commit=False)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_batch_handler_receives_jobs_in_batches(self):
+        @queue.register('tests.batch', batch_size=3)
+        def handler(jobs):
+            self.calls.append([job.payload['value'] for job in jobs])
+
+        for value in range(5):
+            queue.enqueue('tests.batch', {'value': value}, on_commit=False)
+
+        self.assertEqual(queue.run_pending(['tests.batch']), (5, 5))
+        self.assertEqual(self.calls, [[0, 1, 2], [3, 4]])
+        self.assertEqual(Job.objects.filter(status='done').count(), 5)
+        self.assertFalse(Job.objects.exclude(locked_by='').exists())
+
+    def test_failed_job_is_retried_with_backoff_then_dead(self):
+        @queue.register('tests.failing')
+        def handler(jobs):
+            self.calls.append(jobs[0].attempts)
+            raise ValueError('boom')
+
+        queue.enqueue('tests.failing', max_attempts=3, on_commit=False)
+        job = Job.objects.get()
+
+        # Premier échec : reporté de JOBS_RETRY_DELAY
+        before = timezone.now()
+        self.assertEqual(queue.run_batch('tests.failing'), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.last_error, 'boom')
+        self.assertGreaterEqual(job.run_after, before + queue.JOBS_RETRY_DELAY)
+
+        # Pas relancé avant l'échéance
+        self.assertEqual(queue.run_batch('tests.failing'), (0, 0))
+
+        # Deuxième échec : délai doublé
+        self.make_ready()
+        before = timezone.now()
+        queue.run_batch('tests.failing')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertGreaterEqual(job.run_after, before + queue.JOBS_RETRY_DELAY * 2)
+
+        # Dernier essai : dead letter, plus jamais relancé
+        self.make_ready()
+        queue.run_batch('tests.failing')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'dead')
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.calls, [1, 2, 3])
+
+        self.make_ready()
+        self.assertEqual(queue.run_pending(['tests.failing']), (0, 0))
+
+    def test_handler_can_fail_part_of_a_batch(self):
+        @queue.register('tests.partial', batch_size=10)
+        def handler(jobs):
+            return {job.id: 'invalid' for job in jobs if job.payload['value'] % 2}
+
+        for value in range(4):
+            queue.enqueue('tests.partial', {'value': value}, on_commit=False)
+
+        self.assertEqual(queue.run_batch('tests.partial'), (4, 2))
+        self.assertEqual(
+            sorted(Job.objects.filter(status='pending').values_list('payload__value', flat=True)), [1, 3]
+        )
+        self.assertEqual(Job.objects.filter(status='done').count(), 2)
+
+    def test_stale_running_job_is_requeued(self):
+        queue.enqueue('tests.batch', on_commit=False)
+        Job.objects.update(
+            status='running', locked_by='worker', locked_at=timezone.now() - queue.JOBS_LOCK_TIMEOUT * 2
+        )
+
+        self.assertEqual(queue.requeue_stale_jobs(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.locked_by, job.locked_at), ('pending', '', None))
@@ -2,6 +2,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from .models import Notification, NotificationGroup
+from . import bulk
+from .unread import invalidate_unread_counts
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -47,14 +49,23 @@ class NotificationAdmin(admin.ModelAdmin):
         })
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_unread_counts([obj.user_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_unread_counts([obj.user_id])
+
+    def delete_queryset(self, request, queryset):
+        bulk.delete(queryset)
+
     def mark_as_read(self, request, queryset):
-        from django.utils import timezone
-        queryset.update(is_read=True, read_at=timezone.now())
+        bulk.mark_read(queryset)
     mark_as_read.short_description = _("Marquer comme lu")
 
     def archive_notifications(self, request, queryset):
-        from django.utils import timezone
-        queryset.update(is_archived=True, archived_at=timezone.now())
+        bulk.archive(queryset)
     archive_notifications.short_description = _("Archiver les notifications")
 
 @admin.register(NotificationGroup)
@@ -0,0 +1,112 @@
+# notifications/bulk.py
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Notification
+from .unread import adjust_unread_counts, invalidate_unread_counts
+
+
+def filter_notifications(queryset, notification_filter='all', search_query='', time_filter='all'):
+    """Filtres de la boîte de réception (onglet, recherche, période) appliqués à `queryset`"""
+    if notification_filter == 'unread':
+        queryset = queryset.filter(is_read=False)
+    elif notification_filter and notification_filter != 'all':
+        queryset = queryset.filter(type=notification_filter)
+
+    if search_query:
+        queryset = queryset.filter(Q(title__icontains=search_query) | Q(message__icontains=search_query))
+
+    if time_filter and time_filter != 'all':
+        today = timezone.now().date()
+        if time_filter == 'today':
+            queryset = queryset.filter(created_at__date=today)
+        elif time_filter == 'week':
+            start_of_week = today - timezone.timedelta(days=today.weekday())
+            queryset = queryset.filter(created_at__date__gte=start_of_week)
+        elif time_filter == 'month':
+            queryset = queryset.filter(created_at__month=today.month, created_at__year=today.year)
+    return queryset
+
+
+def _bulk_write(queryset, unread, write):
+    """
+    Exécute `write` (une seule requête) sur `queryset` et ajuste les compteurs de non lues :
+    `unread` désigne les lignes qui sortent du compteur. Si le nombre de lignes écrites
+    diffère du décompte (modification concurrente), les compteurs sont recalculés.
+    """
+    queryset = queryset.order_by()
+    with transaction.atomic():
+        rows = list(queryset.values('user_id').annotate(total=Count('id'), unread=Count('id', filter=unread)))
+        count = write(queryset)
+        if count == sum(row['total'] for row in rows):
+            adjust_unread_counts({row['user_id']: -row['unread'] for row in rows})
+        else:
+            invalidate_unread_counts(row['user_id'] for row in rows)
+    return count
+
+
+def mark_read(queryset):
+    """Marque les notifications comme lues (un seul UPDATE) ; retourne le nombre de notifications modifiées"""
+    return _bulk_write(
+        queryset.filter(is_read=False),
+        Q(is_archived=False),
+        lambda pending: pending.update(is_read=True, read_at=timezone.now()),
+    )
+
+
+def archive(queryset):
+    """Archive les notifications (un seul UPDATE) ; retourne le nombre de notifications modifiées"""
+    return _bulk_write(
+        queryset.filter(is_archived=False),
+        Q(is_read=False),
+        lambda pending: pending.update(is_archived=True, archived_at=timezone.now()),
+    )
+
+
+def delete(queryset):
+    """Supprime les notifications (et leurs liens vers les groupes) ; retourne le nombre supprimé"""
+    return _bulk_write(
+        queryset,
+        Q(is_read=False, is_archived=False),
+        lambda pending: pending.delete()[1].get(Notification._meta.label, 0),
+    )
+
+
+# Actions groupées proposées par l'API et le tableau de bord
+BULK_ACTIONS = {
+    'read': mark_read,
+    'archive': archive,
+    'delete': delete,
+}
+
+
+def apply_bulk_action(queryset, action, ids=None, filters=None):
+    """
+    Applique `action` aux notifications de `queryset` désignées par une liste d'identifiants
+    ou, à défaut, par les filtres de la boîte de réception. Lève ValueError si la demande est invalide.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Action inconnue : {action}")
+
+    if ids is not None:
+        if not isinstance(ids, (list, tuple)):
+            raise ValueError("ids doit être une liste d'identifiants")
+        try:
+            ids = {int(notification_id) for notification_id in ids}
+        except (TypeError, ValueError):
+            raise ValueError("ids doit être une liste d'identifiants")
+        queryset = queryset.filter(id__in=ids)
+    elif filters is not None:
+        if not isinstance(filters, dict):
+            raise ValueError("filters doit être un objet (filter, search, time)")
+        queryset = filter_notifications(
+            queryset,
+            filters.get('filter', 'all'),
+            filters.get('search', ''),
+            filters.get('time', 'all'),
+        )
+    else:
+        raise ValueError("Indiquer ids ou filters")
+
+    return BULK_ACTIONS[action](queryset)
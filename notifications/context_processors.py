@@ -1,14 +1,17 @@
-from .models import Notification
+from .pubsub import NOTIFICATIONS_STREAM_ENABLED
+from .unread import get_unread_count, unread_queryset
 
 def unread_notifications(request):
     if request.user.is_authenticated and request.user.is_staff:
-        unread_notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
-        unread_count = unread_notifications.count()
+        # Queryset paresseux : aucune requête tant que le template ne l'utilise pas
+        unread_notifications = unread_queryset(request.user.id).order_by('-created_at')[:5]
+        unread_count = get_unread_count(request.user.id)
     else:
         unread_notifications = []
         unread_count = 0
 
     return {
         'unread_notifications': unread_notifications,
-        'unread_notifications_count': unread_count
+        'unread_notifications_count': unread_count,
+        'notifications_stream_enabled': NOTIFICATIONS_STREAM_ENABLED,
     }
@@ -0,0 +1,57 @@
+# notifications/dispatch.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+from .pubsub import publish_to_user
+from .unread import adjust_unread_counts
+
+# Identifiants des membres du staff destinataires des notifications, mis en cache
+STAFF_RECIPIENTS_KEY = 'notifications:staff_recipients'
+STAFF_RECIPIENTS_TTL = getattr(settings, 'NOTIFICATIONS_STAFF_RECIPIENTS_TTL', 10 * 60)
+
+
+def staff_recipient_ids():
+    ids = cache.get(STAFF_RECIPIENTS_KEY)
+    if ids is None:
+        ids = list(get_user_model().objects.filter(is_staff=True).order_by('id').values_list('id', flat=True))
+        cache.set(STAFF_RECIPIENTS_KEY, ids, STAFF_RECIPIENTS_TTL)
+    return ids
+
+
+def invalidate_staff_recipients():
+    transaction.on_commit(lambda: cache.delete(STAFF_RECIPIENTS_KEY))
+
+
+def notification_payload(notification):
+    """Notification telle qu'envoyée aux flux des consoles staff (même forme que unread_notifications_api)"""
+    return {
+        'id': notification.id,
+        'title': str(notification.title),
+        'message': str(notification.message),
+        'type': notification.type,
+        'level': notification.level,
+        'action_url': notification.action_url,
+        'created_at': notification.created_at.strftime('%d/%m/%Y %H:%M'),
+        'is_read': notification.is_read,
+    }
+
+
+def deliver(user_ids, **fields):
+    """Crée la même notification pour chaque destinataire, en une seule requête. Retourne les notifications"""
+    notifications = Notification.objects.bulk_create([Notification(user_id=user_id, **fields) for user_id in user_ids])
+    adjust_unread_counts({user_id: 1 for user_id in user_ids})
+    for notification in notifications:
+        publish_to_user(notification.user_id, 'notification', notification_payload(notification), notification.id)
+    return notifications
+
+
+def notify_staff(**fields):
+    """
+    Notifie tous les membres du staff une fois la transaction en cours validée :
+    l'écriture qui déclenche la notification (commande...) ne paie pas la diffusion,
+    et rien n'est envoyé si elle est annulée.
+    """
+    transaction.on_commit(lambda: deliver(staff_recipient_ids(), **fields))
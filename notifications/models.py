@@ -60,17 +60,32 @@ class Notification(models.Model):
 
     def mark_as_read(self):
         from django.utils import timezone
+        from .unread import adjust_unread_counts
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
-            self.save()
+            self.save(update_fields=['is_read', 'read_at'])
+            if not self.is_archived:
+                adjust_unread_counts({self.user_id: -1})
+
+    def mark_as_unread(self):
+        from .unread import adjust_unread_counts
+        if self.is_read:
+            self.is_read = False
+            self.read_at = None
+            self.save(update_fields=['is_read', 'read_at'])
+            if not self.is_archived:
+                adjust_unread_counts({self.user_id: 1})
 
     def archive(self):
         from django.utils import timezone
+        from .unread import adjust_unread_counts
         if not self.is_archived:
             self.is_archived = True
             self.archived_at = timezone.now()
-            self.save()
+            self.save(update_fields=['is_archived', 'archived_at'])
+            if not self.is_read:
+                adjust_unread_counts({self.user_id: -1})
 
     def get_related_object(self):
         if self.type == 'order' and self.related_object_id:
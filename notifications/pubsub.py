@@ -0,0 +1,94 @@
+# notifications/pubsub.py
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Flux SSE des notifications (désactivé par défaut). Sous WSGI, Django lit entièrement une réponse
+# asynchrone avant de l'envoyer : le flux n'enverrait rien et bloquerait un worker par onglet ouvert.
+# À n'activer qu'avec un serveur ASGI (afro_artisanat.asgi) et un diffuseur partagé par tous les
+# processus, y compris le worker run_jobs. Sinon, le tableau de bord interroge unread_notifications_api.
+NOTIFICATIONS_STREAM_ENABLED = getattr(settings, 'NOTIFICATIONS_STREAM_ENABLED', False)
+# Classe du diffuseur : InProcessBroker ne relie que les vues d'un même processus (tests, développement).
+# Avec plusieurs processus, configurer un diffuseur partagé exposant publish() et subscribe().
+NOTIFICATIONS_PUBSUB_BACKEND = getattr(settings, 'NOTIFICATIONS_PUBSUB_BACKEND', 'notifications.pubsub.InProcessBroker')
+
+
+class Subscription:
+    """Abonnement d'un flux à un canal ; les messages arrivent dans la boucle asyncio de l'abonné"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def deliver(self, message):
+        # Peut être appelé depuis un autre thread (vue synchrone, worker)
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            # Boucle fermée : l'abonné est parti
+            self.close()
+
+    async def get(self, timeout=None):
+        """Prochain message, ou None si rien n'est arrivé avant timeout secondes"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Diffusion en mémoire entre les vues du processus courant"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        """À appeler depuis la boucle asyncio du flux"""
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(NOTIFICATIONS_PUBSUB_BACKEND)()
+    return _broker
+
+
+def user_channel(user_id):
+    return f"notifications:user:{user_id}"
+
+
+def publish_to_user(user_id, event, data, event_id=None):
+    """Envoie l'événement aux flux ouverts par l'utilisateur (aucun effet s'il n'est pas connecté)"""
+    if not NOTIFICATIONS_STREAM_ENABLED:
+        return
+    get_broker().publish(user_channel(user_id), {'event': event, 'data': data, 'id': event_id})
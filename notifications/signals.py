@@ -1,43 +1,80 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from orders.models import Order
-from .models import Notification
-from django.contrib.auth import get_user_model
+from orders.models import Order, order_statuses_changed
+from .dispatch import invalidate_staff_recipients, notify_staff
 
 @receiver(post_save, sender=Order)
 def create_order_notification(sender, instance, created, **kwargs):
     """
-    Crée une notification lorsqu'une commande est créée ou modifiée
+    Notifie le staff d'une nouvelle commande ou de son annulation (seulement lors du
+    passage au statut annulé, pas à chaque enregistrement d'une commande déjà annulée)
     """
-    User = get_user_model()
-    admin_users = User.objects.filter(is_staff=True)
-
     if created:
-        for admin in admin_users:
-            Notification.objects.create(
-                user=admin,
-                title=_('Nouvelle commande'),
-                message=_(f'Une nouvelle commande #{instance.order_number} a été passée pour un montant de {instance.total_amount} €.'),
-                type='order',
-                level='success',
-                related_object_id=instance.id,
-                related_object_type='Order',
-                action_url=reverse('payment_confirmation', args=[instance.order_number]),  # 🔥 Correction ici !
-                icon='fas fa-shopping-bag'
-            )
-
-    elif instance.status == 'cancelled':
-        for admin in admin_users:
-            Notification.objects.create(
-                user=admin,
-                title=_('Commande annulée'),
-                message=_(f'La commande #{instance.order_number} a été annulée.'),
-                type='order',
-                level='warning',
-                related_object_id=instance.id,
-                related_object_type='Order',
-                action_url=reverse('payment_confirmation', args=[instance.order_number]),  # 🔥 Correction ici !
-                icon='fas fa-times-circle'
-            )
+        notify_staff(
+            title=_('Nouvelle commande'),
+            message=_(f'Une nouvelle commande #{instance.order_number} a été passée pour un montant de {instance.total_amount} €.'),
+            type='order',
+            level='success',
+            related_object_id=instance.id,
+            related_object_type='Order',
+            action_url=reverse('payment_confirmation', args=[instance.order_number]),  # 🔥 Correction ici !
+            icon='fas fa-shopping-bag'
+        )
+        return
+
+    # Statut tel qu'en base avant cet enregistrement (Order.save le met à jour après post_save)
+    old_status = (getattr(instance, '_loaded_statuses', None) or {}).get('status')
+    if instance.status == 'cancelled' and old_status is not None and old_status != 'cancelled':
+        notify_staff(
+            title=_('Commande annulée'),
+            message=_(f'La commande #{instance.order_number} a été annulée.'),
+            type='order',
+            level='warning',
+            related_object_id=instance.id,
+            related_object_type='Order',
+            action_url=reverse('payment_confirmation', args=[instance.order_number]),  # 🔥 Correction ici !
+            icon='fas fa-times-circle'
+        )
+
+
+@receiver(order_statuses_changed, sender=Order)
+def create_bulk_status_notification(sender, orders, new_status, **kwargs):
+    """
+    Une seule notification par administrateur pour une mise à jour groupée
+    (au lieu d'une par commande)
+    """
+    if new_status != 'cancelled':
+        return
+
+    order_numbers = ', '.join(f'#{order_number}' for order_id, order_number in orders[:10])
+    if len(orders) > 10:
+        order_numbers += f' (+{len(orders) - 10})'
+
+    notify_staff(
+        title=_('Commandes annulées'),
+        message=_(f'{len(orders)} commande(s) ont été annulées : {order_numbers}.'),
+        type='order',
+        level='warning',
+        related_object_type='Order',
+        action_url=reverse('admin_orders'),
+        icon='fas fa-times-circle'
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_staff_recipients(sender, instance, created, update_fields=None, **kwargs):
+    # La liste des destinataires ne change qu'avec is_staff (ou un nouveau compte staff)
+    if created and not instance.is_staff:
+        return
+    if update_fields is not None and 'is_staff' not in update_fields:
+        return
+    invalidate_staff_recipients()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remove_staff_recipient(sender, instance, **kwargs):
+    if instance.is_staff:
+        invalidate_staff_recipients()
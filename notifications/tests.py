@@ -1,3 +1,166 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from orders.models import Order
+from .bulk import apply_bulk_action
+from .dispatch import deliver
+from .models import Notification
+from .unread import get_unread_count, unread_queryset
+
+
+def make_user(email, is_staff=True):
+    return User.objects.create_user(
+        email=email, password='secret', first_name='Awa', last_name='Diop', is_staff=is_staff
+    )
+
+
+class NotificationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = make_user('staff@example.com')
+        self.other_staff = make_user('staff2@example.com')
+
+    def notify(self, user_ids, count=1, **fields):
+        fields.setdefault('type', 'system')
+        title = fields.pop('title', 'Notification')
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                deliver(user_ids, title=f'{title} {index}', message='Message', **fields)
+
+    def assertUnreadCount(self, user, expected):
+        # Le compteur en cache doit suivre chaque écriture sans recalcul
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(user.id), expected)
+        self.assertEqual(unread_queryset(user.id).count(), expected)
+
+
+class UnreadCountTests(NotificationTestCase):
+    """Compteur de notifications non lues tenu dans le cache"""
+
+    def test_counter_follows_single_notification_changes(self):
+        self.assertEqual(get_unread_count(self.staff.id), 0)
+        self.assertEqual(get_unread_count(self.other_staff.id), 0)
+        self.notify([self.staff.id, self.other_staff.id], count=3)
+        self.assertUnreadCount(self.staff, 3)
+
+        first, second, third = Notification.objects.filter(user=self.staff).order_by('id')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.mark_as_read()
+            first.mark_as_read()
+            second.archive()
+        self.assertUnreadCount(self.staff, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.mark_as_unread()
+        self.assertUnreadCount(self.staff, 2)
+        self.assertUnreadCount(self.other_staff, 3)
+
+    def test_new_order_notifies_each_staff_member(self):
+        customer = make_user('client@example.com', is_staff=False)
+        get_unread_count(self.staff.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                customer=customer, order_number='CMD-1', subtotal=Decimal('10.00'), total_amount=Decimal('10.00'),
+                payment_method='card', shipping_address_text='1 rue A', billing_address_text='1 rue A'
+            )
+        self.assertEqual(
+            sorted(Notification.objects.filter(title='Nouvelle commande').values_list('user__email', flat=True)),
+            ['staff2@example.com', 'staff@example.com']
+        )
+        self.assertUnreadCount(self.staff, 1)
+
+        # Annulation : une notification ; nouvel enregistrement de la commande annulée : aucune
+        with self.captureOnCommitCallbacks(execute=True):
+            order.update_status('cancelled')
+            order.save()
+        self.assertEqual(Notification.objects.filter(title='Commande annulée').count(), 2)
+
+    def test_bulk_cancellation_sends_one_notification_per_staff_member(self):
+        customer = make_user('client@example.com', is_staff=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                Order.objects.create(
+                    customer=customer, order_number=f'CMD-{index}', subtotal=Decimal('10.00'),
+                    total_amount=Decimal('10.00'), payment_method='card',
+                    shipping_address_text='1 rue A', billing_address_text='1 rue A'
+                )
+        Notification.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.all().transition_status('cancelled', user=self.staff)
+
+        notifications = Notification.objects.filter(title='Commandes annulées')
+        self.assertEqual(notifications.count(), 2)
+        self.assertIn('3 commande(s)', notifications.first().message)
+
+
+class BulkActionTests(NotificationTestCase):
+    """Actions groupées : une requête par action, compteurs ajustés d'après les lignes modifiées"""
+
+    def setUp(self):
+        super().setUp()
+        self.notify([self.staff.id], count=3, type='order')
+        self.notify([self.staff.id], count=2, type='stock', title='Rupture de stock')
+        self.notify([self.other_staff.id], count=2)
+        get_unread_count(self.staff.id)
+        get_unread_count(self.other_staff.id)
+
+    def run_action(self, action, ids=None, filters=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return apply_bulk_action(Notification.objects.filter(user=self.staff), action, ids, filters)
+
+    def test_actions_on_selected_ids(self):
+        ids = list(Notification.objects.filter(user=self.staff, type='order').values_list('id', flat=True))
+
+        self.assertEqual(self.run_action('read', ids=ids[:2]), 2)
+        self.assertUnreadCount(self.staff, 3)
+
+        # Une notification lue puis archivée ne décompte pas deux fois
+        self.assertEqual(self.run_action('archive', ids=ids), 3)
+        self.assertUnreadCount(self.staff, 2)
+
+        self.assertEqual(self.run_action('delete', ids=[str(ids[0]), ids[2]]), 2)
+        self.assertUnreadCount(self.staff, 2)
+        self.assertUnreadCount(self.other_staff, 2)
+
+    def test_actions_on_filtered_inbox(self):
+        self.assertEqual(self.run_action('read', filters={'search': 'rupture'}), 2)
+        self.assertUnreadCount(self.staff, 3)
+
+        self.assertEqual(self.run_action('delete', filters={'filter': 'unread'}), 3)
+        self.assertUnreadCount(self.staff, 0)
+        self.assertEqual(Notification.objects.filter(user=self.staff).count(), 2)
+
+    def test_other_users_notifications_are_untouched(self):
+        other_ids = list(Notification.objects.filter(user=self.other_staff).values_list('id', flat=True))
+        self.assertEqual(self.run_action('delete', ids=other_ids), 0)
+        self.assertUnreadCount(self.other_staff, 2)
+
+    def test_invalid_requests(self):
+        for action, ids, filters in [
+            ('explode', [1], None),
+            ('read', None, None),
+            ('read', '1,2', None),
+            ('read', ['x'], None),
+            ('read', None, ['unread']),
+        ]:
+            with self.assertRaises(ValueError):
+                apply_bulk_action(Notification.objects.all(), action, ids, filters)
+
+    def test_bulk_view(self):
+        self.client.force_login(self.staff)
+        url = reverse('bulk_notifications')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'action': 'archive', 'filters': {'filter': 'order'}},
+                                        content_type='application/json')
+        self.assertEqual(response.json()['count'], 3)
+        self.assertUnreadCount(self.staff, 2)
 
-# Create your tests here.
+        response = self.client.post(url, {'action': 'read'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,65 @@
+# notifications/unread.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+from .pubsub import publish_to_user
+
+# Les compteurs vivent dans le cache (settings.CACHES) : avec Redis, tous les processus lisent et
+# ajustent la même valeur et incr/decr sont atomiques. Le cache mémoire local (sans REDIS_URL)
+# donne un compteur par processus : à réserver à un déploiement à un seul worker.
+# Le compteur est recalculé au plus tard après ce délai (filet de sécurité contre les écarts)
+UNREAD_COUNT_TTL = getattr(settings, 'NOTIFICATIONS_UNREAD_COUNT_TTL', 10 * 60)
+
+
+def _key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_queryset(user_id):
+    """Notifications non lues et non archivées : celles annoncées par la cloche du tableau de bord"""
+    return Notification.objects.filter(user_id=user_id, is_read=False, is_archived=False)
+
+
+def get_unread_count(user_id):
+    """Nombre de notifications non lues, lu dans le cache (une requête COUNT si absent)"""
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = unread_queryset(user_id).count()
+        cache.add(_key(user_id), count, UNREAD_COUNT_TTL)
+    return max(count, 0)
+
+
+def _apply(deltas):
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            if delta > 0:
+                count = cache.incr(_key(user_id), delta)
+            else:
+                count = cache.decr(_key(user_id), -delta)
+        except ValueError:
+            # Compteur absent du cache : recalculé à la prochaine lecture
+            count = None
+        publish_to_user(user_id, 'unread', {'unread_count': max(count, 0) if count is not None else None})
+
+
+def adjust_unread_counts(deltas):
+    """Applique {user_id: variation} aux compteurs en cache, après validation de la transaction"""
+    deltas = dict(deltas)
+    transaction.on_commit(lambda: _apply(deltas))
+
+
+def _recount(user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+    # Nombre inconnu : les consoles le redemandent à unread_notifications_api
+    for user_id in user_ids:
+        publish_to_user(user_id, 'unread', {'unread_count': None})
+
+
+def invalidate_unread_counts(user_ids):
+    """Force le recalcul des compteurs (modifications dont la variation n'est pas connue)"""
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: _recount(user_ids))
@@ -1,13 +1,26 @@
 # notifications/views.py
-from django.http import JsonResponse
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.utils import timezone
 from django.urls import reverse
+from .bulk import apply_bulk_action, delete as delete_notifications, filter_notifications, mark_read
 from .models import Notification
+from .pubsub import NOTIFICATIONS_STREAM_ENABLED, get_broker, user_channel
+from .unread import adjust_unread_counts, get_unread_count
 from orders.models import Order
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.core.paginator import Paginator
+from django.conf import settings
+
+
+# Nombre de notifications par page de la boîte de réception
+NOTIFICATIONS_PAGE_SIZE = getattr(settings, 'NOTIFICATIONS_PAGE_SIZE', 25)
+# Intervalle (secondes) des commentaires envoyés sur un flux inactif pour garder la connexion ouverte
+NOTIFICATIONS_STREAM_HEARTBEAT = getattr(settings, 'NOTIFICATIONS_STREAM_HEARTBEAT', 20)
 
 
 def is_staff(user):
@@ -18,65 +31,44 @@ def is_staff(user):
 @login_required
 @user_passes_test(is_staff)
 def admin_notifications(request):
-    # Récupérer toutes les notifications non archivées pour l'utilisateur connecté
-    notifications = Notification.objects.filter(user=request.user, is_archived=False).order_by('-created_at')
-
-    # Nombre de notifications non lues
-    unread_count = notifications.filter(is_read=False).count()
+    # Notifications non archivées de l'utilisateur connecté
+    all_notifications = Notification.objects.filter(user=request.user, is_archived=False)
+    notifications = all_notifications.order_by('-created_at', '-id')
 
-    # Filtrage par type de notification
+    # Filtrage par type, recherche (titre ou message) et période
     notification_filter = request.GET.get('filter', 'all')
-    if notification_filter == 'unread':
-        notifications = notifications.filter(is_read=False)
-    elif notification_filter != 'all':
-        notifications = notifications.filter(type=notification_filter)
-
-    # Recherche dans les notifications (titre ou message)
     search_query = request.GET.get('search', '')
-    if search_query:
-        notifications = notifications.filter(
-            Q(title__icontains=search_query) | Q(message__icontains=search_query)
-        )
-
-    # Filtrage par période
     time_filter = request.GET.get('time', 'all')
-    if time_filter != 'all':
-        today = timezone.now().date()
-        if time_filter == 'today':
-            notifications = notifications.filter(created_at__date=today)
-        elif time_filter == 'week':
-            start_of_week = today - timezone.timedelta(days=today.weekday())
-            notifications = notifications.filter(created_at__date__gte=start_of_week)
-        elif time_filter == 'month':
-            notifications = notifications.filter(created_at__month=today.month, created_at__year=today.year)
-
-    # Récupérer les détails de la commande pour les notifications de type "order"
-    for notif in notifications:
-        if notif.type == 'order' and notif.related_object_id:
-            try:
-                notif.order = Order.objects.get(id=notif.related_object_id)
-            except Order.DoesNotExist:
-                notif.order = None
-        else:
-            notif.order = None
-
-    # Compter les notifications par type pour les filtres
-    all_notifications = Notification.objects.filter(user=request.user, is_archived=False)
-    type_counts = {type_code: all_notifications.filter(type=type_code).count() for type_code, _ in Notification.TYPE_CHOICES}
+    notifications = filter_notifications(notifications, notification_filter, search_query, time_filter)
+
+    # Seule la page courante est chargée
+    page = Paginator(notifications, NOTIFICATIONS_PAGE_SIZE).get_page(request.GET.get('page'))
 
-    # Séparer les notifications lues et non lues
-    unread_notifications = notifications.filter(is_read=False)
-    read_notifications = notifications.filter(is_read=True)
+    # Commandes associées aux notifications de la page, en une seule requête
+    order_ids = {notif.related_object_id for notif in page if notif.type == 'order' and notif.related_object_id}
+    orders = Order.objects.only('id', 'order_number').in_bulk(order_ids) if order_ids else {}
+    for notif in page:
+        notif.order = orders.get(notif.related_object_id) if notif.type == 'order' else None
+
+    # Total, non lues et nombre par type pour les filtres, en une seule requête d'agrégat
+    counts = all_notifications.aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+        **{f'type_{type_code}': Count('id', filter=Q(type=type_code)) for type_code, label in Notification.TYPE_CHOICES}
+    )
+    type_counts = {type_code: counts[f'type_{type_code}'] for type_code, label in Notification.TYPE_CHOICES}
 
     # Contexte pour le template
     context = {
-        'notifications': notifications,  # Toutes les notifications filtrées
-        'unread_notifications': unread_notifications,  # Notifications non lues
-        'read_notifications': read_notifications,  # Notifications lues
-        'total_count': all_notifications.count(),  # Nombre total de notifications
-        'unread_count': unread_count,  # Nombre de notifications non lues
+        'notifications': page,  # Page courante des notifications filtrées
+        'page_obj': page,
+        'unread_notifications': [notif for notif in page if not notif.is_read],  # Non lues de la page
+        'read_notifications': [notif for notif in page if notif.is_read],  # Lues de la page
+        'total_count': counts['total'],  # Nombre total de notifications
+        'unread_count': counts['unread'],  # Nombre de notifications non lues
         'notification_types': Notification.TYPE_CHOICES,  # Types de notifications disponibles
         'type_counts': type_counts,  # Nombre de notifications par type
+        'type_counts_list': list(type_counts.items()),
         'current_filter': notification_filter,  # Filtre actuel (all, unread, order, stock, system)
         'search_query': search_query,  # Terme de recherche
         'time_filter': time_filter,  # Filtre de période (all, today, week, month)
@@ -97,10 +89,7 @@ def notification_detail(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
 
     # Marquer la notification comme lue si ce n'est pas déjà fait
-    if not notification.is_read:
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+    notification.mark_as_read()
 
     # Récupérer la commande associée si la notification est de type "order"
     order = None
@@ -150,11 +139,50 @@ def unread_notifications_api(request):
         })
     
     return JsonResponse({
-        'unread_count': unread_notifications.count(),
+        'unread_count': get_unread_count(request.user.id),
         'notifications': notifications_data,
         'success': True
     })
 
+def _sse(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def _notification_events(user_id):
+    subscription = get_broker().subscribe(user_channel(user_id))
+    try:
+        # Nombre de non lues à l'ouverture (et à chaque reconnexion du navigateur)
+        unread_count = await sync_to_async(get_unread_count)(user_id)
+        yield "retry: 5000\n" + _sse('unread', {'unread_count': unread_count})
+        while True:
+            message = await subscription.get(timeout=NOTIFICATIONS_STREAM_HEARTBEAT)
+            if message is None:
+                yield ": ping\n\n"
+            else:
+                yield _sse(message['event'], message['data'], message.get('id'))
+    finally:
+        subscription.close()
+
+
+@login_required
+@user_passes_test(is_staff)
+async def notifications_stream(request):
+    """
+    Flux Server-Sent Events des notifications de l'utilisateur (servi par ASGI, voir
+    NOTIFICATIONS_STREAM_ENABLED) : événements 'notification' (nouvelle notification) et
+    'unread' (nombre de non lues, null s'il faut le redemander à unread_notifications_api)
+    """
+    if not NOTIFICATIONS_STREAM_ENABLED:
+        raise Http404
+    user = await request.auser()
+    response = StreamingHttpResponse(_notification_events(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # Fonction utilitaire pour obtenir l'icône appropriée selon le type de notification
 def get_notification_icon(notification_type):
     icons = {
@@ -176,14 +204,11 @@ def get_notification_icon(notification_type):
 def toggle_notification_read(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
     if notification.is_read:
-        notification.is_read = False
-        notification.read_at = None
+        notification.mark_as_unread()
         messages.success(request, 'Notification marquée comme non lue.')
     else:
-        notification.is_read = True
-        notification.read_at = timezone.now()
+        notification.mark_as_read()
         messages.success(request, 'Notification marquée comme lue.')
-    notification.save()
     
     # Revenir à la page précédente ou à la liste des notifications
     redirect_url = request.META.get('HTTP_REFERER')
@@ -197,12 +222,8 @@ def toggle_notification_read(request, notification_id):
 @user_passes_test(is_staff)
 def mark_all_read(request):
     if request.method == 'POST':
-        unread_notifications = Notification.objects.filter(user=request.user, is_read=False)
-        count = unread_notifications.count()
-        for notification in unread_notifications:
-            notification.is_read = True
-            notification.read_at = timezone.now()
-            notification.save()
+        # Un seul UPDATE, compteur de non lues ajusté en conséquence
+        count = mark_read(Notification.objects.filter(user=request.user))
         
         # Si la requête est en AJAX, retourner une réponse JSON
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.content_type == 'application/json':
@@ -221,11 +242,44 @@ def mark_all_read(request):
 
 
 
+@login_required
+@user_passes_test(is_staff)
+def bulk_notifications(request):
+    """
+    Action groupée du tableau de bord (sélection multiple) : {"action": "read" | "archive" | "delete",
+    "ids": [...]} ou {"action": ..., "filters": {"filter", "search", "time"}} pour toute la boîte filtrée
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Méthode non autorisée'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Données JSON invalides'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'Données JSON invalides'}, status=400)
+
+    # Même périmètre que la boîte de réception : notifications non archivées de l'utilisateur
+    notifications = Notification.objects.filter(user=request.user, is_archived=False)
+    try:
+        count = apply_bulk_action(notifications, data.get('action'), data.get('ids'), data.get('filters'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'count': count,
+        'unread_count': get_unread_count(request.user.id),
+    })
+
+
 @login_required
 @user_passes_test(is_staff)
 def delete_notification(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
     notification.delete()
+    if not notification.is_read and not notification.is_archived:
+        adjust_unread_counts({request.user.id: -1})
     messages.success(request, 'La notification a été supprimée.')
     
     redirect_url = request.META.get('HTTP_REFERER')
@@ -237,9 +291,7 @@ def delete_notification(request, notification_id):
 @user_passes_test(is_staff)
 def clear_all_notifications(request):
     if request.method == 'POST':
-        notifications = Notification.objects.filter(user=request.user, is_archived=False)
-        count = notifications.count()
-        notifications.delete()
+        count = delete_notifications(Notification.objects.filter(user=request.user, is_archived=False))
         messages.success(request, f'{count} notifications ont été supprimées.')
     return redirect('admin_notifications')
 
@@ -247,9 +299,7 @@ def clear_all_notifications(request):
 @user_passes_test(is_staff)
 def archive_notification(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    notification.is_archived = True
-    notification.archived_at = timezone.now()
-    notification.save()
+    notification.archive()
     messages.success(request, 'La notification a été archivée.')
     
     redirect_url = request.META.get('HTTP_REFERER')
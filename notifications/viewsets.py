@@ -2,9 +2,12 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework import status
 from rest_framework.response import Response
+from .bulk import apply_bulk_action
 from .models import Notification, NotificationGroup
 from .serializers import NotificationSerializer, NotificationGroupSerializer
+from .unread import invalidate_unread_counts
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
@@ -14,6 +17,19 @@ class NotificationViewSet(viewsets.ModelViewSet):
         # Restreindre les notifications à celles de l'utilisateur connecté
         return Notification.objects.filter(user=self.request.user)
 
+    # Écritures génériques : le compteur de non lues en cache est recalculé
+    def perform_create(self, serializer):
+        notification = serializer.save()
+        invalidate_unread_counts([notification.user_id])
+
+    def perform_update(self, serializer):
+        notification = serializer.save()
+        invalidate_unread_counts([notification.user_id])
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_unread_counts([instance.user_id])
+
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         notification = self.get_object()
@@ -26,6 +42,23 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notification.archive()
         return Response({'status': 'archived'})
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Action groupée en une requête : {"action": "read" | "archive" | "delete", "ids": [...]}
+        ou {"action": ..., "filters": {"filter", "search", "time"}}
+        """
+        try:
+            count = apply_bulk_action(
+                self.get_queryset(),
+                request.data.get('action'),
+                request.data.get('ids'),
+                request.data.get('filters'),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'action': request.data.get('action'), 'count': count})
+
 class NotificationGroupViewSet(viewsets.ModelViewSet):
     queryset = NotificationGroup.objects.all()
     serializer_class = NotificationGroupSerializer
@@ -1,7 +1,7 @@
 # admin.py
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Order, OrderItem, OrderNote
+from .models import Order, OrderItem, OrderNote, OrderStatusEvent, IdempotencyKey, ExportJob
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -48,4 +48,31 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': ('ip_address', 'user_agent'),
             'classes': ('collapse',)
         })
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'scope', 'user', 'order', 'created_at', 'expires_at']
+    list_filter = ['scope']
+    search_fields = ['key', 'user__email', 'order__order_number']
+    readonly_fields = ['created_at']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'format', 'status', 'row_count', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['format', 'status']
+    readonly_fields = ['filters_hash', 'created_at', 'finished_at']
+
+
+@admin.register(OrderStatusEvent)
+class OrderStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['order', 'from_status', 'to_status', 'user', 'created_at']
+    list_filter = ['to_status']
+    search_fields = ['order__order_number']
+    readonly_fields = ['order', 'from_status', 'to_status', 'user', 'created_at']
+
+    def has_add_permission(self, request):
+        # Historique en ajout seul, alimenté par Order.update_status
+        return False
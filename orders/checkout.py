@@ -0,0 +1,192 @@
+# orders/checkout.py
+import json
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from cart.pricing import price_lines
+from coupons.engine import CouponError, redeem_coupon
+from products.models import Product, ProductMedia, active_holds_subquery
+from products.reservations import convert_reservations
+from .models import Order, OrderItem, order_placed
+
+
+class CheckoutError(Exception):
+    """Commande refusée ; errors contient les messages à afficher au client"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+class InsufficientStockError(CheckoutError):
+    """Levée lorsqu'au moins une ligne du panier dépasse le stock disponible"""
+
+
+def extract_cart_items(post_data):
+    """
+    Récupère les articles du panier envoyés par le formulaire de paiement.
+    Formats acceptés, par ordre de priorité : full_cart_json, cart_items[<index>], cart_items[].
+    """
+    raw_items = []
+
+    full_cart_json = post_data.get('full_cart_json')
+    if full_cart_json:
+        try:
+            raw_items = json.loads(full_cart_json)
+        except json.JSONDecodeError:
+            raw_items = []
+
+    if not raw_items:
+        index = 0
+        while post_data.get(f'cart_items[{index}]'):
+            raw_items.append(post_data.get(f'cart_items[{index}]'))
+            index += 1
+
+    if not raw_items:
+        raw_items = post_data.getlist('cart_items[]')
+
+    items = []
+    for raw in raw_items:
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+        if isinstance(raw, dict):
+            items.append(raw)
+    return items
+
+
+def normalize_cart_lines(cart_items):
+    """Convertit les articles bruts du panier en lignes typées (id produit, quantité, prix...)"""
+    lines = []
+    for data in cart_items:
+        try:
+            product_id = int(str(data.get('id') or '').strip())
+        except (ValueError, TypeError):
+            product_id = None
+
+        try:
+            quantity = int(data.get('quantity', 1))
+        except (ValueError, TypeError):
+            continue
+        if quantity <= 0:
+            continue
+
+        try:
+            price = Decimal(str(data.get('price', '0.00')))
+        except (InvalidOperation, ValueError):
+            price = Decimal('0.00')
+
+        lines.append({
+            'product_id': product_id if product_id and product_id > 0 else None,
+            'name': data.get('name') or 'Produit inconnu',
+            'sku': data.get('sku') or '',
+            'quantity': quantity,
+            'price': price,
+            'options': data.get('options'),
+        })
+    return lines
+
+
+def first_product_images(product_ids):
+    """Première image de chaque produit, en une seule requête"""
+    images = {}
+    media = ProductMedia.objects.filter(
+        product_id__in=product_ids, media_type='image'
+    ).order_by('product_id', 'id').values_list('product_id', 'file')
+    for product_id, file_name in media:
+        if product_id not in images and file_name:
+            images[product_id] = ProductMedia._meta.get_field('file').storage.url(file_name)
+    return images
+
+
+def place_order(lines, coupon_code=None, **order_fields):
+    """
+    Crée la commande et ses articles dans une seule transaction.
+
+    Les produits sont chargés en une requête et les montants (sous-total, TVA, livraison,
+    total) calculés à partir de leurs prix par cart.pricing : les prix envoyés par le
+    navigateur ne sont jamais utilisés et les produits inconnus sont écartés
+    (CheckoutError si plus aucun article ne reste). Le code promo éventuel est consommé
+    par coupons.engine.redeem_coupon dans la même transaction. Les articles sont insérés avec bulk_create
+    et le stock décrémenté par des UPDATE conditionnels (stock - réservations des
+    autres clients >= quantité). Les réservations du client sont converties en vente.
+    Si une seule ligne est en rupture, toute la commande est annulée et
+    InsufficientStockError est levée.
+    """
+    product_ids = {line['product_id'] for line in lines if line['product_id']}
+    customer = order_fields['customer']
+
+    with transaction.atomic():
+        products = Product.objects.with_available_stock(exclude_user=customer).select_related('category').in_bulk(product_ids)
+        pricing = price_lines(lines, products, coupon_code=coupon_code)
+        if not pricing['lines']:
+            raise CheckoutError(["Les articles de votre panier ne sont plus disponibles."])
+        if pricing['coupon_error']:
+            raise CheckoutError([pricing['coupon_error']])
+        images = first_product_images(products.keys())
+
+        # Quantités cumulées par produit (un même produit peut apparaître sur plusieurs lignes)
+        requested = OrderedDict()
+        for line in pricing['lines']:
+            requested[line['product_id']] = requested.get(line['product_id'], 0) + line['quantity']
+
+        errors = [
+            f"Stock insuffisant pour {products[pid].name}. Disponible: {max(products[pid].available_stock, 0)}, Demandé: {quantity}"
+            for pid, quantity in requested.items()
+            if products[pid].available_stock < quantity
+        ]
+        if errors:
+            raise InsufficientStockError(errors)
+
+        order = Order.objects.create(
+            subtotal=pricing['subtotal'],
+            discount_amount=pricing['discount_amount'],
+            tax_amount=pricing['tax_amount'],
+            shipping_cost=pricing['shipping_cost'],
+            total_amount=pricing['total_amount'],
+            **order_fields
+        )
+
+        items = []
+        for index, line in enumerate(pricing['lines']):
+            product = line['product']
+            items.append(OrderItem(
+                order=order,
+                product=product,
+                product_name=product.name,
+                product_sku=product.sku or line['sku'] or f"SKU-{order.order_number}-{index}",
+                quantity=line['quantity'],
+                unit_price=line['unit_price'],
+                total_price=line['total_price'],
+                options=line['options'],
+                product_image=images.get(product.id),
+                category=product.category,
+                category_name=product.category.name,
+            ))
+        OrderItem.objects.bulk_create(items)
+        order_placed.send(sender=Order, order=order, items_count=sum(item.quantity for item in items))
+
+        if pricing['coupon']:
+            try:
+                redeem_coupon(pricing['coupon'], customer, order, pricing['discount_amount'])
+            except CouponError as e:
+                raise CheckoutError([str(e)])
+
+        # Décrément conditionnel : protège contre les ventes concurrentes
+        held_by_others = active_holds_subquery(exclude_user=customer)
+        for pid, quantity in requested.items():
+            updated = Product.objects.filter(id=pid, stock__gte=held_by_others + quantity).update(
+                stock=F('stock') - quantity, updated_at=timezone.now()
+            )
+            if not updated:
+                raise InsufficientStockError([f"Stock insuffisant pour {products[pid].name}."])
+
+        convert_reservations(customer, requested.keys())
+
+    return order
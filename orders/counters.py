@@ -0,0 +1,106 @@
+# orders/counters.py
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import COUNTED_FIELDS, Order, OrderCounter
+
+# 'aggregate' : une requête d'agrégat conditionnel ; 'table' : lecture de la table OrderCounter
+ORDER_COUNTERS_SOURCE = getattr(settings, 'ORDER_COUNTERS_SOURCE', 'aggregate')
+
+FIELD_CHOICES = {
+    'status': Order.STATUS_CHOICES,
+    'payment_status': Order.PAYMENT_STATUS_CHOICES,
+}
+
+
+def _empty_counts():
+    return {field: {code: 0 for code, label in FIELD_CHOICES[field]} for field in COUNTED_FIELDS}
+
+
+def count_orders_by_status():
+    """Tous les compteurs de statut et de statut de paiement en une seule requête d'agrégat"""
+    aggregates = {
+        f'{field}__{code}': Count('id', filter=Q(**{field: code}))
+        for field in COUNTED_FIELDS
+        for code, label in FIELD_CHOICES[field]
+    }
+    aggregates['total'] = Count('id')
+    result = Order.objects.order_by().aggregate(**aggregates)
+
+    counts = _empty_counts()
+    for field in COUNTED_FIELDS:
+        for code in counts[field]:
+            counts[field][code] = result[f'{field}__{code}']
+    counts['total'] = result['total']
+    return counts
+
+
+def read_order_counters():
+    """Mêmes compteurs lus dans la table OrderCounter (coût indépendant du nombre de commandes)"""
+    counts = _empty_counts()
+    for field, value, count in OrderCounter.objects.values_list('field', 'value', 'count'):
+        if field in counts:
+            counts[field][value] = count
+    counts['total'] = sum(counts['status'].values())
+    return counts
+
+
+def get_order_counts():
+    """
+    Retourne {'status': {code: n}, 'payment_status': {code: n}, 'total': n}
+    selon ORDER_COUNTERS_SOURCE.
+    """
+    if ORDER_COUNTERS_SOURCE == 'table':
+        return read_order_counters()
+    return count_orders_by_status()
+
+
+def rebuild_order_counters():
+    """Recalcule la table OrderCounter à partir des commandes"""
+    counts = count_orders_by_status()
+    with transaction.atomic():
+        OrderCounter.objects.all().delete()
+        OrderCounter.objects.bulk_create([
+            OrderCounter(field=field, value=value, count=count)
+            for field in COUNTED_FIELDS
+            for value, count in counts[field].items()
+        ])
+    return counts
+
+
+def rebuild_customer_stats(batch_size=1000):
+    """
+    Recalcule total_orders, total_spent et last_order_date de tous les clients
+    avec une seule requête groupée sur les commandes. Retourne le nombre de clients mis à jour.
+    """
+    User = get_user_model()
+    active = ~Q(status='cancelled')
+    stats = {
+        row['customer_id']: row
+        for row in Order.objects.order_by().values('customer_id').annotate(
+            orders=Count('id', filter=active),
+            spent=Sum('total_amount', filter=active & Q(payment_status='completed')),
+            last=Max('created_at'),
+        )
+    }
+
+    with transaction.atomic():
+        # Clients sans commande
+        reset = User.objects.exclude(id__in=stats).exclude(
+            total_orders=0, total_spent=0, last_order_date=None
+        ).update(total_orders=0, total_spent=0, last_order_date=None)
+
+        users = list(User.objects.filter(id__in=stats).only('id', 'total_orders', 'total_spent', 'last_order_date'))
+        changed = []
+        for user in users:
+            row = stats[user.id]
+            values = (row['orders'], row['spent'] or Decimal('0'), row['last'])
+            if (user.total_orders, user.total_spent, user.last_order_date) != values:
+                user.total_orders, user.total_spent, user.last_order_date = values
+                changed.append(user)
+        User.objects.bulk_update(changed, ['total_orders', 'total_spent', 'last_order_date'], batch_size=batch_size)
+    return reset + len(changed)
@@ -0,0 +1,43 @@
+# orders/emails.py
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from .invoices import render_invoice_pdf
+
+
+def build_order_confirmation_email(order, connection=None):
+    """
+    Prépare l'e-mail de confirmation (HTML + texte) avec la facture en pièce jointe.
+    `connection` permet de réutiliser une même connexion SMTP pour un lot d'e-mails.
+    """
+    pdf = render_invoice_pdf(order)
+
+    # Préparation de l'e-mail
+    subject = f'Confirmation de votre commande #{order.order_number}'
+    from_email = settings.DEFAULT_FROM_EMAIL
+    to_email = order.customer.email
+
+    # Création du contenu HTML de l'e-mail
+    html_content = render_to_string(
+        'website/emails/order_confirmation_email_template.html',
+        {
+            'order': order,
+            'items': order.items.all(),
+            'user': order.customer,
+            'site_url': settings.SITE_URL,
+        }
+    )
+
+    # Création du contenu texte de l'e-mail
+    text_content = strip_tags(html_content)
+
+    # Création de l'e-mail
+    msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email], connection=connection)
+    msg.attach_alternative(html_content, "text/html")
+
+    # Attachement de la facture
+    msg.attach(f'facture_{order.order_number}.pdf', pdf, 'application/pdf')
+
+    return msg
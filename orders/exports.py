@@ -0,0 +1,353 @@
+# orders/exports.py
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+import xlsxwriter
+from django.conf import settings
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Flowable, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from jobs.queue import enqueue
+from .models import ExportJob, Order
+
+# Nombre de lignes lues par aller-retour avec la base lors des exports
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+# Répertoire des exports générés (hors MEDIA_ROOT : téléchargement réservé au staff)
+EXPORT_DIR = Path(getattr(settings, 'EXPORT_DIR', settings.BASE_DIR / 'exports'))
+# Nombre de lignes par tableau dans l'export PDF
+EXPORT_PDF_TABLE_ROWS = getattr(settings, 'EXPORT_PDF_TABLE_ROWS', 200)
+# Durée de conservation des fichiers d'export
+EXPORT_RETENTION = getattr(settings, 'EXPORT_RETENTION', timedelta(days=7))
+
+BUILD_EXPORT = 'orders.build_export'
+
+CSV_HEADERS = ['ID', 'Numéro de commande', 'Client', 'Email', 'Date', 'Total', 'Statut', 'Paiement', 'Méthode de paiement']
+
+# Colonnes lues pour l'export (jointure sur le client, sans instancier de modèles)
+EXPORT_FIELDS = (
+    'id',
+    'order_number',
+    'customer__first_name',
+    'customer__last_name',
+    'customer__email',
+    'created_at',
+    'total_amount',
+    'status',
+    'payment_status',
+    'payment_method',
+)
+
+STATUS_LABELS = dict(Order.STATUS_CHOICES)
+PAYMENT_STATUS_LABELS = dict(Order.PAYMENT_STATUS_CHOICES)
+PAYMENT_METHOD_LABELS = dict(Order.PAYMENT_METHOD_CHOICES)
+
+
+def parse_export_filters(params):
+    """
+    Lit les filtres d'export (status, date_from, date_to) depuis request.GET.
+    Les valeurs invalides sont ignorées, comme dans la liste des commandes.
+    """
+    filters = {'status': '', 'date_from': None, 'date_to': None}
+
+    status_filter = params.get('status', '')
+    if status_filter in STATUS_LABELS:
+        filters['status'] = status_filter
+
+    for name in ('date_from', 'date_to'):
+        value = params.get(name, '')
+        if value:
+            try:
+                filters[name] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                pass
+    return filters
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders_for_export(filters):
+    """Commandes correspondant aux filtres, les plus récentes en premier"""
+    orders_query = Order.objects.all()
+
+    if filters['status']:
+        orders_query = orders_query.filter(status=filters['status'])
+    if filters['date_from']:
+        orders_query = orders_query.filter(created_at__gte=_start_of_day(filters['date_from']))
+    if filters['date_to']:
+        # Ajouter un jour pour inclure les commandes de cette journée
+        orders_query = orders_query.filter(created_at__lt=_start_of_day(filters['date_to'] + timedelta(days=1)))
+
+    return orders_query.order_by('-created_at')
+
+
+def iter_export_rows(orders_query):
+    """
+    Parcourt les commandes par paquets de EXPORT_CHUNK_SIZE lignes et retourne
+    des tuples (id, numéro, client, email, date, total, statut, paiement, méthode).
+    """
+    rows = orders_query.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for (order_id, order_number, first_name, last_name, email, created_at,
+         total_amount, status, payment_status, payment_method) in rows:
+        yield (
+            order_id,
+            order_number,
+            # Comme get_full_name() or username (l'identifiant des comptes est l'e-mail)
+            f"{first_name} {last_name}".strip() or email,
+            email,
+            created_at,
+            total_amount,
+            STATUS_LABELS.get(status, status),
+            PAYMENT_STATUS_LABELS.get(payment_status, payment_status),
+            PAYMENT_METHOD_LABELS.get(payment_method, payment_method),
+        )
+
+
+class Echo:
+    """Pseudo-fichier : csv.writer écrit une ligne et la retourne au lieu de la stocker"""
+
+    def write(self, value):
+        return value
+
+
+def stream_orders_csv(orders_query):
+    """Génère le CSV ligne par ligne ; la mémoire utilisée ne dépend pas du nombre de commandes"""
+    writer = csv.writer(Echo(), delimiter=';')  # Utiliser ; pour meilleure compatibilité avec Excel
+    yield writer.writerow(CSV_HEADERS)
+
+    for order_id, order_number, customer, email, created_at, total_amount, status, payment_status, payment_method in iter_export_rows(orders_query):
+        yield writer.writerow([
+            order_id,
+            order_number,
+            customer,
+            email,
+            created_at.strftime('%d/%m/%Y %H:%M'),
+            str(total_amount).replace('.', ','),  # Format français
+            status,
+            payment_status,
+            payment_method,
+        ])
+
+
+def serialize_export_filters(filters):
+    """Filtres sous une forme stockable en JSON (relue par parse_export_filters)"""
+    return {
+        'status': filters['status'],
+        'date_from': filters['date_from'].isoformat() if filters['date_from'] else '',
+        'date_to': filters['date_to'].isoformat() if filters['date_to'] else '',
+    }
+
+
+def request_export(export_format, filters, user):
+    """
+    Retourne l'export correspondant aux filtres : celui déjà demandé aujourd'hui
+    avec les mêmes filtres s'il existe, sinon un nouvel export mis en file.
+    """
+    stored_filters = serialize_export_filters(filters)
+    filters_hash = hashlib.sha256(json.dumps(stored_filters, sort_keys=True).encode('utf-8')).hexdigest()
+
+    existing = ExportJob.objects.filter(
+        format=export_format,
+        filters_hash=filters_hash,
+        created_at__gte=_start_of_day(timezone.localdate()),
+        status__in=['pending', 'running', 'done'],
+    ).order_by('-created_at').first()
+    if existing and (existing.status != 'done' or os.path.exists(existing.file_path)):
+        return existing
+
+    export_job = ExportJob.objects.create(
+        format=export_format,
+        filters=stored_filters,
+        filters_hash=filters_hash,
+        requested_by=user
+    )
+    enqueue(BUILD_EXPORT, {'export_job_id': export_job.id}, max_attempts=2)
+    return export_job
+
+
+def write_orders_xlsx(orders_query, output):
+    """Écrit l'export Excel ligne par ligne (mode constant_memory). Retourne le nombre de commandes"""
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet("Commandes")
+
+    # Styles pour l'en-tête
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#F8F9FA',
+        'border': 1,
+        'align': 'center'
+    })
+    date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+    money_format = workbook.add_format({'num_format': '# ##0.00 F CFA'})
+
+    # En-têtes et largeur des colonnes
+    headers = ['ID', 'N° Commande', 'Client', 'Email', 'Date', 'Total', 'Statut', 'Paiement', 'Méthode']
+    for col, header in enumerate(headers):
+        worksheet.set_column(col, col, max(len(header) + 2, 12))
+        worksheet.write(0, col, header, header_format)
+
+    # Données (en mode constant_memory les lignes doivent être écrites dans l'ordre)
+    row = 0
+    for row, (order_id, order_number, customer, email, created_at, total_amount, status, payment_status, payment_method) in enumerate(iter_export_rows(orders_query), start=1):
+        worksheet.write(row, 0, order_id)
+        worksheet.write(row, 1, order_number)
+        worksheet.write(row, 2, customer)
+        worksheet.write(row, 3, email)
+        worksheet.write_datetime(row, 4, timezone.localtime(created_at).replace(tzinfo=None), date_format)
+        worksheet.write_number(row, 5, float(total_amount), money_format)
+        worksheet.write(row, 6, status)
+        worksheet.write(row, 7, payment_status)
+        worksheet.write(row, 8, payment_method)
+
+    workbook.close()
+    return row
+
+
+PDF_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Aligner la colonne Total à droite
+])
+
+PDF_HEADERS = ['N° Commande', 'Client', 'Date', 'Total', 'Statut', 'Paiement']
+
+
+def _pdf_table(rows):
+    table = Table([PDF_HEADERS] + rows, repeatRows=1)
+    table.setStyle(PDF_TABLE_STYLE)
+    return table
+
+
+class _PdfRowsTable(Flowable):
+    """
+    Tableau de l'export créé seulement au moment de sa mise en page : doc.build() reçoit
+    tous les éléments d'avance, mais seules les lignes brutes attendent leur tour
+    (un Table garde un style par cellule dès sa construction).
+    """
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+        self._table = None
+
+    def wrap(self, available_width, available_height):
+        self._table = _pdf_table(self.rows)
+        self.width, self.height = self._table.wrap(available_width, available_height)
+        return self.width, self.height
+
+    def split(self, available_width, available_height):
+        return _pdf_table(self.rows).split(available_width, available_height)
+
+    def draw(self):
+        self._table.drawOn(self.canv, 0, 0)
+        self._table = None
+
+
+def _pdf_flowables(orders_query, filters, counter):
+    """Éléments du PDF produits à la demande : les lignes sont lues et mises en tableau paquet par paquet"""
+    styles = getSampleStyleSheet()
+    normal_style = styles["Normal"]
+
+    # Titre et date d'exportation
+    yield Paragraph("Liste des Commandes", styles["Heading1"])
+    yield Spacer(1, 12)
+    yield Paragraph(f"Exporté le: {datetime.now().strftime('%d/%m/%Y %H:%M')}", normal_style)
+    yield Spacer(1, 12)
+
+    # Informations sur les filtres appliqués
+    filter_info = []
+    if filters['status']:
+        filter_info.append(f"Statut: {STATUS_LABELS[filters['status']]}")
+    if filters['date_from']:
+        filter_info.append(f"Du: {filters['date_from'].strftime('%d/%m/%Y')}")
+    if filters['date_to']:
+        filter_info.append(f"Au: {filters['date_to'].strftime('%d/%m/%Y')}")
+    if filter_info:
+        yield Paragraph("Filtres appliqués: " + ", ".join(filter_info), normal_style)
+        yield Spacer(1, 12)
+
+    yield Paragraph(f"Nombre de commandes: {orders_query.count()}", normal_style)
+    yield Spacer(1, 20)
+
+    rows = []
+    for order_id, order_number, customer, email, created_at, total_amount, status, payment_status, payment_method in iter_export_rows(orders_query):
+        rows.append([
+            order_number,
+            customer,
+            created_at.strftime('%d/%m/%Y'),
+            f"{total_amount} F CFA",
+            status,
+            payment_status
+        ])
+        counter['rows'] += 1
+        if len(rows) >= EXPORT_PDF_TABLE_ROWS:
+            yield _PdfRowsTable(rows)
+            rows = []
+    if rows or not counter['rows']:
+        yield _PdfRowsTable(rows)
+
+
+def write_orders_pdf(orders_query, output, filters):
+    """
+    Écrit l'export PDF en tableaux de EXPORT_PDF_TABLE_ROWS lignes, construits et libérés
+    l'un après l'autre pendant doc.build() au lieu d'un tableau géant découpé page par page.
+    Retourne le nombre de commandes.
+    """
+    doc = SimpleDocTemplate(output, pagesize=A4, title="Liste des commandes")
+    counter = {'rows': 0}
+    doc.build(list(_pdf_flowables(orders_query, filters, counter)))
+    return counter['rows']
+
+
+def build_export(export_job):
+    """Génère le fichier de l'export sur disque (écriture atomique) et met à jour export_job"""
+    filters = parse_export_filters(export_job.filters)
+    orders_query = filter_orders_for_export(filters)
+
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = EXPORT_DIR / f"{export_job.id}.{export_job.format}"
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.tmp')
+    os.close(fd)
+    try:
+        if export_job.format == 'xlsx':
+            row_count = write_orders_xlsx(orders_query, tmp_path)
+        else:
+            row_count = write_orders_pdf(orders_query, tmp_path, filters)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    export_job.file_path = str(path)
+    export_job.row_count = row_count
+    export_job.status = 'done'
+    export_job.error = ''
+    export_job.finished_at = timezone.now()
+    export_job.save(update_fields=['file_path', 'row_count', 'status', 'error', 'finished_at'])
+    return export_job
+
+
+def purge_old_exports():
+    """Supprime les exports (et leurs fichiers) plus anciens que EXPORT_RETENTION"""
+    old_exports = ExportJob.objects.filter(created_at__lt=timezone.now() - EXPORT_RETENTION)
+    for file_path in old_exports.exclude(file_path='').values_list('file_path', flat=True):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    deleted, _ = old_exports.delete()
+    return deleted
@@ -0,0 +1,100 @@
+# orders/idempotency.py
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+# Durée de validité d'une clé (surchargeable via settings.IDEMPOTENCY_KEY_TTL)
+IDEMPOTENCY_KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', timedelta(hours=24))
+
+CHECKOUT_SCOPE = 'checkout'
+API_ORDER_CREATE_SCOPE = 'api_order_create'
+
+
+class IdempotencyConflict(Exception):
+    """La clé a déjà été enregistrée par une requête concurrente"""
+
+
+def _cache_key(user, scope, key):
+    return f"idempotency:{scope}:{user.pk}:{key}"
+
+
+def _as_result(record):
+    return {
+        'order_id': record.order_id,
+        'order_number': record.order.order_number if record.order_id else None,
+        'response_status': record.response_status,
+        'response_body': record.response_body,
+        'expires_at': record.expires_at,
+    }
+
+
+def lookup(user, scope, key):
+    """
+    Retourne le résultat mémorisé pour cette clé, ou None.
+    Le cache est consulté en premier pour qu'un rejeu ne touche pas la base.
+    """
+    if not key:
+        return None
+
+    result = cache.get(_cache_key(user, scope, key))
+    if result is not None:
+        return result
+
+    record = IdempotencyKey.objects.select_related('order').filter(user=user, scope=scope, key=key).first()
+    if record is None:
+        return None
+    if record.is_expired():
+        record.delete()
+        return None
+
+    result = _as_result(record)
+    cache.set(_cache_key(user, scope, key), result, (record.expires_at - timezone.now()).total_seconds())
+    return result
+
+
+def remember(user, scope, key, order=None, response_status=None, response_body=None):
+    """
+    Enregistre le résultat de la première requête. À appeler dans la même transaction
+    que la création de la commande : si la clé existe déjà, IdempotencyConflict est levée
+    et la transaction appelante doit être annulée.
+    """
+    expires_at = timezone.now() + IDEMPOTENCY_KEY_TTL
+    # Même forme que la copie relue en base (JSONField + DjangoJSONEncoder : Decimal et dates en chaînes)
+    if response_body is not None:
+        response_body = json.loads(json.dumps(response_body, cls=DjangoJSONEncoder))
+
+    # Une clé expirée peut être réutilisée
+    IdempotencyKey.objects.filter(user=user, scope=scope, key=key, expires_at__lte=timezone.now()).delete()
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user,
+                scope=scope,
+                key=key,
+                order=order,
+                response_status=response_status,
+                response_body=response_body,
+                expires_at=expires_at
+            )
+    except IntegrityError:
+        raise IdempotencyConflict(key)
+
+    # Le cache n'est alimenté qu'une fois la transaction validée
+    transaction.on_commit(
+        lambda: cache.set(_cache_key(user, scope, key), _as_result(record), IDEMPOTENCY_KEY_TTL.total_seconds())
+    )
+    return record
+
+
+def purge_expired():
+    """Supprime en une requête toutes les clés expirées"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
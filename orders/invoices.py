@@ -0,0 +1,207 @@
+# orders/invoices.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+# Répertoire des factures générées (hors MEDIA_ROOT pour ne pas les exposer publiquement)
+INVOICE_CACHE_DIR = Path(getattr(settings, 'INVOICE_CACHE_DIR', settings.BASE_DIR / 'invoice_cache'))
+
+# Styles construits une seule fois au chargement du module
+STYLES = getSampleStyleSheet()
+STYLES.add(ParagraphStyle(name='Center', alignment=1))
+STYLES.add(ParagraphStyle(
+    name='Invoice_Title',
+    fontName='Helvetica-Bold',
+    fontSize=16,
+    alignment=1,
+    spaceAfter=12
+))
+
+
+def items_table_style(summary_rows):
+    """Style du tableau des articles suivi de `summary_rows` lignes de totaux (sous-total, remise...)"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -summary_rows - 1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        *[('SPAN', (0, -row), (1, -row)) for row in range(summary_rows, 0, -1)],
+        ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (2, -summary_rows), (-1, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (2, -1), (-1, -1), colors.lightgrey),
+    ])
+
+
+ITEMS_COL_WIDTHS = [8*cm, 2*cm, 4*cm, 4*cm]
+
+COMPANY_NAME = "E-SHOP SAS"
+COMPANY_ADDRESS = "123 Rue du Commerce, 75001 Paris"
+COMPANY_INFO = "SIRET: 123 456 789 00010 - TVA: FR12 123 456 789"
+
+
+def _item_label(item):
+    """Nom du produit suivi de ses options en format lisible"""
+    product_name = item.product_name
+    if item.options:
+        try:
+            if isinstance(item.options, str):
+                options_dict = json.loads(item.options)
+            else:
+                options_dict = item.options
+            options_text = ', '.join([f"{key}: {value}" for key, value in options_dict.items()])
+            product_name += f" ({options_text})"
+        except (json.JSONDecodeError, AttributeError):
+            pass  # Ignorer les erreurs de conversion
+    return product_name
+
+
+def invoice_fingerprint(order, items):
+    """Empreinte des champs imprimés sur la facture : change dès que la facture doit changer"""
+    customer = order.customer
+    content = [
+        order.order_number,
+        order.created_at.strftime('%d/%m/%Y'),
+        customer.get_full_name() or customer.username,
+        customer.email,
+        order.shipping_address_text,
+        str(order.subtotal),
+        str(order.discount_amount),
+        str(order.tax_amount),
+        str(order.shipping_cost),
+        str(order.total_amount),
+        order.payment_method,
+        order.payment_status,
+        [(_item_label(item), item.quantity, str(item.unit_price), str(item.total_price)) for item in items],
+    ]
+    return hashlib.sha256(json.dumps(content, default=str).encode('utf-8')).hexdigest()
+
+
+def build_invoice(order, items, output):
+    """Écrit la facture PDF de la commande dans `output` (chemin ou fichier)"""
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72,
+        title=f"Facture {order.order_number}"
+    )
+    elements = []
+
+    # Titre
+    elements.append(Paragraph(f"FACTURE N° {order.order_number}", STYLES['Invoice_Title']))
+    elements.append(Spacer(1, 12))
+
+    # Date et infos société
+    elements.append(Paragraph(f"Date: {order.created_at.strftime('%d/%m/%Y')}", STYLES['Normal']))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(COMPANY_NAME, STYLES['Heading2']))
+    elements.append(Paragraph(COMPANY_ADDRESS, STYLES['Normal']))
+    elements.append(Paragraph(COMPANY_INFO, STYLES['Normal']))
+    elements.append(Spacer(1, 24))
+
+    # Informations client
+    elements.append(Paragraph("Informations client:", STYLES['Heading3']))
+    elements.append(Paragraph(f"Nom: {order.customer.get_full_name() or order.customer.username}", STYLES['Normal']))
+    elements.append(Paragraph(f"Email: {order.customer.email}", STYLES['Normal']))
+    elements.append(Paragraph("Adresse de livraison:", STYLES['Normal']))
+    elements.append(Paragraph(order.shipping_address_text.replace('\n', '<br/>'), STYLES['Normal']))
+    elements.append(Spacer(1, 24))
+
+    # Informations commande
+    elements.append(Paragraph("Détails de la commande:", STYLES['Heading3']))
+    elements.append(Spacer(1, 12))
+
+    # Tableau des articles
+    data = [
+        ['Produit', 'Quantité', 'Prix unitaire', 'Total']
+    ]
+    for item in items:
+        data.append([
+            _item_label(item),
+            str(item.quantity),
+            f"{item.unit_price} F CFA",
+            f"{item.total_price} F CFA"
+        ])
+
+    # Ajout des totaux
+    totals = [['', '', 'Sous-total', f"{order.subtotal} F CFA"]]
+    if order.discount_amount:
+        totals.append(['', '', 'Remise', f"-{order.discount_amount} F CFA"])
+    totals.append(['', '', 'TVA (20%)', f"{order.tax_amount} F CFA"])
+    totals.append(['', '', 'Frais de livraison', f"{order.shipping_cost} F CFA" if order.shipping_cost > 0 else "Gratuit"])
+    totals.append(['', '', 'TOTAL', f"{order.total_amount} F CFA"])
+    data.extend(totals)
+
+    table = Table(data, colWidths=ITEMS_COL_WIDTHS)
+    table.setStyle(items_table_style(len(totals)))
+    elements.append(table)
+    elements.append(Spacer(1, 24))
+
+    # Informations de paiement
+    elements.append(Paragraph(f"Méthode de paiement: {order.get_payment_method_display()}", STYLES['Normal']))
+    elements.append(Paragraph(f"Statut du paiement: {order.get_payment_status_display()}", STYLES['Normal']))
+    elements.append(Spacer(1, 12))
+
+    # Pied de page
+    elements.append(Paragraph("Nous vous remercions pour votre commande!", STYLES['Center']))
+    elements.append(Spacer(1, 6))
+    elements.append(Paragraph("Pour toute question relative à votre commande, veuillez contacter notre service client.", STYLES['Center']))
+    elements.append(Paragraph("service-client@e-shop.com | +33 (0)1 23 45 67 89", STYLES['Center']))
+
+    doc.build(elements)
+
+
+def get_invoice_path(order):
+    """
+    Retourne le chemin de la facture PDF, générée seulement si aucune facture
+    ne correspond à l'empreinte actuelle de la commande.
+    """
+    items = list(order.items.all())
+    order_dir = INVOICE_CACHE_DIR / str(order.id)
+    path = order_dir / f"{invoice_fingerprint(order, items)}.pdf"
+    if path.exists():
+        return path
+
+    # Anciennes versions de la facture devenues obsolètes
+    order_dir.mkdir(parents=True, exist_ok=True)
+    for stale in order_dir.glob('*.pdf'):
+        stale.unlink(missing_ok=True)
+
+    # Écriture dans un fichier temporaire puis renommage atomique
+    fd, tmp_path = tempfile.mkstemp(dir=order_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            build_invoice(order, items, tmp_file)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def render_invoice_pdf(order):
+    """Contenu de la facture PDF (depuis le cache si elle est à jour)"""
+    return get_invoice_path(order).read_bytes()
+
+
+def invalidate_invoice(order_id):
+    """Supprime les factures en cache d'une commande supprimée"""
+    order_dir = INVOICE_CACHE_DIR / str(order_id)
+    if order_dir.exists():
+        shutil.rmtree(order_dir, ignore_errors=True)
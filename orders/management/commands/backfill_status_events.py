@@ -0,0 +1,66 @@
+# orders/management/commands/backfill_status_events.py
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from orders.models import Order, OrderNote, OrderStatusEvent
+
+STATUS_NOTE_RE = re.compile(r"^Statut modifié de (?P<from_label>.+) à (?P<to_label>.+)$")
+
+# Écart maximal entre une note et l'événement écrit dans le même appel à update_status
+SAME_CHANGE_WINDOW = timedelta(minutes=1)
+
+class Command(BaseCommand):
+    help = 'Crée l\'historique des statuts (OrderStatusEvent) à partir des notes "Statut modifié de X à Y"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Nombre d\'événements insérés par requête')
+        parser.add_argument('--dry-run', action='store_true', help='Compte les événements sans les enregistrer')
+
+    def handle(self, *args, **options):
+        status_codes = {label: code for code, label in Order.STATUS_CHOICES}
+
+        # Les notes qui ont déjà leur événement (reprises lors d'une exécution précédente,
+        # ou écrites avec l'événement par update_status) sont ignorées : la commande peut être relancée
+        existing = defaultdict(list)
+        for order_id, to_status, created_at in OrderStatusEvent.objects.values_list('order_id', 'to_status', 'created_at').iterator():
+            existing[(order_id, to_status)].append(created_at)
+
+        notes = (
+            OrderNote.objects.filter(note__startswith='Statut modifié de ')
+            .order_by('created_at', 'id')
+            .values_list('order_id', 'user_id', 'note', 'created_at')
+            .iterator(chunk_size=options['batch_size'])
+        )
+
+        created = skipped = 0
+        events = []
+        for order_id, user_id, note, created_at in notes:
+            match = STATUS_NOTE_RE.match(note.strip())
+            from_status = status_codes.get(match.group('from_label')) if match else None
+            to_status = status_codes.get(match.group('to_label')) if match else None
+            already_recorded = any(
+                abs(event_at - created_at) <= SAME_CHANGE_WINDOW for event_at in existing[(order_id, to_status)]
+            )
+            if not from_status or not to_status or already_recorded:
+                skipped += 1
+                continue
+
+            events.append(OrderStatusEvent(
+                order_id=order_id,
+                from_status=from_status,
+                to_status=to_status,
+                user_id=user_id,
+                created_at=created_at
+            ))
+            created += 1
+            if len(events) >= options['batch_size'] and not options['dry_run']:
+                OrderStatusEvent.objects.bulk_create(events)
+                events = []
+
+        if events and not options['dry_run']:
+            OrderStatusEvent.objects.bulk_create(events)
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{created} événement(s) créé(s), {skipped} note(s) ignorée(s)"))
@@ -0,0 +1,10 @@
+# orders/management/commands/purge_exports.py
+from django.core.management.base import BaseCommand
+from orders.exports import purge_old_exports
+
+class Command(BaseCommand):
+    help = 'Supprime les exports de commandes (et leurs fichiers) plus anciens que EXPORT_RETENTION'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_old_exports()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} export(s) supprimé(s)"))
@@ -0,0 +1,10 @@
+# orders/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+from orders.idempotency import purge_expired
+
+class Command(BaseCommand):
+    help = 'Supprime les clés d\'idempotence expirées'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clé(s) expirée(s) supprimée(s)"))
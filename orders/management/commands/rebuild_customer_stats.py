@@ -0,0 +1,10 @@
+# orders/management/commands/rebuild_customer_stats.py
+from django.core.management.base import BaseCommand
+from orders.counters import rebuild_customer_stats
+
+class Command(BaseCommand):
+    help = 'Recalcule les statistiques des clients (total_orders, total_spent, last_order_date) à partir des commandes'
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_customer_stats()
+        self.stdout.write(self.style.SUCCESS(f"Statistiques corrigées pour {updated} client(s)"))
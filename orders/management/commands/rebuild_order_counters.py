@@ -0,0 +1,10 @@
+# orders/management/commands/rebuild_order_counters.py
+from django.core.management.base import BaseCommand
+from orders.counters import rebuild_order_counters
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de commandes par statut (table OrderCounter)'
+
+    def handle(self, *args, **kwargs):
+        counts = rebuild_order_counters()
+        self.stdout.write(self.style.SUCCESS(f"Compteurs recalculés pour {counts['total']} commande(s)"))
@@ -0,0 +1,14 @@
+# orders/management/commands/rebuild_order_search.py
+from django.core.management.base import BaseCommand
+from orders.search import rebuild_index, use_fts
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de recherche des commandes (FTS5 sous SQLite, trigrammes sinon)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Nombre de commandes indexées par lot')
+
+    def handle(self, *args, **options):
+        count = rebuild_index(batch_size=options['batch_size'])
+        backend = 'FTS5' if use_fts() else 'trigrammes'
+        self.stdout.write(self.style.SUCCESS(f"{count} commande(s) indexée(s) ({backend})"))
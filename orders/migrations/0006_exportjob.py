@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('xlsx', 'Excel'), ('pdf', 'PDF')], max_length=10, verbose_name='Format')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtres')),
+                ('filters_hash', models.CharField(max_length=64, verbose_name='Empreinte des filtres')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut')),
+                ('file_path', models.CharField(blank=True, max_length=255, verbose_name='Fichier')),
+                ('row_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de commandes')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de fin')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Demandé par')),
+            ],
+            options={
+                'verbose_name': 'Export de commandes',
+                'verbose_name_plural': 'Exports de commandes',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['format', 'filters_hash', 'created_at'], name='orders_expo_format_b51f03_idx')],
+            },
+        ),
+    ]
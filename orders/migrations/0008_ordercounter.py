@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:06
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderCounter = apps.get_model('orders', 'OrderCounter')
+    counters = []
+    for field in ('status', 'payment_status'):
+        for row in Order.objects.order_by().values(field).annotate(total=Count('id')):
+            counters.append(OrderCounter(field=field, value=row[field], count=row['total']))
+    OrderCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_orderstatusevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=20, verbose_name='Champ')),
+                ('value', models.CharField(max_length=20, verbose_name='Valeur')),
+                ('count', models.IntegerField(default=0, verbose_name='Nombre')),
+            ],
+            options={
+                'verbose_name': 'Compteur de commandes',
+                'verbose_name_plural': 'Compteurs de commandes',
+                'constraints': [models.UniqueConstraint(fields=('field', 'value'), name='unique_order_counter')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:08
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+# Copie figée de orders/search.py (poids des champs et normalisation) au moment de la migration
+SEARCH_FIELDS = {
+    'order_number': 4,
+    'tracking_number': 3,
+    'email': 2,
+    'customer_name': 2,
+    'city': 1,
+}
+
+
+def create_fts_table(apps, schema_editor):
+    # SQLite : table FTS5 (tokenizer trigram) ; sinon, ou si FTS5 est indisponible,
+    # orders/search.py se rabat sur la table OrderSearchTrigram
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS orders_order_search USING fts5("
+            "order_number, tracking_number, email, customer_name, city, tokenize='trigram')"
+        )
+    except OperationalError:
+        pass
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower().strip()
+
+
+def _shipping_city(address_text):
+    parts = [part.strip() for part in (address_text or '').split(',')]
+    if len(parts) < 3:
+        return ''
+    return parts[-2].split(' ', 1)[-1]
+
+
+def _index_batch(connection, use_fts, OrderSearchTrigram, documents):
+    if use_fts:
+        columns = ', '.join(SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO orders_order_search (rowid, {columns}) VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+                [[order_id] + [_normalize(document[field]) for field in SEARCH_FIELDS] for order_id, document in documents]
+            )
+        return
+
+    rows = []
+    for order_id, document in documents:
+        for field, weight in SEARCH_FIELDS.items():
+            text = _normalize(document[field])
+            for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                rows.append(OrderSearchTrigram(order_id=order_id, trigram=trigram, weight=weight))
+    OrderSearchTrigram.objects.bulk_create(rows, batch_size=1000)
+
+
+def populate_search_index(apps, schema_editor):
+    # Indexe les commandes existantes (équivalent de manage.py rebuild_order_search)
+    Order = apps.get_model('orders', 'Order')
+    OrderSearchTrigram = apps.get_model('orders', 'OrderSearchTrigram')
+    connection = schema_editor.connection
+    use_fts = connection.vendor == 'sqlite' and 'orders_order_search' in connection.introspection.table_names()
+
+    orders = Order.objects.order_by('id').values_list(
+        'id', 'order_number', 'tracking_number', 'shipping_address_text',
+        'customer__email', 'customer__first_name', 'customer__last_name',
+    )
+    documents = []
+    for order_id, order_number, tracking_number, address, email, first_name, last_name in orders.iterator(chunk_size=1000):
+        documents.append((order_id, {
+            'order_number': order_number or '',
+            'tracking_number': tracking_number or '',
+            'email': email or '',
+            'customer_name': f"{first_name} {last_name}".strip(),
+            'city': _shipping_city(address),
+        }))
+        if len(documents) >= 1000:
+            _index_batch(connection, use_fts, OrderSearchTrigram, documents)
+            documents = []
+    if documents:
+        _index_batch(connection, use_fts, OrderSearchTrigram, documents)
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS orders_order_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_order_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_trigrams', to='orders.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'order'], name='orders_orde_trigram_4eada8_idx')],
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
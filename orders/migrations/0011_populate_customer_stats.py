@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:12
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Max, Q, Sum
+
+
+def populate_customer_stats(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    active = ~Q(status='cancelled')
+    users = []
+    for row in Order.objects.order_by().values('customer_id').annotate(
+        orders=Count('id', filter=active),
+        spent=Sum('total_amount', filter=active & Q(payment_status='completed')),
+        last=Max('created_at'),
+    ):
+        users.append(User(
+            id=row['customer_id'],
+            total_orders=row['orders'],
+            total_spent=row['spent'] or Decimal('0'),
+            last_order_date=row['last'],
+        ))
+    User.objects.bulk_update(users, ['total_orders', 'total_spent', 'last_order_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_stats_indexes'),
+        ('orders', '0010_order_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_customer_stats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
 from django.core.validators import MinValueValidator
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from decimal import Decimal
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -9,6 +12,118 @@ from django.urls import reverse
 # Utilisez settings.AUTH_USER_MODEL au lieu de l'import direct
 User = settings.AUTH_USER_MODEL
 
+# Champs dont le nombre de commandes par valeur est tenu dans OrderCounter
+COUNTED_FIELDS = ('status', 'payment_status')
+
+# Champs dont dépendent les statistiques du client (User.total_orders, total_spent)
+CUSTOMER_STATS_FIELDS = ('status', 'payment_status', 'total_amount')
+
+
+def customer_stats_share(status, payment_status, total_amount):
+    """
+    Part d'une commande dans les statistiques de son client : (commandes, montant dépensé).
+    Une commande annulée ne compte pas ; seul le montant des commandes payées est dépensé.
+    """
+    if status == 'cancelled':
+        return 0, Decimal('0')
+    return 1, (total_amount or Decimal('0')) if payment_status == 'completed' else Decimal('0')
+
+
+def apply_customer_stats(deltas, order_dates=None):
+    """
+    Applique {customer_id: (commandes, montant)} aux statistiques des clients avec des UPDATE
+    relatifs (F), et avance last_order_date pour {customer_id: date de commande}.
+    """
+    order_dates = order_dates or {}
+    for customer_id in set(deltas) | set(order_dates):
+        orders, spent = deltas.get(customer_id, (0, Decimal('0')))
+        updates = {}
+        if orders:
+            updates['total_orders'] = models.F('total_orders') + orders
+        if spent:
+            updates['total_spent'] = models.F('total_spent') + spent
+        if customer_id in order_dates:
+            order_date = models.Value(order_dates[customer_id], output_field=models.DateTimeField())
+            updates['last_order_date'] = Greatest(Coalesce('last_order_date', order_date), order_date)
+        if updates:
+            Order.customer.field.related_model.objects.filter(pk=customer_id).update(**updates)
+
+
+# Envoyé une seule fois par transition groupée (sender=Order, orders, old_statuses, new_status, user)
+order_statuses_changed = Signal()
+
+# Envoyé par orders.checkout.place_order une fois les articles insérés (sender=Order, order, items_count),
+# dans la transaction de la commande : bulk_create n'envoie pas post_save pour les articles
+order_placed = Signal()
+
+
+class OrderQuerySet(models.QuerySet):
+    def transition_status(self, new_status, user=None, note=None):
+        """
+        Passe toutes les commandes du queryset au statut new_status en une seule requête UPDATE,
+        sans déclencher post_save. Les notes d'historique sont créées avec bulk_create et un seul
+        signal order_statuses_changed est envoyé pour le lot. Retourne le nombre de commandes traitées.
+        """
+        if new_status not in dict(Order.STATUS_CHOICES):
+            raise ValueError(f"Statut invalide: {new_status}")
+
+        with transaction.atomic():
+            rows = list(self.select_for_update().values_list('id', 'order_number', 'status'))
+            if not rows:
+                return 0
+
+            self.model.objects.filter(id__in=[row[0] for row in rows]).update(
+                status=new_status, updated_at=timezone.now()
+            )
+
+            # Mêmes notes que Order.update_status, insérées en une requête
+            if user:
+                labels = dict(Order.STATUS_CHOICES)
+                OrderNote.objects.bulk_create([
+                    OrderNote(
+                        order_id=order_id,
+                        user=user,
+                        note=note or f"Statut modifié de {labels[old_status]} à {labels[new_status]}"
+                    )
+                    for order_id, order_number, old_status in rows
+                    if note or old_status != new_status
+                ])
+
+            changed = [row for row in rows if row[2] != new_status]
+            deltas = {('status', new_status): len(changed)}
+            for order_id, order_number, old_status in changed:
+                deltas[('status', old_status)] = deltas.get(('status', old_status), 0) - 1
+            OrderCounter.apply(deltas)
+
+            # Seules les annulations (et leur annulation) changent les statistiques des clients
+            flipped = {order_id: old_status for order_id, order_number, old_status in changed
+                       if 'cancelled' in (old_status, new_status)}
+            if flipped:
+                customer_deltas = {}
+                for order_id, customer_id, payment_status, total_amount in self.model.objects.filter(
+                    id__in=flipped
+                ).values_list('id', 'customer_id', 'payment_status', 'total_amount'):
+                    old_orders, old_spent = customer_stats_share(flipped[order_id], payment_status, total_amount)
+                    new_orders, new_spent = customer_stats_share(new_status, payment_status, total_amount)
+                    orders, spent = customer_deltas.get(customer_id, (0, Decimal('0')))
+                    customer_deltas[customer_id] = (orders + new_orders - old_orders, spent + new_spent - old_spent)
+                apply_customer_stats(customer_deltas)
+
+            OrderStatusEvent.objects.bulk_create([
+                OrderStatusEvent(order_id=order_id, from_status=old_status, to_status=new_status, user=user)
+                for order_id, order_number, old_status in changed
+            ])
+            if changed:
+                transaction.on_commit(lambda: order_statuses_changed.send(
+                    sender=Order,
+                    orders=[(order_id, order_number) for order_id, order_number, old_status in changed],
+                    old_statuses={order_id: old_status for order_id, order_number, old_status in changed},
+                    new_status=new_status,
+                    user=user
+                ))
+        return len(rows)
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'En attente'),
@@ -53,6 +168,12 @@ class Order(models.Model):
         default=Decimal('0.00'),
         verbose_name=_("Frais de livraison")
     )
+    discount_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_("Remise")
+    )
     tax_amount = models.DecimalField(
         max_digits=10, 
         decimal_places=2, 
@@ -101,6 +222,8 @@ class Order(models.Model):
     )
     email_sent = models.BooleanField(default=False, verbose_name=_("Email envoyé"))
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = _("Commande")
@@ -109,17 +232,67 @@ class Order(models.Model):
             models.Index(fields=['status']),  # Ajout d'index pour améliorer les performances du filtre
             models.Index(fields=['payment_status']),
             models.Index(fields=['customer']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),  # Pagination par curseur (orders/pagination.py)
+            models.Index(fields=['total_amount', 'id']),
             models.Index(fields=['order_number']),
         ]
 
     def __str__(self):
         return f"Commande #{self.order_number}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statuts tels qu'en base, pour tenir les compteurs à jour lors du prochain save()
+        instance._loaded_statuses = {field: instance.__dict__.get(field) for field in COUNTED_FIELDS}
+        # Idem pour les statistiques du client (None si un des champs n'a pas été chargé)
+        if all(field in instance.__dict__ for field in CUSTOMER_STATS_FIELDS):
+            instance._loaded_stats_share = customer_stats_share(
+                *(instance.__dict__[field] for field in CUSTOMER_STATS_FIELDS)
+            )
+        # Montant tel qu'en base (rollup journalier du tableau de bord)
+        instance._loaded_total = instance.__dict__.get('total_amount')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.total_amount:
-            self.total_amount = self.subtotal + self.shipping_cost + self.tax_amount
-        super().save(*args, **kwargs)
+            self.total_amount = self.subtotal - self.discount_amount + self.shipping_cost + self.tax_amount
+
+        adding = self._state.adding
+        loaded = getattr(self, '_loaded_statuses', None)
+        loaded_share = getattr(self, '_loaded_stats_share', None)
+        update_fields = kwargs.get('update_fields')
+        # Commande, compteurs et statistiques client écrits ensemble ou pas du tout
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            saved_fields = [field for field in COUNTED_FIELDS if update_fields is None or field in update_fields]
+            deltas = {}
+            for field in saved_fields:
+                new_value = getattr(self, field)
+                old_value = None if adding else (loaded or {}).get(field)
+                if not adding and old_value is None:
+                    # Valeur d'origine inconnue : rebuild_order_counters corrigera l'écart
+                    continue
+                if old_value == new_value:
+                    continue
+                if old_value is not None:
+                    deltas[(field, old_value)] = deltas.get((field, old_value), 0) - 1
+                deltas[(field, new_value)] = deltas.get((field, new_value), 0) + 1
+            OrderCounter.apply(deltas)
+
+            share = customer_stats_share(self.status, self.payment_status, self.total_amount)
+            if adding:
+                apply_customer_stats({self.customer_id: share}, {self.customer_id: self.created_at})
+            elif update_fields is None or set(CUSTOMER_STATS_FIELDS).intersection(update_fields):
+                # Part d'origine inconnue : rebuild_customer_stats corrigera l'écart
+                if loaded_share is not None and share != loaded_share:
+                    apply_customer_stats({self.customer_id: (share[0] - loaded_share[0], share[1] - loaded_share[1])})
+        self._loaded_stats_share = share
+        if update_fields is None or 'total_amount' in update_fields:
+            self._loaded_total = self.total_amount
+
+        self._loaded_statuses = dict(loaded or {}, **{field: getattr(self, field) for field in saved_fields})
 
     def get_order_items(self):
         return self.items.all()
@@ -169,6 +342,10 @@ class Order(models.Model):
         old_status = self.status
         self.status = new_status
         self.save(update_fields=['status', 'updated_at'])
+
+        # Historique structuré des changements de statut
+        if old_status != new_status:
+            OrderStatusEvent.objects.create(order=self, from_status=old_status, to_status=new_status, user=user)
         
         # Ajouter une note si un utilisateur est fourni
         if user and (note or old_status != new_status):
@@ -188,6 +365,9 @@ class OrderItem(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     options = models.JSONField(null=True, blank=True)
+    # Catégorie au moment de la commande : reste connue si le produit est supprimé
+    category = models.ForeignKey('products.Category', null=True, blank=True, on_delete=models.SET_NULL, related_name='order_items')
+    category_name = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
     
@@ -206,6 +386,9 @@ class OrderItem(models.Model):
         self.updated_at = timezone.now()
         if not self.total_price:
             self.total_price = self.unit_price * self.quantity
+        if self.product_id and not self.category_id and not self.category_name:
+            self.category = self.product.category
+            self.category_name = self.category.name
         super().save(*args, **kwargs)
 
 
@@ -244,4 +427,163 @@ class OrderNote(models.Model):
         ]
         
     def __str__(self):
-        return f"Note sur {self.order} par {self.user or 'système'}"
\ No newline at end of file
+        return f"Note sur {self.order} par {self.user or 'système'}"
+
+class OrderCounter(models.Model):
+    """Nombre de commandes par statut et par statut de paiement, tenu à jour à chaque enregistrement"""
+    field = models.CharField(max_length=20, verbose_name=_("Champ"))
+    value = models.CharField(max_length=20, verbose_name=_("Valeur"))
+    count = models.IntegerField(default=0, verbose_name=_("Nombre"))
+
+    class Meta:
+        verbose_name = _("Compteur de commandes")
+        verbose_name_plural = _("Compteurs de commandes")
+        constraints = [
+            models.UniqueConstraint(fields=['field', 'value'], name='unique_order_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.field}={self.value} : {self.count}"
+
+    @classmethod
+    def apply(cls, deltas):
+        """Applique {(champ, valeur): variation} avec des UPDATE relatifs (sans lecture préalable)"""
+        for (field, value), delta in deltas.items():
+            if not delta:
+                continue
+            if not cls.objects.filter(field=field, value=value).update(count=models.F('count') + delta):
+                cls.objects.get_or_create(field=field, value=value)
+                cls.objects.filter(field=field, value=value).update(count=models.F('count') + delta)
+
+
+class OrderStatusEvent(models.Model):
+    """Changement de statut d'une commande (historique en ajout seul)"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events', verbose_name=_("Commande"))
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, blank=True, verbose_name=_("Ancien statut"))
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, verbose_name=_("Nouveau statut"))
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='order_status_events',
+        verbose_name=_("Utilisateur")
+    )
+    created_at = models.DateTimeField(default=timezone.now, verbose_name=_("Date"))
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        verbose_name = _("Changement de statut")
+        verbose_name_plural = _("Changements de statut")
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+            models.Index(fields=['to_status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.order} : {self.from_status or '-'} → {self.to_status}"
+
+
+class OrderSearchTrigram(models.Model):
+    """Index de recherche par trigrammes (bases sans FTS5), alimenté par orders/search.py"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='search_trigrams')
+    trigram = models.CharField(max_length=3)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trigram', 'order']),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """Résultat mémorisé d'une création de commande, rejoué si la même clé est renvoyée"""
+    SCOPE_CHOICES = [
+        ('checkout', 'Formulaire de paiement'),
+        ('api_order_create', 'API création de commande'),
+    ]
+
+    key = models.CharField(max_length=64, verbose_name=_("Clé"))
+    scope = models.CharField(max_length=30, choices=SCOPE_CHOICES, verbose_name=_("Portée"))
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name=_("Utilisateur")
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='idempotency_keys',
+        verbose_name=_("Commande")
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name=_("Code de réponse"))
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=_("Réponse"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Date de création"))
+    expires_at = models.DateTimeField(verbose_name=_("Date d'expiration"))
+
+    class Meta:
+        verbose_name = _("Clé d'idempotence")
+        verbose_name_plural = _("Clés d'idempotence")
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class ExportJob(models.Model):
+    """Export de la liste des commandes généré en arrière-plan par le worker"""
+    FORMAT_CHOICES = [
+        ('xlsx', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échoué'),
+    ]
+
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name=_("Format"))
+    filters = models.JSONField(default=dict, blank=True, verbose_name=_("Filtres"))
+    filters_hash = models.CharField(max_length=64, verbose_name=_("Empreinte des filtres"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name=_("Statut"))
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs',
+        verbose_name=_("Demandé par")
+    )
+    file_path = models.CharField(max_length=255, blank=True, verbose_name=_("Fichier"))
+    row_count = models.PositiveIntegerField(default=0, verbose_name=_("Nombre de commandes"))
+    error = models.TextField(blank=True, verbose_name=_("Erreur"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Date de création"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Date de fin"))
+
+    class Meta:
+        verbose_name = _("Export de commandes")
+        verbose_name_plural = _("Exports de commandes")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['format', 'filters_hash', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Export {self.get_format_display()} #{self.id}"
+
+    @property
+    def filename(self):
+        return f"commandes_{self.created_at.strftime('%Y%m%d_%H%M')}.{self.format}"
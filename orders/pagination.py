@@ -0,0 +1,133 @@
+# orders/pagination.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+
+from .models import Order
+from .search import rank_orders
+
+# Tris autorisés pour la liste des commandes : chacun est couvert par un index (champ, id)
+ORDER_SORTS = {
+    '-created_at': ('created_at', True),
+    'created_at': ('created_at', False),
+    '-total_amount': ('total_amount', True),
+    'total_amount': ('total_amount', False),
+}
+DEFAULT_ORDER_SORT = '-created_at'
+
+
+def encode_cursor(value, pk, direction):
+    data = json.dumps({'v': str(value), 'id': pk, 'd': direction})
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, field):
+    """Retourne (valeur, id, direction) ou None si le curseur est invalide"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value = Order._meta.get_field(field).to_python(data['v'])
+        return value, int(data['id']), 'prev' if data['d'] == 'prev' else 'next'
+    except (ValueError, TypeError, KeyError, ValidationError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, sort, cursor, page_size):
+    """
+    Pagination par curseur sur (champ de tri, id) : chaque page est un
+    WHERE (champ, id) < (valeur, id) ORDER BY ... LIMIT, sans COUNT ni OFFSET,
+    donc la page 500 coûte le même prix que la première.
+    """
+    field, descending = ORDER_SORTS.get(sort, ORDER_SORTS[DEFAULT_ORDER_SORT])
+    position = decode_cursor(cursor, field) if cursor else None
+    direction = position[2] if position else 'next'
+
+    # En remontant (page précédente) on parcourt l'index dans l'autre sens
+    reverse = descending if direction == 'next' else not descending
+    ordering = (f'-{field}', '-id') if reverse else (field, 'id')
+    queryset = queryset.order_by(*ordering)
+
+    if position:
+        value, pk = position[0], position[1]
+        lookup = 'lt' if reverse else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+        )
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == 'prev':
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows, None, None)
+
+    first, last = rows[0], rows[-1]
+    has_next = has_more if direction == 'next' else True
+    has_previous = position is not None if direction == 'next' else has_more
+    return KeysetPage(
+        rows,
+        encode_cursor(getattr(last, field), last.pk, 'next') if has_next else None,
+        encode_cursor(getattr(first, field), first.pk, 'prev') if has_previous else None,
+    )
+
+
+def paginate_ranked(queryset, order_ids, cursor, page_size):
+    """
+    Pagination des résultats d'une recherche classée : le curseur est la position dans
+    order_ids, et seules les commandes de la page sont chargées.
+    """
+    try:
+        offset = max(int(cursor), 0) if cursor else 0
+    except ValueError:
+        offset = 0
+    rows = rank_orders(queryset, order_ids[offset:offset + page_size])
+    return KeysetPage(
+        rows,
+        str(offset + page_size) if offset + page_size < len(order_ids) else None,
+        str(max(offset - page_size, 0)) if offset > 0 else None,
+    )
+
+
+class OrderCursorPagination(CursorPagination):
+    """Pagination par curseur de l'API des commandes (sans COUNT ni OFFSET)"""
+    page_size = 20
+    ordering = ('-created_at', '-id')
+
+
+class OrderSortFilter(OrderingFilter):
+    """?ordering= limité aux tris de ORDER_SORTS, départagés par id"""
+    ordering_fields = ['created_at', 'total_amount']
+
+    def get_ordering(self, request, queryset, view):
+        sort = request.query_params.get(self.ordering_param, '').strip()
+        if sort not in ORDER_SORTS:
+            return list(OrderCursorPagination.ordering)
+        field, descending = ORDER_SORTS[sort]
+        return [f'-{field}', '-id'] if descending else [field, 'id']
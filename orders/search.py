@@ -0,0 +1,189 @@
+# orders/search.py
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+
+from .models import Order, OrderSearchTrigram
+
+# Nombre maximal de résultats retournés par une recherche classée
+ORDER_SEARCH_LIMIT = getattr(settings, 'ORDER_SEARCH_LIMIT', 200)
+
+# Table FTS5 (SQLite) ; les autres bases utilisent la table de trigrammes OrderSearchTrigram
+FTS_TABLE = 'orders_order_search'
+
+# Poids de chaque champ dans le classement
+SEARCH_FIELDS = {
+    'order_number': 4,
+    'tracking_number': 3,
+    'email': 2,
+    'customer_name': 2,
+    'city': 1,
+}
+
+# Champs de Order dont la modification impose de réindexer la commande
+INDEXED_ORDER_FIELDS = {'order_number', 'tracking_number', 'shipping_address_text', 'customer', 'customer_id'}
+
+_fts_available = None
+
+
+def use_fts():
+    """Vrai si la table FTS5 a été créée par la migration (SQLite avec tokenizer trigram)"""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def normalize(text):
+    """Minuscules sans accents, pour les trigrammes"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower().strip()
+
+
+def shipping_city(address_text):
+    """Ville extraite de l'adresse au format 'rue, code postal ville, pays'"""
+    parts = [part.strip() for part in (address_text or '').split(',')]
+    if len(parts) < 3:
+        return ''
+    postal_and_city = parts[-2].split(' ', 1)
+    return postal_and_city[-1]
+
+
+def order_document(order):
+    customer = order.customer
+    return {
+        'order_number': order.order_number or '',
+        'tracking_number': order.tracking_number or '',
+        'email': customer.email or '',
+        'customer_name': customer.get_full_name().strip(),
+        'city': shipping_city(order.shipping_address_text),
+    }
+
+
+def trigrams(text):
+    text = normalize(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_orders(orders):
+    """(Ré)indexe les commandes données (avec customer chargé de préférence)"""
+    orders = list(orders)
+    if not orders:
+        return
+    order_ids = [order.id for order in orders]
+
+    if use_fts():
+        # rowid de la table FTS = id de la commande
+        placeholders = ', '.join(['%s'] * len(order_ids))
+        columns = ', '.join(SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", order_ids)
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+                [[order.id] + [normalize(value) for value in order_document(order).values()] for order in orders]
+            )
+        return
+
+    OrderSearchTrigram.objects.filter(order_id__in=order_ids).delete()
+    rows = []
+    for order in orders:
+        for field, value in order_document(order).items():
+            for trigram in trigrams(value):
+                rows.append(OrderSearchTrigram(order_id=order.id, trigram=trigram, weight=SEARCH_FIELDS[field]))
+    OrderSearchTrigram.objects.bulk_create(rows, batch_size=1000)
+
+
+def index_order(order):
+    index_orders([order])
+
+
+def remove_order(order_id):
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [order_id])
+    # Les trigrammes sont supprimés en cascade avec la commande
+
+
+def rebuild_index(batch_size=1000):
+    """Réindexe toutes les commandes par lots. Retourne le nombre de commandes indexées"""
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    else:
+        OrderSearchTrigram.objects.all().delete()
+
+    count = 0
+    batch = []
+    for order in Order.objects.select_related('customer').order_by('id').iterator(chunk_size=batch_size):
+        batch.append(order)
+        if len(batch) >= batch_size:
+            index_orders(batch)
+            count += len(batch)
+            batch = []
+    index_orders(batch)
+    return count + len(batch)
+
+
+def _fts_query(query):
+    # Chaque mot devient une sous-chaîne recherchée (tokenizer trigram), toutes obligatoires
+    words = [normalize(word).replace('"', '""') for word in query.split() if len(word) >= 3]
+    return ' AND '.join(f'"{word}"' for word in words)
+
+
+def search_order_ids(query, queryset=None, limit=ORDER_SEARCH_LIMIT):
+    """
+    Identifiants des commandes correspondant à la recherche, les plus pertinentes en premier.
+    Seules les commandes de `queryset` (filtres, commandes du client...) sont candidates :
+    la restriction s'applique avant la limite. Retourne None si la recherche est trop
+    courte pour l'index (moins de 3 caractères).
+    """
+    query = (query or '').strip()
+
+    if use_fts():
+        match = _fts_query(query)
+        if not match:
+            return None
+        weights = ', '.join(str(weight) for weight in SEARCH_FIELDS.values())
+        candidates, params = '', [match]
+        if queryset is not None:
+            candidates_sql, candidates_params = queryset.order_by().values('id').query.sql_with_params()
+            candidates = f" AND rowid IN ({candidates_sql})"
+            params.extend(candidates_params)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{candidates} "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                params + [limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    query_trigrams = set()
+    for word in query.split():
+        query_trigrams |= trigrams(word)
+    if not query_trigrams:
+        return None
+
+    # Tous les trigrammes doivent être présents ; classement par poids des champs où ils apparaissent
+    matches = OrderSearchTrigram.objects.filter(trigram__in=query_trigrams)
+    if queryset is not None:
+        matches = matches.filter(order_id__in=queryset.order_by().values('id'))
+    matches = (
+        matches.values('order_id')
+        .annotate(found=Count('trigram', distinct=True), score=Sum('weight'))
+        .filter(found=len(query_trigrams))
+        .order_by('-score', '-order_id')
+    )
+    return [row['order_id'] for row in matches[:limit]]
+
+
+def filter_orders_by_text(queryset, query):
+    """Recherche simple (numéro de commande ou e-mail du client) pour les requêtes trop courtes pour l'index"""
+    return queryset.filter(Q(order_number__icontains=query) | Q(customer__email__icontains=query))
+
+
+def rank_orders(queryset, order_ids):
+    """Commandes du queryset parmi order_ids, dans l'ordre du classement"""
+    position = {order_id: index for index, order_id in enumerate(order_ids)}
+    return sorted(queryset.filter(id__in=order_ids), key=lambda order: position[order.id])
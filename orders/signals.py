@@ -0,0 +1,80 @@
+# orders/signals.py
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .invoices import invalidate_invoice
+from .models import (
+    COUNTED_FIELDS, CUSTOMER_STATS_FIELDS, Order, OrderCounter, OrderItem, OrderNote, OrderStatusEvent,
+    apply_customer_stats, customer_stats_share, order_statuses_changed
+)
+from .snapshots import invalidate_order_snapshots
+
+
+@receiver(post_delete, sender=Order)
+def delete_order_invoices(sender, instance, **kwargs):
+    # Une commande modifiée change d'empreinte : get_invoice_path remplace alors l'ancienne facture
+    invalidate_invoice(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_order_snapshot(sender, instance, **kwargs):
+    """Les instantanés JSON (détail de commande) ne sont plus valables dès que la commande change"""
+    invalidate_order_snapshots([instance.id])
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+@receiver([post_save, post_delete], sender=OrderNote)
+@receiver([post_save, post_delete], sender=OrderStatusEvent)
+def invalidate_related_order_snapshot(sender, instance, **kwargs):
+    invalidate_order_snapshots([instance.order_id])
+
+
+@receiver(order_statuses_changed, sender=Order)
+def invalidate_transitioned_order_snapshots(sender, orders, **kwargs):
+    # Transition groupée : UPDATE et bulk_create n'envoient pas post_save
+    invalidate_order_snapshots([order_id for order_id, order_number in orders])
+
+
+@receiver(pre_delete, sender=Order)
+def reload_counted_fields(sender, instance, **kwargs):
+    # L'instance peut être périmée (transition_status, UPDATE groupé) : on retranche les valeurs en base
+    current = Order.objects.filter(pk=instance.pk).values(*{*COUNTED_FIELDS, *CUSTOMER_STATS_FIELDS}).first()
+    for field, value in (current or {}).items():
+        setattr(instance, field, value)
+
+
+@receiver(post_delete, sender=Order)
+def decrement_order_counters(sender, instance, **kwargs):
+    OrderCounter.apply({(field, getattr(instance, field)): -1 for field in COUNTED_FIELDS})
+
+
+@receiver(post_delete, sender=Order)
+def deduct_customer_stats(sender, instance, **kwargs):
+    # last_order_date n'est pas recalculé ici : rebuild_customer_stats s'en charge
+    orders, spent = customer_stats_share(instance.status, instance.payment_status, instance.total_amount)
+    apply_customer_stats({instance.customer_id: (-orders, -spent)})
+
+
+@receiver(post_save, sender=Order)
+def index_order_for_search(sender, instance, update_fields=None, **kwargs):
+    # Inutile de réindexer pour un changement de statut, de paiement, etc.
+    if update_fields is not None and not search.INDEXED_ORDER_FIELDS.intersection(update_fields):
+        return
+    search.index_order(instance)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_search(sender, instance, **kwargs):
+    search.remove_order(instance.id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_customer_orders(sender, instance, created, update_fields=None, **kwargs):
+    """Le nom et l'e-mail du client font partie de l'index de recherche de ses commandes"""
+    if created or (update_fields is not None and not {'first_name', 'last_name', 'email'}.intersection(update_fields)):
+        return
+    orders = list(instance.orders.select_related('customer'))
+    search.index_orders(orders)
+    invalidate_order_snapshots([order.id for order in orders])
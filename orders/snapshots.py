@@ -0,0 +1,56 @@
+# orders/snapshots.py
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+
+# Durée de conservation des instantanés JSON des commandes
+ORDER_SNAPSHOT_TTL = getattr(settings, 'ORDER_SNAPSHOT_TTL', 60 * 60)
+
+
+def _version_key(order_id):
+    return f"order_snapshot:version:{order_id}"
+
+
+def get_snapshot_version(order_id):
+    """Version courante des instantanés de la commande (changée à chaque modification)"""
+    version = cache.get(_version_key(order_id))
+    if version is None:
+        cache.add(_version_key(order_id), uuid.uuid4().hex[:12], None)
+        version = cache.get(_version_key(order_id))
+    return version
+
+
+def invalidate_order_snapshots(order_ids):
+    """
+    Rend obsolètes les instantanés des commandes données, une fois la transaction
+    validée (sinon une lecture concurrente pourrait remettre en cache l'ancien état).
+    """
+    keys = [_version_key(order_id) for order_id in order_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def snapshot_response(request, kind, order_id, build):
+    """
+    Réponse JSON de l'instantané `kind` de la commande, construit par build() au premier appel.
+    Si le client renvoie l'ETag courant (If-None-Match), répond 304 sans lire la commande.
+    """
+    version = get_snapshot_version(order_id)
+    etag = f'"{kind}-{order_id}-{version}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        key = f"order_snapshot:{kind}:{order_id}:{version}"
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, ORDER_SNAPSHOT_TTL)
+        response = JsonResponse(data)
+
+    response['ETag'] = etag
+    # Le navigateur doit revalider à chaque ouverture (réponse privée, propre à l'utilisateur)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,59 @@
+# orders/tasks.py
+from django.core.mail import get_connection
+from django.utils import timezone
+
+from jobs.queue import register
+from .emails import build_order_confirmation_email
+from .exports import BUILD_EXPORT, build_export
+from .models import ExportJob, Order
+
+SEND_CONFIRMATION_EMAIL = 'orders.send_confirmation_email'
+
+
+@register(SEND_CONFIRMATION_EMAIL, batch_size=50)
+def send_confirmation_emails(jobs):
+    """Envoie un lot d'e-mails de confirmation sur une seule connexion SMTP"""
+    order_ids = [job.payload.get('order_id') for job in jobs]
+    orders = Order.objects.select_related('customer').prefetch_related('items').in_bulk(order_ids)
+
+    errors = {}
+    sent = []
+    with get_connection() as connection:
+        for job in jobs:
+            order = orders.get(job.payload.get('order_id'))
+            if order is None:
+                errors[job.id] = f"Commande {job.payload.get('order_id')} introuvable"
+                continue
+            if order.email_sent:
+                # Déjà envoyé (tâche rejouée) : rien à faire
+                continue
+            try:
+                build_order_confirmation_email(order, connection=connection).send()
+                sent.append(order.id)
+            except Exception as e:
+                errors[job.id] = e
+
+    Order.objects.filter(id__in=sent).update(email_sent=True)
+    return errors
+
+
+@register(BUILD_EXPORT)
+def build_exports(jobs):
+    """Génère les fichiers d'export demandés depuis le tableau de bord"""
+    errors = {}
+    for job in jobs:
+        export_job = ExportJob.objects.filter(id=job.payload.get('export_job_id')).first()
+        if export_job is None or export_job.status == 'done':
+            continue
+
+        ExportJob.objects.filter(id=export_job.id).update(status='running')
+        try:
+            build_export(export_job)
+        except Exception as e:
+            errors[job.id] = e
+            # Dernier essai : l'échec est affiché au staff
+            status = 'failed' if job.attempts >= job.max_attempts else 'pending'
+            ExportJob.objects.filter(id=export_job.id).update(
+                status=status, error=str(e), finished_at=timezone.now() if status == 'failed' else None
+            )
+    return errors
@@ -1,3 +1,383 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Category, Product
+from . import idempotency, search
+from .checkout import CheckoutError, InsufficientStockError, place_order
+from .counters import count_orders_by_status, read_order_counters, rebuild_customer_stats
+from .models import IdempotencyKey, Order, OrderItem
+from .pagination import paginate_keyset, paginate_ranked
+
+
+def make_user(email, is_staff=False, first_name='Awa', last_name='Diop'):
+    return User.objects.create_user(
+        email=email, password='secret', first_name=first_name, last_name=last_name, is_staff=is_staff
+    )
+
+
+def make_product(name, stock=5, price='10.00'):
+    category = Category.objects.get_or_create(name='Bijoux', defaults={'icon': 'fas fa-gem'})[0]
+    return Product.objects.create(category=category, name=name, price=Decimal(price), stock=stock, sku=name)
+
+
+def make_order(customer, order_number, total='10.00', **fields):
+    fields.setdefault('payment_method', 'card')
+    fields.setdefault('shipping_address_text', '1 rue de la Paix, 75002 Paris, France')
+    return Order.objects.create(
+        customer=customer, order_number=order_number, subtotal=Decimal(total), total_amount=Decimal(total),
+        billing_address_text='1 rue de la Paix', **fields
+    )
+
+
+def cart_line(product, quantity, price='0.01'):
+    return {'product_id': product.id, 'name': product.name, 'sku': '', 'quantity': quantity,
+            'price': Decimal(price), 'options': None}
+
+
+class CheckoutTests(TestCase):
+    """Création de la commande, de ses articles et décrément du stock en une transaction"""
+
+    def setUp(self):
+        self.customer = make_user('client@example.com')
+        self.ring = make_product('Bague', stock=5, price='20.00')
+        self.necklace = make_product('Collier', stock=1, price='35.00')
+
+    def place(self, lines, order_number='CMD-1'):
+        return place_order(
+            lines, customer=self.customer, order_number=order_number, payment_method='card',
+            shipping_address_text='1 rue A, 75001 Paris, France', billing_address_text='1 rue A'
+        )
+
+    def test_order_uses_server_prices_and_decrements_stock(self):
+        order = self.place([cart_line(self.ring, 2), cart_line(self.necklace, 1)])
+
+        self.assertEqual(order.subtotal, Decimal('75.00'))
+        self.assertEqual(order.total_amount, order.subtotal + order.tax_amount + order.shipping_cost)
+        item = order.items.get(product=self.ring)
+        self.assertEqual((item.unit_price, item.total_price), (Decimal('20.00'), Decimal('40.00')))
+        self.assertEqual(item.category_name, 'Bijoux')
+        self.ring.refresh_from_db()
+        self.necklace.refresh_from_db()
+        self.assertEqual((self.ring.stock, self.necklace.stock), (3, 0))
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        with self.assertRaises(InsufficientStockError) as context:
+            self.place([cart_line(self.ring, 2), cart_line(self.necklace, 2)])
+
+        self.assertIn('Collier', context.exception.errors[0])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.ring.refresh_from_db()
+        self.assertEqual(self.ring.stock, 5)
+
+    def test_stock_sold_concurrently_rolls_back_order(self):
+        # Vente concurrente entre la lecture du stock et le décrément conditionnel
+        def sell_necklace(product_ids):
+            Product.objects.filter(id=self.necklace.id).update(stock=0)
+            return {}
+
+        with mock.patch('orders.checkout.first_product_images', side_effect=sell_necklace):
+            with self.assertRaises(InsufficientStockError):
+                self.place([cart_line(self.ring, 1), cart_line(self.necklace, 1)])
+
+        self.assertFalse(Order.objects.exists())
+        self.ring.refresh_from_db()
+        self.assertEqual(self.ring.stock, 5)
+
+    def test_same_product_on_several_lines_is_checked_as_a_whole(self):
+        with self.assertRaises(InsufficientStockError):
+            self.place([cart_line(self.ring, 3), cart_line(self.ring, 3)])
+
+    def test_unknown_products_are_rejected(self):
+        line = dict(cart_line(self.ring, 1), product_id=self.necklace.id + 1000)
+        with self.assertRaises(CheckoutError):
+            self.place([line])
+        self.assertFalse(Order.objects.exists())
+
+
+class IdempotencyTests(TestCase):
+    """Clés d'idempotence du paiement et de l'API de création de commande"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('staff@example.com', is_staff=True)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def post_order(self, key, order_number='API-1'):
+        return self.api.post('/orders/orders/', {
+            'order_number': order_number, 'customer_id': self.user.id, 'subtotal': '10.00',
+            'total_amount': '12.00', 'payment_method': 'card',
+            'shipping_address_text': '1 rue A, 75001 Paris, France', 'billing_address_text': '1 rue A',
+        }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_cached_and_stored_results_have_the_same_shape(self):
+        order = make_order(self.user, 'CMD-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            idempotency.remember(
+                self.user, idempotency.CHECKOUT_SCOPE, 'key-1', order=order, response_status=201,
+                response_body={'total': Decimal('12.50'), 'at': timezone.now()}
+            )
+
+        from_cache = idempotency.lookup(self.user, idempotency.CHECKOUT_SCOPE, 'key-1')
+        cache.clear()
+        from_db = idempotency.lookup(self.user, idempotency.CHECKOUT_SCOPE, 'key-1')
+
+        self.assertEqual(from_cache, from_db)
+        self.assertEqual(from_db['order_number'], 'CMD-1')
+        self.assertEqual(from_db['response_body']['total'], '12.50')
+
+    def test_duplicate_key_conflicts(self):
+        idempotency.remember(self.user, idempotency.CHECKOUT_SCOPE, 'key-1')
+        with self.assertRaises(idempotency.IdempotencyConflict):
+            idempotency.remember(self.user, idempotency.CHECKOUT_SCOPE, 'key-1')
+
+        # Même clé, autre portée : pas de conflit
+        idempotency.remember(self.user, idempotency.API_ORDER_CREATE_SCOPE, 'key-1')
+
+    def test_expired_key_can_be_reused_and_is_purged(self):
+        idempotency.remember(self.user, idempotency.CHECKOUT_SCOPE, 'old')
+        idempotency.remember(self.user, idempotency.CHECKOUT_SCOPE, 'other')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertIsNone(idempotency.lookup(self.user, idempotency.CHECKOUT_SCOPE, 'old'))
+        idempotency.remember(self.user, idempotency.CHECKOUT_SCOPE, 'old')
+        self.assertEqual(idempotency.purge_expired(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().key, 'old')
+
+    def test_api_retry_replays_first_response(self):
+        first = self.post_order('retry-1')
+        second = self.post_order('retry-1', order_number='API-2')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['order_number'], 'API-1')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_api_concurrent_request_in_progress_returns_conflict(self):
+        # La requête concurrente a pris la clé mais n'est pas encore validée : rien à rejouer
+        with mock.patch.object(idempotency, 'remember', side_effect=idempotency.IdempotencyConflict('k')), \
+                mock.patch.object(idempotency, 'lookup', return_value=None):
+            response = self.post_order('busy')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data, {'error': 'request in progress'})
+        self.assertFalse(Order.objects.exists())
+
+
+class KeysetPaginationTests(TestCase):
+    """Pagination par curseur de la liste des commandes"""
+
+    def setUp(self):
+        customer = make_user('client@example.com')
+        now = timezone.now()
+        self.orders = []
+        for index, total in enumerate(['30.00', '10.00', '50.00', '20.00', '40.00']):
+            order = make_order(customer, f'CMD-{index}', total=total)
+            self.orders.append(order)
+        # Deux commandes à la même date : départagées par l'id
+        dates = [now - timedelta(days=4), now - timedelta(days=3), now - timedelta(days=3),
+                 now - timedelta(days=1), now]
+        for order, created_at in zip(self.orders, dates):
+            Order.objects.filter(id=order.id).update(created_at=created_at)
+
+    def numbers(self, page):
+        return [order.order_number for order in page]
+
+    def test_walks_forward_and_back(self):
+        queryset = Order.objects.all()
+        first = paginate_keyset(queryset, '-created_at', None, 2)
+        self.assertEqual(self.numbers(first), ['CMD-4', 'CMD-3'])
+        self.assertFalse(first.has_previous())
+
+        second = paginate_keyset(queryset, '-created_at', first.next_cursor, 2)
+        self.assertEqual(self.numbers(second), ['CMD-2', 'CMD-1'])
+
+        last = paginate_keyset(queryset, '-created_at', second.next_cursor, 2)
+        self.assertEqual(self.numbers(last), ['CMD-0'])
+        self.assertFalse(last.has_next())
+
+        back = paginate_keyset(queryset, '-created_at', last.previous_cursor, 2)
+        self.assertEqual(self.numbers(back), ['CMD-2', 'CMD-1'])
+        self.assertEqual(self.numbers(paginate_keyset(queryset, '-created_at', back.previous_cursor, 2)),
+                         ['CMD-4', 'CMD-3'])
+
+    def test_ascending_amount_sort(self):
+        page = paginate_keyset(Order.objects.all(), 'total_amount', None, 3)
+        self.assertEqual(self.numbers(page), ['CMD-1', 'CMD-3', 'CMD-0'])
+        page = paginate_keyset(Order.objects.all(), 'total_amount', page.next_cursor, 3)
+        self.assertEqual(self.numbers(page), ['CMD-4', 'CMD-2'])
+
+    def test_invalid_cursor_or_sort_falls_back_to_first_page(self):
+        page = paginate_keyset(Order.objects.all(), 'unknown', 'not-a-cursor', 2)
+        self.assertEqual(self.numbers(page), ['CMD-4', 'CMD-3'])
+
+    def test_ranked_pages(self):
+        ranked = [order.id for order in reversed(self.orders)]
+        page = paginate_ranked(Order.objects.all(), ranked, None, 2)
+        self.assertEqual(self.numbers(page), ['CMD-4', 'CMD-3'])
+        page = paginate_ranked(Order.objects.all(), ranked, page.next_cursor, 2)
+        self.assertEqual(self.numbers(page), ['CMD-2', 'CMD-1'])
+        self.assertEqual(page.previous_cursor, '0')
+
+
+class OrderSearchTests(TestCase):
+    """Recherche classée : FTS5 sous SQLite, trigrammes sinon"""
+
+    def setUp(self):
+        self.alice = make_user('alice@example.com', first_name='Alice', last_name='Martin')
+        self.bob = make_user('bob@example.com', first_name='Bob', last_name='Éloi')
+        self.lyon = make_order(self.alice, 'CMD-ALPHA', shipping_address_text='2 rue B, 69001 Lyon, France')
+        self.paris = make_order(self.bob, 'CMD-BRAVO')
+        self.paris.update_tracking('TRK-LYONNAIS')
+
+    def check_search(self):
+        self.assertIsNone(search.search_order_ids('ly'))
+        self.assertEqual(search.search_order_ids('cmd-alpha'), [self.lyon.id])
+        self.assertEqual(search.search_order_ids('eloi'), [self.paris.id])
+        # Numéro de suivi (poids 3) avant la ville (poids 1)
+        self.assertEqual(search.search_order_ids('lyon'), [self.paris.id, self.lyon.id])
+        self.assertEqual(search.search_order_ids('lyon', Order.objects.filter(customer=self.alice)), [self.lyon.id])
+        self.assertEqual(search.search_order_ids('alice martin'), [self.lyon.id])
+        self.assertEqual(search.search_order_ids('alice bravo'), [])
+
+    def test_fts_search(self):
+        if not search.use_fts():
+            self.skipTest("FTS5 indisponible")
+        self.check_search()
+
+    def test_trigram_search(self):
+        with mock.patch('orders.search.use_fts', return_value=False):
+            self.assertEqual(search.rebuild_index(), 2)
+            self.check_search()
+
+    def test_customer_rename_reindexes_orders(self):
+        self.alice.last_name = 'Durand'
+        self.alice.save(update_fields=['last_name'])
+        self.assertEqual(search.search_order_ids('durand'), [self.lyon.id])
+
+    def test_deleted_order_leaves_the_index(self):
+        order_id = self.lyon.id
+        self.lyon.delete()
+        self.assertNotIn(order_id, search.search_order_ids('lyon'))
+
+    def test_short_query_fallback(self):
+        self.assertEqual(list(search.filter_orders_by_text(Order.objects.all(), 'bob')), [self.paris])
+
+
+class OrderCounterTests(TestCase):
+    """Compteurs par statut et statistiques clients tenus à jour par deltas"""
+
+    def setUp(self):
+        self.staff = make_user('staff@example.com', is_staff=True)
+        self.customer = make_user('client@example.com')
+
+    def assertCountersInSync(self):
+        self.assertEqual(read_order_counters(), count_orders_by_status())
+
+    def assertStatsInSync(self):
+        self.customer.refresh_from_db()
+        stats = (self.customer.total_orders, self.customer.total_spent)
+        rebuild_customer_stats()
+        self.customer.refresh_from_db()
+        self.assertEqual(stats, (self.customer.total_orders, self.customer.total_spent))
+
+    def test_counters_follow_every_write_path(self):
+        first = make_order(self.customer, 'CMD-1', total='25.00', payment_status='completed')
+        second = make_order(self.customer, 'CMD-2', total='40.00')
+        self.assertCountersInSync()
+
+        first.update_status('shipped', user=self.staff)
+        self.assertCountersInSync()
+
+        second.payment_status = 'completed'
+        second.save()
+        self.assertCountersInSync()
+        self.assertStatsInSync()
+        self.assertEqual(self.customer.total_spent, Decimal('65.00'))
+
+        Order.objects.all().transition_status('cancelled', user=self.staff)
+        self.assertCountersInSync()
+        self.assertStatsInSync()
+        self.assertEqual((self.customer.total_orders, self.customer.total_spent), (0, Decimal('0')))
+
+        Order.objects.filter(id=first.id).transition_status('processing')
+        self.assertStatsInSync()
+        self.assertEqual((self.customer.total_orders, self.customer.total_spent), (1, Decimal('25.00')))
+
+        second.delete()
+        self.assertCountersInSync()
+        self.assertEqual(read_order_counters()['total'], 1)
+
+    def test_status_history_is_recorded(self):
+        order = make_order(self.customer, 'CMD-1')
+        order.update_status('processing', user=self.staff)
+        Order.objects.filter(id=order.id).transition_status('shipped', user=self.staff)
+
+        self.assertEqual(
+            list(order.status_events.order_by('id').values_list('from_status', 'to_status')),
+            [('pending', 'processing'), ('processing', 'shipped')]
+        )
+        self.assertEqual(order.notes.count(), 2)
+
+    def test_failed_stats_update_rolls_back_order(self):
+        with mock.patch('orders.models.apply_customer_stats', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                make_order(self.customer, 'CMD-1')
+
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(read_order_counters()['total'], 0)
+
+
+class OrderSnapshotTests(TestCase):
+    """ETag des détails de commande, invalidé à chaque modification de la commande"""
+
+    def setUp(self):
+        cache.clear()
+        self.staff = make_user('staff@example.com', is_staff=True)
+        self.customer = make_user('client@example.com')
+        self.order = make_order(self.customer, 'CMD-1')
+        self.client.force_login(self.staff)
+
+    def details(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(f'/orders/{self.order.id}/details/', **headers)
+
+    def test_unchanged_order_is_not_modified(self):
+        response = self.details()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        again = self.details(response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], response['ETag'])
+
+    def test_changes_invalidate_the_etag(self):
+        etag = self.details()['ETag']
+        changes = [
+            lambda: self.order.update_tracking('TRK-1'),
+            lambda: self.order.add_note(self.staff, 'Colis préparé'),
+            lambda: Order.objects.filter(id=self.order.id).transition_status('shipped'),
+        ]
+        for change in changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = self.details(etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_other_order_of_the_customer_keeps_the_etag(self):
+        etag = self.details()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_order(self.customer, 'CMD-2', payment_status='completed')
 
-# Create your tests here.
+        self.assertEqual(self.details(etag).status_code, 304)
@@ -22,7 +22,6 @@ urlpatterns = [
     path('<int:order_id>/details/', views.get_order_details, name='get_order_details'),
     path('change-status/', views.change_order_status, name='change_order_status'),
     path('change-payment-status/', views.change_payment_status, name='change_payment_status'),
-    # path('orders/<int:order_id>/details/', views.order_detail_json, name='order_detail_json'),
     path('<int:order_id>/update-tracking/', views.update_tracking_number, name='update_tracking_number'),
     path('<int:order_id>/add-note/', views.add_order_note, name='add_order_note'),
     path('batch-update/', views.batch_update_orders, name='batch_update_orders'),
@@ -33,6 +32,8 @@ urlpatterns = [
     path('export/xls/', views.export_orders_xls, name='export_orders_xls'),
     path('export/pdf/', views.export_orders_pdf, name='export_orders_pdf'),
     path('export/csv/', views.export_orders_csv, name='export_orders_csv'),
+    path('export/jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<int:job_id>/download/', views.download_export, name='download_export'),
     path('<int:order_id>/invoice/', views.generate_invoice, name='generate_invoice'),
     
     # Paiement et processus de commande
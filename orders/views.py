@@ -1,34 +1,33 @@
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
+from django.db import transaction
 from django.urls import reverse
-from django.core.paginator import Paginator
-from .models import Order, OrderItem, OrderNote
-from products.models import Product, ProductMedia
-import csv
-import xlsxwriter
-from io import BytesIO
+from .models import ExportJob, Order, OrderNote
+from .counters import get_order_counts
+from .pagination import DEFAULT_ORDER_SORT, ORDER_SORTS, paginate_keyset, paginate_ranked
+from .search import filter_orders_by_text, search_order_ids
+from .snapshots import snapshot_response
+from .checkout import CheckoutError, extract_cart_items, first_product_images, normalize_cart_lines, place_order
+from . import idempotency
+from .emails import build_order_confirmation_email
+from .exports import filter_orders_for_export, parse_export_filters, request_export, stream_orders_csv
+from .invoices import get_invoice_path
+from .tasks import SEND_CONFIRMATION_EMAIL
+from jobs.queue import enqueue
+from cart.carts import clear_cart, get_cart, get_cart_lines
 import json
 from datetime import datetime, timedelta
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 import uuid
-import traceback
-from decimal import Decimal
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 
 @login_required
 def admin_orders(request):
@@ -36,8 +35,10 @@ def admin_orders(request):
     status_filter = request.GET.get('status', '')
     payment_filter = request.GET.get('payment', '')
     date_filter = request.GET.get('date', '')
-    search_query = request.GET.get('search', '')
-    sort_by = request.GET.get('sort', '-created_at')
+    search_query = request.GET.get('q', request.GET.get('search', '')).strip()
+    sort_by = request.GET.get('sort', DEFAULT_ORDER_SORT)
+    if sort_by not in ORDER_SORTS:
+        sort_by = DEFAULT_ORDER_SORT
     
     # Construction de la requête de base avec select_related pour optimiser
     orders_query = Order.objects.select_related('customer').prefetch_related('items')
@@ -62,32 +63,22 @@ def admin_orders(request):
                 created_at__month=today.month
             )
     
-    if search_query:
-        orders_query = orders_query.filter(
-            order_number__icontains=search_query
-        ) | orders_query.filter(
-            customer__email__icontains=search_query
-        )
-    
-    # Tri
-    orders_query = orders_query.order_by(sort_by)
-    
-    # Pagination
-    paginator = Paginator(orders_query, 20)  # 20 commandes par page
-    page = request.GET.get('page', 1)
-    try:
-        orders = paginator.page(page)
-    except:
-        orders = paginator.page(1)
+    # Recherche classée via l'index parmi les commandes filtrées (sinon tri et pagination par curseur),
+    # 20 commandes par page
+    matching_ids = search_order_ids(search_query, orders_query) if search_query else None
+    if matching_ids is not None:
+        orders = paginate_ranked(orders_query, matching_ids, request.GET.get('cursor', ''), 20)
+    else:
+        if search_query:
+            # Recherche trop courte pour l'index
+            orders_query = filter_orders_by_text(orders_query, search_query)
+        orders = paginate_keyset(orders_query, sort_by, request.GET.get('cursor', ''), 20)
     
     # Statistiques pour le dashboard
-    stats = {
-        'pending': Order.objects.filter(status='pending').count(),
-        'processing': Order.objects.filter(status='processing').count(),
-        'shipped': Order.objects.filter(status='shipped').count(),
-        'delivered': Order.objects.filter(status='delivered').count(),
-        'cancelled': Order.objects.filter(status='cancelled').count(),
-    }
+    counts = get_order_counts()
+    stats = dict(counts['status'])
+    stats['payment'] = counts['payment_status']
+    stats['total'] = counts['total']
     
     # Options pour les sélecteurs
     order_status_choices = Order.STATUS_CHOICES
@@ -162,15 +153,17 @@ def admin_order_detail(request, order_id):
     items = order.items.all()
     notes = order.notes.all().order_by('-created_at')
     
-    # Historique des statuts à partir des notes
-    status_history = []
-    for note in notes:
-        if "Statut modifié" in note.note:
-            status_history.append({
-                'date': note.created_at,
-                'status': note.note.split("Statut modifié")[1].strip(),
-                'user': note.user
-            })
+    # Historique des statuts
+    status_history = [
+        {
+            'date': event.created_at,
+            'status': f"de {event.get_from_status_display()} à {event.get_to_status_display()}",
+            'from_status': event.from_status,
+            'to_status': event.to_status,
+            'user': event.user
+        }
+        for event in order.status_events.select_related('user').order_by('-created_at', '-id')
+    ]
     
     context = {
         'order': order,
@@ -208,90 +201,92 @@ def update_order_status(request, order_id):
     })
 
 
+def _order_details_data(request, order_id):
+    order = Order.objects.select_related('customer').prefetch_related('items', 'notes__user').get(id=order_id)
+    order_items = list(order.items.all())
+
+    # Première image de chaque produit, en une seule requête
+    images = first_product_images({item.product_id for item in order_items if item.product_id})
+
+    # Récupérer les articles avec leurs images
+    items = []
+    for item in order_items:
+        product_image = images.get(item.product_id)
+        items.append({
+            'id': item.id,
+            'product_id': item.product_id,
+            'product_name': item.product_name,
+            'product_sku': item.product_sku,
+            'quantity': item.quantity,
+            'unit_price': float(item.unit_price),
+            'total_price': float(item.total_price),
+            'options': item.options,
+            'product_image': request.build_absolute_uri(product_image) if product_image else None,
+            # or request.build_absolute_uri(static('images/default-product.png'))
+        })
+
+    # Récupérer les notes
+    notes = []
+    for note in sorted(order.notes.all(), key=lambda note: note.created_at, reverse=True):
+        notes.append({
+            'id': note.id,
+            'note': note.note,
+            'created_at': note.created_at.strftime('%d %b %Y %H:%M'),
+            'user': note.user.get_full_name() if note.user else 'Système',
+            'attachment': request.build_absolute_uri(note.attachment.url) if note.attachment else None
+        })
+
+    # Préparer les données de la commande
+    order_data = {
+        'id': order.id,
+        'order_number': order.order_number,
+        'customer': {
+            'id': order.customer.id,
+            'name': order.customer.get_full_name() or order.customer.username,
+            'email': order.customer.email,
+            'date_joined': order.customer.date_joined.strftime('%b %Y'),
+        },
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'created_at': order.created_at.strftime('%d %b %Y %H:%M'),
+        'updated_at': order.updated_at.strftime('%d %b %Y %H:%M'),
+        'payment_method': order.payment_method,
+        'payment_method_display': order.get_payment_method_display(),
+        'payment_status': order.payment_status,
+        'payment_status_display': order.get_payment_status_display(),
+        'shipping_address': order.shipping_address_text,
+        'billing_address': order.billing_address_text,
+        'subtotal': float(order.subtotal),
+        'discount_amount': float(order.discount_amount),
+        'shipping_cost': float(order.shipping_cost),
+        'tax_amount': float(order.tax_amount),
+        'total_amount': float(order.total_amount),
+        'tracking_number': order.tracking_number or 'Non disponible',
+        'estimated_delivery_date': order.estimated_delivery_date.strftime('%d %b %Y') if order.estimated_delivery_date else 'Non disponible',
+        'items': items,
+        'notes': notes,
+        'status_events': [
+            {'status': to_status, 'created_at': created_at.isoformat()}
+            for to_status, created_at in order.status_events.values_list('to_status', 'created_at')
+        ],
+        'invoice_url': reverse('generate_invoice', args=[order.id])
+    }
+    return {'success': True, 'order': order_data}
+
+
 @login_required
 @require_http_methods(["GET"])
 def get_order_details(request, order_id):
     if not request.user.is_staff:
         return JsonResponse({'success': False, 'error': 'Permission refusée'}, status=403)
-    
+
     try:
-        order = Order.objects.select_related('customer').prefetch_related(
-            'items', 'items__product', 'items__product__media'
-        ).get(id=order_id)
-        
-        # Récupérer les articles avec leurs images
-        items = []
-        for item in order.items.all():
-            # Récupérer la première image du produit
-            product_image = None
-            if item.product:
-                media = item.product.media.filter(media_type='image').first()
-                if media:
-                    product_image = request.build_absolute_uri(media.file.url)
-                elif hasattr(item.product, 'image') and item.product.image:
-                    product_image = request.build_absolute_uri(item.product.image.url)
-            
-            items.append({
-                'id': item.id,
-                'product_id': item.product.id if item.product else None,
-                'product_name': item.product_name,
-                'product_sku': item.product_sku,
-                'quantity': item.quantity,
-                'unit_price': float(item.unit_price),
-                'total_price': float(item.total_price),
-                'options': item.options,
-                'product_image': product_image,
-                # or request.build_absolute_uri(static('images/default-product.png'))
-            })
-
-        # Récupérer les notes
-        notes = []
-        for note in order.notes.all().order_by('-created_at'):
-            notes.append({
-                'id': note.id,
-                'note': note.note,
-                'created_at': note.created_at.strftime('%d %b %Y %H:%M'),
-                'user': note.user.get_full_name() if note.user else 'Système',
-                'attachment': request.build_absolute_uri(note.attachment.url) if note.attachment else None
-            })
-        
-        # Préparer les données de la commande
-        order_data = {
-            'id': order.id,
-            'order_number': order.order_number,
-            'customer': {
-                'id': order.customer.id,
-                'name': order.customer.get_full_name() or order.customer.username,
-                'email': order.customer.email,
-                'date_joined': order.customer.date_joined.strftime('%b %Y'),
-                'orders_count': order.customer.orders.count()
-            },
-            'status': order.status,
-            'status_display': order.get_status_display(),
-            'created_at': order.created_at.strftime('%d %b %Y %H:%M'),
-            'updated_at': order.updated_at.strftime('%d %b %Y %H:%M'),
-            'payment_method': order.payment_method,
-            'payment_method_display': order.get_payment_method_display(),
-            'payment_status': order.payment_status,
-            'payment_status_display': order.get_payment_status_display(),
-            'shipping_address': order.shipping_address_text,
-            'billing_address': order.billing_address_text,
-            'subtotal': float(order.subtotal),
-            'shipping_cost': float(order.shipping_cost),
-            'tax_amount': float(order.tax_amount),
-            'total_amount': float(order.total_amount),
-            'tracking_number': order.tracking_number or 'Non disponible',
-            'estimated_delivery_date': order.estimated_delivery_date.strftime('%d %b %Y') if order.estimated_delivery_date else 'Non disponible',
-            'items': items,
-            'notes': notes,
-            'invoice_url': reverse('generate_invoice', args=[order.id])
-        }
-        
-        return JsonResponse({'success': True, 'order': order_data})
+        # Instantané mis en cache jusqu'à la prochaine modification de la commande (ETag / 304)
+        return snapshot_response(request, 'details', order_id, lambda: _order_details_data(request, order_id))
     except Order.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Commande non trouvée'}, status=404)
     except Exception as e:
-        print(f"Erreur lors de la récupération des détails de la commande {order_id}: {str(e)}")
+        logger.exception("Erreur lors de la récupération des détails de la commande %s", order_id)
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
@@ -384,18 +379,14 @@ def batch_update_orders(request):
     if new_status not in dict(Order.STATUS_CHOICES):
         return JsonResponse({'success': False, 'error': 'Statut invalide'}, status=400)
     
-    # Mettre à jour les commandes
-    updated_count = 0
-    for order_id in order_ids:
-        try:
-            order = Order.objects.get(id=order_id)
-            if order.update_status(new_status, request.user, 
-                                   f"{note_text} (Mise à jour groupée: statut = {order.get_status_display()})" if note_text else None):
-                updated_count += 1
-        except Order.DoesNotExist:
-            continue
-        except Exception as e:
-            print(f"Erreur lors de la mise à jour de la commande {order_id}: {e}")
+    try:
+        order_ids = [int(order_id) for order_id in order_ids]
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Identifiants de commande invalides'}, status=400)
+
+    # Mettre à jour les commandes en une seule requête
+    note = f"{note_text} (Mise à jour groupée: statut = {dict(Order.STATUS_CHOICES)[new_status]})" if note_text else None
+    updated_count = Order.objects.filter(id__in=order_ids).transition_status(new_status, request.user, note)
     
     return JsonResponse({
         'success': True,
@@ -404,256 +395,77 @@ def batch_update_orders(request):
     })
 
 
+def _export_job_data(export_job):
+    return {
+        'success': True,
+        'job_id': export_job.id,
+        'status': export_job.status,
+        'status_display': export_job.get_status_display(),
+        'row_count': export_job.row_count,
+        'error': export_job.error,
+        'status_url': reverse('export_job_status', args=[export_job.id]),
+        'download_url': reverse('download_export', args=[export_job.id]) if export_job.status == 'done' else None,
+    }
+
+
+def _start_export(request, export_format):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission refusée'}, status=403)
+
+    # L'export est généré par le worker ; un export identique du jour est réutilisé
+    filters = parse_export_filters(request.POST if request.method == 'POST' else request.GET)
+    export_job = request_export(export_format, filters, request.user)
+
+    # Anciens liens GET : téléchargement direct si l'export est déjà prêt
+    if request.method == 'GET' and export_job.status == 'done':
+        return redirect('download_export', job_id=export_job.id)
+    return JsonResponse(_export_job_data(export_job), status=202)
+
+
 @login_required
+@require_http_methods(["GET", "POST"])
 def export_orders_xls(request):
-    # Filtres optionnels
-    status_filter = request.GET.get('status', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    
-    # Construire la requête de base
-    orders_query = Order.objects.all()
-    
-    # Appliquer les filtres s'ils sont fournis
-    if status_filter and status_filter in dict(Order.STATUS_CHOICES):
-        orders_query = orders_query.filter(status=status_filter)
-    
-    if date_from:
-        try:
-            date_from = datetime.strptime(date_from, '%Y-%m-%d')
-            orders_query = orders_query.filter(created_at__gte=date_from)
-        except ValueError:
-            pass
-    
-    if date_to:
-        try:
-            date_to = datetime.strptime(date_to, '%Y-%m-%d')
-            # Ajouter un jour pour inclure les commandes de cette journée
-            date_to = date_to + timedelta(days=1)
-            orders_query = orders_query.filter(created_at__lt=date_to)
-        except ValueError:
-            pass
-    
-    # Récupérer les commandes filtrées et triées
-    orders = orders_query.order_by('-created_at')
-    
-    # Créer un nouveau workbook en mémoire
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-    worksheet = workbook.add_worksheet("Commandes")
-
-    # Styles pour l'en-tête
-    header_format = workbook.add_format({
-        'bold': True,
-        'bg_color': '#F8F9FA',
-        'border': 1,
-        'align': 'center'
-    })
-    
-    # Format pour les dates
-    date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
-    
-    # Format pour les montants
-    money_format = workbook.add_format({'num_format': '# ##0.00 F CFA'})
-
-    # En-têtes
-    headers = ['ID', 'N° Commande', 'Client', 'Email', 'Date', 'Total', 'Statut', 'Paiement', 'Méthode']
-    for col, header in enumerate(headers):
-        worksheet.write(0, col, header, header_format)
-
-    # Données
-    for row, order in enumerate(orders, start=1):
-        worksheet.write(row, 0, order.id)
-        worksheet.write(row, 1, order.order_number)
-        worksheet.write(row, 2, order.customer.get_full_name() or order.customer.username)
-        worksheet.write(row, 3, order.customer.email)
-        worksheet.write_datetime(row, 4, order.created_at.replace(tzinfo=None), date_format)
-        worksheet.write_number(row, 5, float(order.total_amount), money_format)
-        worksheet.write(row, 6, order.get_status_display())
-        worksheet.write(row, 7, order.get_payment_status_display())
-        worksheet.write(row, 8, order.get_payment_method_display())
-
-    # Ajuster la largeur des colonnes
-    for i, header in enumerate(headers):
-        worksheet.set_column(i, i, max(len(header) + 2, 12))
-
-    workbook.close()
-    output.seek(0)
-
-    # Configuration de la réponse HTTP
-    filename = f'commandes_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return _start_export(request, 'xlsx')
 
 
 @login_required
+@require_http_methods(["GET", "POST"])
 def export_orders_pdf(request):
-    # Filtres similaires à ceux de la fonction XLS
-    status_filter = request.GET.get('status', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    
-    # Filtrer les commandes
-    orders_query = Order.objects.all()
-    
-    if status_filter and status_filter in dict(Order.STATUS_CHOICES):
-        orders_query = orders_query.filter(status=status_filter)
-    
-    if date_from:
-        try:
-            date_from = datetime.strptime(date_from, '%Y-%m-%d')
-            orders_query = orders_query.filter(created_at__gte=date_from)
-        except ValueError:
-            pass
-    
-    if date_to:
-        try:
-            date_to = datetime.strptime(date_to, '%Y-%m-%d')
-            date_to = date_to + timedelta(days=1)
-            orders_query = orders_query.filter(created_at__lt=date_to)
-        except ValueError:
-            pass
-    
-    orders = orders_query.order_by('-created_at')
-    
-    # Créer un PDF en mémoire
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, title="Liste des commandes")
-    elements = []
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = styles["Heading1"]
-    subtitle_style = styles["Heading2"]
-    normal_style = styles["Normal"]
-    
-    # Ajouter un titre
-    elements.append(Paragraph("Liste des Commandes", title_style))
-    elements.append(Spacer(1, 12))
-    
-    # Ajouter la date d'exportation
-    current_date = datetime.now().strftime("%d/%m/%Y %H:%M")
-    elements.append(Paragraph(f"Exporté le: {current_date}", normal_style))
-    elements.append(Spacer(1, 12))
-    
-    # Ajouter des informations sur les filtres appliqués si présents
-    filter_info = []
-    if status_filter:
-        status_display = dict(Order.STATUS_CHOICES).get(status_filter, status_filter)
-        filter_info.append(f"Statut: {status_display}")
-    if date_from:
-        filter_info.append(f"Du: {date_from.strftime('%d/%m/%Y')}")
-    if date_to:
-        original_date_to = date_to - timedelta(days=1)
-        filter_info.append(f"Au: {original_date_to.strftime('%d/%m/%Y')}")
-    
-    if filter_info:
-        elements.append(Paragraph("Filtres appliqués: " + ", ".join(filter_info), normal_style))
-        elements.append(Spacer(1, 12))
-    
-    # Ajouter le nombre de commandes
-    elements.append(Paragraph(f"Nombre de commandes: {orders.count()}", normal_style))
-    elements.append(Spacer(1, 20))
+    return _start_export(request, 'pdf')
 
-    # En-têtes du tableau
-    data = [['N° Commande', 'Client', 'Date', 'Total', 'Statut', 'Paiement']]
-    
-    # Données
-    for order in orders:
-        data.append([
-            order.order_number,
-            order.customer.get_full_name() or order.customer.username,
-            order.created_at.strftime('%d/%m/%Y'),
-            f"{order.total_amount} F CFA",
-            order.get_status_display(),
-            order.get_payment_status_display()
-        ])
-
-    # Créer le tableau
-    table = Table(data, repeatRows=1)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Aligner la colonne Total à droite
-    ]))
-    
-    elements.append(table)
-    
-    # Compilation du document
-    doc.build(elements)
 
-    # Configuration de la réponse HTTP
-    buffer.seek(0)
-    filename = f'commandes_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+@login_required
+def export_job_status(request, job_id):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission refusée'}, status=403)
+
+    export_job = get_object_or_404(ExportJob, id=job_id)
+    return JsonResponse(_export_job_data(export_job))
+
+
+@login_required
+def download_export(request, job_id):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Permission refusée'}, status=403)
+
+    export_job = get_object_or_404(ExportJob, id=job_id, status='done')
+    if not os.path.exists(export_job.file_path):
+        return JsonResponse({'success': False, 'error': 'Fichier introuvable'}, status=404)
+
+    return FileResponse(open(export_job.file_path, 'rb'), as_attachment=True, filename=export_job.filename)
 
 
 @login_required
 def export_orders_csv(request):
     # Filtres
-    status_filter = request.GET.get('status', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    
-    # Filtrer les commandes
-    orders_query = Order.objects.all()
-    
-    if status_filter and status_filter in dict(Order.STATUS_CHOICES):
-        orders_query = orders_query.filter(status=status_filter)
-    
-    if date_from:
-        try:
-            date_from = datetime.strptime(date_from, '%Y-%m-%d')
-            orders_query = orders_query.filter(created_at__gte=date_from)
-        except ValueError:
-            pass
-    
-    if date_to:
-        try:
-            date_to = datetime.strptime(date_to, '%Y-%m-%d')
-            date_to = date_to + timedelta(days=1)
-            orders_query = orders_query.filter(created_at__lt=date_to)
-        except ValueError:
-            pass
+    filters = parse_export_filters(request.GET)
+    orders = filter_orders_for_export(filters)
     
-    orders = orders_query.order_by('-created_at')
-    
-    # Configuration de la réponse
-    response = HttpResponse(content_type='text/csv')
+    # Réponse envoyée au fil de l'eau, sans construire le fichier en mémoire
+    response = StreamingHttpResponse(stream_orders_csv(orders), content_type='text/csv')
     filename = f'commandes_{datetime.now().strftime("%Y%m%d_%H%M")}.csv'
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     
-    # Configuration du CSV
-    writer = csv.writer(response, delimiter=';')  # Utiliser ; pour meilleure compatibilité avec Excel
-    writer.writerow(['ID', 'Numéro de commande', 'Client', 'Email', 'Date', 'Total', 'Statut', 'Paiement', 'Méthode de paiement'])
-    
-    for order in orders:
-        writer.writerow([
-            order.id,
-            order.order_number,
-            order.customer.get_full_name() or order.customer.username,
-            order.customer.email,
-            order.created_at.strftime('%d/%m/%Y %H:%M'),
-            str(order.total_amount).replace('.', ','),  # Format français
-            order.get_status_display(),
-            order.get_payment_status_display(),
-            order.get_payment_method_display()
-        ])
-    
     return response
 
 
@@ -662,7 +474,9 @@ def payment_page(request):
     # Préparez les adresses de l'utilisateur pour pré-remplir le formulaire
     context = {
         'user_addresses': request.user.addresses.all(),
-        'default_address': request.user.addresses.filter(is_default=True).first()
+        'default_address': request.user.addresses.filter(is_default=True).first(),
+        # Clé unique par affichage du formulaire pour absorber les doubles soumissions
+        'idempotency_key': uuid.uuid4().hex
     }
     # Désactivation du cache pour les ressources statiques
     response = render(request, 'website/payment.html', context)
@@ -677,25 +491,29 @@ def payment_page(request):
 @require_http_methods(["POST"])
 def process_payment(request):
     try:
-        # Log complet des données POST pour le débogage
-        print("Données POST reçues:", request.POST)
-        
         # Récupération de la méthode de paiement
         payment_method = request.POST.get('payment_method')
         if not payment_method:
             messages.error(request, "Veuillez sélectionner une méthode de paiement.")
             return redirect('payment')
         
+        # Double soumission ou nouvel essai : renvoyer le résultat de la première tentative
+        idempotency_key = request.POST.get('idempotency_key', '').strip()[:64]
+        previous = idempotency.lookup(request.user, idempotency.CHECKOUT_SCOPE, idempotency_key)
+        if previous:
+            response = redirect(reverse('payment_confirmation', args=[previous['order_number']]))
+            response.set_cookie('clear_cart', 'true')
+            return response
+
         # Récupération des articles du panier
-        cart_items_data = request.POST.getlist('cart_items[]')
-        print(f"Nombre d'articles reçus: {len(cart_items_data)}")
-        
-        # Déboguer le contenu du panier
-        for i, item in enumerate(cart_items_data):
-            print(f"Article {i}: {item}")
+        # Panier serveur ; à défaut, panier envoyé par le formulaire (ancien format localStorage)
+        cart = get_cart(request)
+        cart_lines = get_cart_lines(cart)[0]
+        if not cart_lines:
+            cart_lines = normalize_cart_lines(extract_cart_items(request.POST))
         
         # Vérifier que le panier n'est pas vide
-        if not cart_items_data:
+        if not cart_lines:
             messages.error(request, "Votre panier est vide.")
             return redirect('payment')
 
@@ -718,155 +536,53 @@ def process_payment(request):
             messages.error(request, "Veuillez remplir tous les champs obligatoires de l'adresse.")
             return redirect('payment')
 
-        # Calcul direct des montants depuis les champs cachés du formulaire
-        subtotal = Decimal(request.POST.get('subtotal', '0.00'))
-        tax_amount = Decimal(request.POST.get('tax_amount', '0.00'))
-        shipping_cost = Decimal(request.POST.get('shipping_cost', '0.00'))
-        total_amount = Decimal(request.POST.get('total_amount', '0.00'))
-
         # Déterminer le statut de paiement initial
         initial_payment_status = 'pending' if payment_method == 'delivery' else 'completed'
 
-        # Création de la commande
-        order = Order.objects.create(
-            order_number=order_number,
-            customer=request.user,
-            status='pending',
-            payment_method=payment_method,
-            payment_status=initial_payment_status,
-            shipping_address_text=f"{shipping_address['street']} {shipping_address['apartment']}, {shipping_address['postal_code']} {shipping_address['city']}, {shipping_address['country']}",
-            billing_address_text=f"{shipping_address['street']} {shipping_address['apartment']}, {shipping_address['postal_code']} {shipping_address['city']}, {shipping_address['country']}",
-            subtotal=subtotal,
-            shipping_cost=shipping_cost,
-            tax_amount=tax_amount,
-            total_amount=total_amount,
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT'),
-            estimated_delivery_date=timezone.now().date() + timezone.timedelta(days=5)
-        )
+        # Détails de contact en cas de paiement à la livraison
+        payment_details = None
+        if payment_method == 'delivery':
+            phone = request.POST.get('phone')
+            email = request.POST.get('email')
+            if phone and email:  # Vérification des champs obligatoires
+                payment_details = {'delivery_phone': phone, 'delivery_email': email}
 
-        # Liste pour stocker les éventuelles erreurs de stock
-        stock_errors = []
-        
-        # Vérifiez si le panier est vide
-        if not cart_items_data:
-            print("ATTENTION: Aucun article trouvé dans le panier!")
-            # Créez un élément factice pour debug
-            OrderItem.objects.create(
-                order=order,
-                product_name="Test produit (debug)",
-                quantity=1,
-                unit_price=Decimal('10.00'),
-                total_price=Decimal('10.00')
-            )
-        else:
-            # Création des éléments de commande et mise à jour du stock
-            created_items = 0
-            
-            for item_json in cart_items_data:
-                try:
-                    print(f"Traitement de l'article: {item_json}")
-                    data = json.loads(item_json)
-                    product_id = data.get('id')
-                    
-                    # Forcer la conversion en string puis en int si possible
-                    if product_id:
-                        try:
-                            product_id = int(str(product_id).strip())
-                        except (ValueError, TypeError):
-                            product_id = 0
-                    else:
-                        product_id = 0
-                        
-                    quantity = int(data.get('quantity', 1))
-                    price = Decimal(str(data.get('price', '0.00')))
-                    product_name = data.get('name', 'Produit inconnu')
-                    
-                    print(f"Données extraites: ID={product_id}, Name={product_name}, Qty={quantity}, Price={price}")
-                    
-                    # Récupérer le produit 
-                    if product_id > 0:
-                        try:
-                            product = Product.objects.get(id=product_id)
-                            
-                            # Récupérer l'image du produit
-                            product_image = None
-                            product_media = ProductMedia.objects.filter(product=product, media_type='image').first()
-                            if product_media:
-                                product_image = product_media.file.url
-                                
-                            item = OrderItem.objects.create(
-                                order=order,
-                                product=product,
-                                product_name=product.name,
-                                product_sku=product.sku if hasattr(product, 'sku') else '',
-                                quantity=quantity,
-                                unit_price=product.price,
-                                total_price=product.price * quantity,
-                                options=data.get('options'),
-                                product_image=product_image  # Ajoutez l'URL de l'image
-                            )
-                            created_items += 1
-                            print(f"Élément de commande créé avec succès: {item}")
-                            
-                            # Mettre à jour le stock
-                            product.stock -= quantity
-                            product.save()
-                        except Product.DoesNotExist:
-                            # Produit non trouvé
-                            item = OrderItem.objects.create(
-                                order=order,
-                                product_name=product_name,
-                                product_sku=data.get('sku', ''),
-                                quantity=quantity,
-                                unit_price=price,
-                                total_price=price * quantity,
-                                options=data.get('options')
-                            )
-                            created_items += 1
-                            print(f"Élément de commande créé sans référence produit: {item}")
-                    else:
-                        # Pour les articles sans ID produit valide
-                        item = OrderItem.objects.create(
-                            order=order,
-                            product_name=product_name,
-                            product_sku=data.get('sku', ''),
-                            quantity=quantity,
-                            unit_price=price,
-                            total_price=price * quantity,
-                            options=data.get('options')
-                        )
-                        created_items += 1
-                        print(f"Élément de commande créé (ID invalide): {item}")
-                        
-                except json.JSONDecodeError as e:
-                    print(f"Erreur de décodage JSON: {e}")
-                    print(f"Données brutes: {item_json}")
-                    
-                except Exception as e:
-                    print(f"Erreur pour un article: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
-            
-            print(f"Total d'articles créés: {created_items}")
-            
-            # Si aucun article n'a été créé, essayez une approche différente
-            if created_items == 0:
-                print("Aucun article créé, tentative de récupération du panier depuis localStorage")
-                # Créer au moins un article pour éviter une commande vide
-                OrderItem.objects.create(
-                    order=order,
-                    product_name="Article non identifiable",
-                    quantity=1,
-                    unit_price=Decimal('1.00'),
-                    total_price=Decimal('1.00')
-                )
+        address_text = f"{shipping_address['street']} {shipping_address['apartment']}, {shipping_address['postal_code']} {shipping_address['city']}, {shipping_address['country']}"
 
-        # Si des erreurs de stock ont été détectées, annuler la commande
-        if stock_errors:
-            order.delete()
-            for error in stock_errors:
+        # Création de la commande, des articles et mise à jour du stock en une transaction
+        try:
+            with transaction.atomic():
+                order = place_order(
+                    cart_lines,
+                    coupon_code=cart.coupon_code if cart else None,
+                    order_number=order_number,
+                    customer=request.user,
+                    status='pending',
+                    payment_method=payment_method,
+                    payment_status=initial_payment_status,
+                    payment_details=payment_details,
+                    shipping_address_text=address_text,
+                    billing_address_text=address_text,
+                    ip_address=request.META.get('REMOTE_ADDR'),
+                    user_agent=request.META.get('HTTP_USER_AGENT'),
+                    estimated_delivery_date=timezone.now().date() + timezone.timedelta(days=5)
+                )
+                if idempotency_key:
+                    idempotency.remember(request.user, idempotency.CHECKOUT_SCOPE, idempotency_key, order=order)
+                clear_cart(cart)
+        except idempotency.IdempotencyConflict:
+            # Une requête concurrente avec la même clé a déjà créé la commande
+            previous = idempotency.lookup(request.user, idempotency.CHECKOUT_SCOPE, idempotency_key)
+            if previous is None or previous['order_number'] is None:
+                # Pas encore validée (ou clé expirée entre-temps) : ne pas repasser la commande
+                messages.warning(request, 'Votre commande est en cours de traitement, merci de patienter avant de réessayer.')
+                return redirect('payment')
+            response = redirect(reverse('payment_confirmation', args=[previous['order_number']]))
+            response.set_cookie('clear_cart', 'true')
+            return response
+        except CheckoutError as e:
+            # Rupture de stock ou panier sans article valide : la commande entière est rejetée
+            for error in e.errors:
                 messages.error(request, error)
             return redirect('payment')
 
@@ -875,36 +591,22 @@ def process_payment(request):
         if instructions:
             OrderNote.objects.create(order=order, user=request.user, note=instructions)
 
-        # Enregistrer téléphone et email en cas de paiement à la livraison
-        if payment_method == 'delivery':
-            phone = request.POST.get('phone')
-            email = request.POST.get('email')
-            if phone and email:  # Vérification des champs obligatoires
-                order.payment_details = {'delivery_phone': phone, 'delivery_email': email}
-                order.save()
-
-        # Vérification finale
-        item_count = order.items.count()
-        print(f"Vérification finale: {item_count} articles dans la commande")
-
         messages.success(request, 'Commande enregistrée avec succès!')
         
         # Envoyer l'email de confirmation
         try:
             process_order_completion(order.id)
-        except Exception as e:
-            print(f"Erreur lors de l'envoi de l'email: {e}")
+        except Exception:
+            logger.exception("Erreur lors de l'envoi de l'email de la commande %s", order_number)
         
         # Vider le panier en supprimant la clé du localStorage via JavaScript
         response = redirect(reverse('payment_confirmation', args=[order_number]))
         response.set_cookie('clear_cart', 'true')
         return response
             
-    except Exception as e:
+    except Exception:
         # Enregistrement de l'erreur pour débogage
-        print(f"ERREUR COMPLÈTE: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur lors du traitement de la commande")
         # Message d'erreur pour l'utilisateur
         messages.error(request, "Erreur lors du traitement de la commande. Veuillez réessayer.")
         # Redirection vers la page de paiement
@@ -919,13 +621,10 @@ def payment_confirmation(request, order_number):
         
         # Vérification des articles de la commande
         items = order.items.all()
-        print(f"Commande #{order_number} - Nombre d'articles: {items.count()}")
-        for item in items:
-            print(f"Article: {item.product_name}, Quantité: {item.quantity}, Prix total: {item.total_price}")
         
-        # Si aucun article n'est trouvé mais que la commande existe, afficher un avertissement
-        if items.count() == 0:
-            print("ATTENTION: La commande existe mais ne contient aucun article!")
+        # Si aucun article n'est trouvé mais que la commande existe, le signaler
+        if not items:
+            logger.warning("La commande %s existe mais ne contient aucun article", order_number)
         
         # Préparation du contexte pour le template
         context = {
@@ -955,142 +654,14 @@ def generate_invoice(request, order_id):
         else:
             order = get_object_or_404(Order, id=order_id, customer=request.user)
         
-        # Création du buffer pour le PDF
-        buffer = BytesIO()
-        
-        # Création du document PDF
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72,
-            title=f"Facture {order.order_number}"
+        # Facture servie depuis le cache disque tant que la commande n'a pas changé
+        invoice_path = get_invoice_path(order)
+        return FileResponse(
+            open(invoice_path, 'rb'),
+            as_attachment=True,
+            filename=f"facture_{order.order_number}.pdf",
+            content_type='application/pdf'
         )
-        
-        # Contenu du document
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='Center', alignment=1))
-        styles.add(ParagraphStyle(
-            name='Invoice_Title',
-            fontName='Helvetica-Bold',
-            fontSize=16,
-            alignment=1,
-            spaceAfter=12
-        ))
-        
-        # Titre
-        elements.append(Paragraph(f"FACTURE N° {order.order_number}", styles['Invoice_Title']))
-        elements.append(Spacer(1, 12))
-        
-        # Date et infos société
-        date_text = f"Date: {order.created_at.strftime('%d/%m/%Y')}"
-        company_name = "E-SHOP SAS"
-        company_address = "123 Rue du Commerce, 75001 Paris"
-        company_info = f"SIRET: 123 456 789 00010 - TVA: FR12 123 456 789"
-        
-        elements.append(Paragraph(date_text, styles['Normal']))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph(company_name, styles['Heading2']))
-        elements.append(Paragraph(company_address, styles['Normal']))
-        elements.append(Paragraph(company_info, styles['Normal']))
-        elements.append(Spacer(1, 24))
-        
-        # Informations client
-        elements.append(Paragraph("Informations client:", styles['Heading3']))
-        elements.append(Paragraph(f"Nom: {order.customer.get_full_name() or order.customer.username}", styles['Normal']))
-        elements.append(Paragraph(f"Email: {order.customer.email}", styles['Normal']))
-        elements.append(Paragraph(f"Adresse de livraison:", styles['Normal']))
-        elements.append(Paragraph(order.shipping_address_text.replace('\n', '<br/>'), styles['Normal']))
-        elements.append(Spacer(1, 24))
-        
-        # Informations commande
-        elements.append(Paragraph("Détails de la commande:", styles['Heading3']))
-        elements.append(Spacer(1, 12))
-        
-        # Tableau des articles
-        data = [
-            ['Produit', 'Quantité', 'Prix unitaire', 'Total']
-        ]
-        
-        # Ajout des produits dans le tableau
-        for item in order.items.all():
-            product_name = item.product_name
-            if item.options:
-                # Convertir les options en format lisible
-                try:
-                    if isinstance(item.options, str):
-                        options_dict = json.loads(item.options)
-                    else:
-                        options_dict = item.options
-                    options_text = ', '.join([f"{key}: {value}" for key, value in options_dict.items()])
-                    product_name += f" ({options_text})"
-                except (json.JSONDecodeError, AttributeError):
-                    pass  # Ignorer les erreurs de conversion
-            
-            data.append([
-                product_name,
-                str(item.quantity),
-                f"{item.unit_price} F CFA",
-                f"{item.total_price} F CFA"
-            ])
-        
-        # Ajout des totaux
-        data.append(['', '', 'Sous-total', f"{order.subtotal} F CFA"])
-        data.append(['', '', 'TVA (20%)', f"{order.tax_amount} F CFA"])
-        data.append(['', '', 'Frais de livraison', f"{order.shipping_cost} F CFA" if order.shipping_cost > 0 else "Gratuit"])
-        data.append(['', '', 'TOTAL', f"{order.total_amount} F CFA"])
-        
-        # Création du tableau
-        table = Table(data, colWidths=[8*cm, 2*cm, 4*cm, 4*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -5), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('SPAN', (0, -4), (1, -4)),
-            ('SPAN', (0, -3), (1, -3)),
-            ('SPAN', (0, -2), (1, -2)),
-            ('SPAN', (0, -1), (1, -1)),
-            ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (2, -4), (-1, -1), 'Helvetica-Bold'),
-            ('BACKGROUND', (2, -1), (-1, -1), colors.lightgrey),
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 24))
-        
-        # Informations de paiement
-        payment_method = order.get_payment_method_display()
-        elements.append(Paragraph(f"Méthode de paiement: {payment_method}", styles['Normal']))
-        elements.append(Paragraph(f"Statut du paiement: {order.get_payment_status_display()}", styles['Normal']))
-        elements.append(Spacer(1, 12))
-        
-        # Pied de page
-        elements.append(Paragraph("Nous vous remercions pour votre commande!", styles['Center']))
-        elements.append(Spacer(1, 6))
-        elements.append(Paragraph("Pour toute question relative à votre commande, veuillez contacter notre service client.", styles['Center']))
-        elements.append(Paragraph("service-client@e-shop.com | +33 (0)1 23 45 67 89", styles['Center']))
-        
-        # Construction du document
-        doc.build(elements)
-        
-        # Récupération du contenu du buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Création de la réponse HTTP
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="facture_{order.order_number}.pdf"'
-        
-        return response
     except Exception as e:
         messages.error(request, f"Erreur lors de la génération de la facture: {str(e)}")
         if request.user.is_staff:
@@ -1103,183 +674,28 @@ def generate_invoice(request, order_id):
 def send_order_confirmation_email(order_id):
     try:
         # Récupération de la commande
-        order = Order.objects.get(id=order_id)
-        
-        # Génération de la facture
-        buffer = BytesIO()
+        order = Order.objects.select_related('customer').prefetch_related('items').get(id=order_id)
         
-        # Création du document PDF (même code que ci-dessus)
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Contenu du document (même code que ci-dessus)
-        elements = []
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='Center', alignment=1))
-        styles.add(ParagraphStyle(
-            name='Invoice_Title',
-            fontName='Helvetica-Bold',
-            fontSize=16,
-            alignment=1,
-            spaceAfter=12
-        ))
-        
-        # Titre
-        elements.append(Paragraph(f"FACTURE N° {order.order_number}", styles['Invoice_Title']))
-        elements.append(Spacer(1, 12))
-        
-        # Date et infos société
-        date_text = f"Date: {order.created_at.strftime('%d/%m/%Y')}"
-        company_name = "E-SHOP SAS"
-        company_address = "123 Rue du Commerce, 75001 Paris"
-        company_info = f"SIRET: 123 456 789 00010 - TVA: FR12 123 456 789"
-        
-        elements.append(Paragraph(date_text, styles['Normal']))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph(company_name, styles['Heading2']))
-        elements.append(Paragraph(company_address, styles['Normal']))
-        elements.append(Paragraph(company_info, styles['Normal']))
-        elements.append(Spacer(1, 24))
-        
-        # Informations client
-        elements.append(Paragraph("Informations client:", styles['Heading3']))
-        elements.append(Paragraph(f"Nom: {order.customer.get_full_name() or order.customer.username}", styles['Normal']))
-        elements.append(Paragraph(f"Email: {order.customer.email}", styles['Normal']))
-        elements.append(Paragraph(f"Adresse de livraison:", styles['Normal']))
-        elements.append(Paragraph(order.shipping_address_text.replace('\n', '<br/>'), styles['Normal']))
-        elements.append(Spacer(1, 24))
-        
-        # Informations commande
-        elements.append(Paragraph("Détails de la commande:", styles['Heading3']))
-        elements.append(Spacer(1, 12))
-        
-        # Tableau des articles
-        data = [
-            ['Produit', 'Quantité', 'Prix unitaire', 'Total']
-        ]
-        
-        # Ajout des produits dans le tableau
-        for item in order.items.all():
-            product_name = item.product_name
-            if item.options:
-                try:
-                    if isinstance(item.options, str):
-                        options_dict = json.loads(item.options)
-                    else:
-                        options_dict = item.options
-                    options_text = ', '.join([f"{key}: {value}" for key, value in options_dict.items()])
-                    product_name += f" ({options_text})"
-                except (json.JSONDecodeError, AttributeError):
-                    pass
-            
-            data.append([
-                product_name,
-                str(item.quantity),
-                f"{item.unit_price} F CFA",
-                f"{item.total_price} F CFA"
-            ])
-        
-        # Ajout des totaux
-        data.append(['', '', 'Sous-total', f"{order.subtotal} F CFA"])
-        data.append(['', '', 'TVA (20%)', f"{order.tax_amount} F CFA"])
-        data.append(['', '', 'Frais de livraison', f"{order.shipping_cost} F CFA" if order.shipping_cost > 0 else "Gratuit"])
-        data.append(['', '', 'TOTAL', f"{order.total_amount} F CFA"])
-        
-        # Création du tableau
-        table = Table(data, colWidths=[8*cm, 2*cm, 4*cm, 4*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -5), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('SPAN', (0, -4), (1, -4)),
-            ('SPAN', (0, -3), (1, -3)),
-            ('SPAN', (0, -2), (1, -2)),
-            ('SPAN', (0, -1), (1, -1)),
-            ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (2, -4), (-1, -1), 'Helvetica-Bold'),
-            ('BACKGROUND', (2, -1), (-1, -1), colors.lightgrey),
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 24))
-        
-        # Informations de paiement
-        payment_method = order.get_payment_method_display()
-        elements.append(Paragraph(f"Méthode de paiement: {payment_method}", styles['Normal']))
-        elements.append(Paragraph(f"Statut du paiement: {order.get_payment_status_display()}", styles['Normal']))
-        elements.append(Spacer(1, 12))
-        
-        # Pied de page
-        elements.append(Paragraph("Nous vous remercions pour votre commande!", styles['Center']))
-        elements.append(Spacer(1, 6))
-        elements.append(Paragraph("Pour toute question relative à votre commande, veuillez contacter notre service client.", styles['Center']))
-        elements.append(Paragraph("service-client@e-shop.com | +33 (0)1 23 45 67 89", styles['Center']))
-        
-        # Construction du document
-        doc.build(elements)
-        
-        # Récupération du contenu du buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Préparation de l'e-mail
-        subject = f'Confirmation de votre commande #{order.order_number}'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = order.customer.email
-        
-        # Création du contenu HTML de l'e-mail
-        html_content = render_to_string(
-            'website/emails/order_confirmation_email_template.html',
-            {
-                'order': order,
-                'items': order.items.all(),
-                'user': order.customer,
-                'site_url': settings.SITE_URL,
-            }
-        )
-        
-        # Création du contenu texte de l'e-mail
-        text_content = strip_tags(html_content)
-        
-        # Création de l'e-mail
-        msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email])
-        msg.attach_alternative(html_content, "text/html")
-        
-        # Attachement de la facture
-        msg.attach(f'facture_{order.order_number}.pdf', pdf, 'application/pdf')
-        
-        # Envoi de l'e-mail
-        msg.send()
+        # Envoi de l'e-mail (facture en pièce jointe)
+        build_order_confirmation_email(order).send()
         
         # Mise à jour du statut de la commande
-        order.email_sent = True
-        order.save(update_fields=['email_sent'])
+        Order.objects.filter(id=order.id).update(email_sent=True)
         
         return True
-    except Exception as e:
-        print(f"Erreur lors de l'envoi de l'email de confirmation pour la commande {order_id}: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Erreur lors de l'envoi de l'email de confirmation pour la commande %s", order_id)
         return False
 
 # Fonction pour être appelée après la création d'une commande
 def process_order_completion(order_id):
     try:
-        # Envoi de l'email de confirmation
-        send_order_confirmation_email(order_id)
+        # L'email de confirmation est envoyé par le worker (manage.py run_jobs),
+        # uniquement une fois la transaction de la commande validée
+        enqueue(SEND_CONFIRMATION_EMAIL, {'order_id': order_id})
         return True
-    except Exception as e:
-        print(f"Erreur lors du traitement de la commande {order_id}: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Erreur lors du traitement de la commande %s", order_id)
         return False
 
 
@@ -1357,75 +773,3 @@ def change_payment_status(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
     
-
-
-
-
-
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404
-from .models import Order
-from decimal import Decimal
-
-def order_detail_json(request, order_id):
-    order = get_object_or_404(Order, pk=order_id)
-
-    # Génération des items de la commande
-    items = []
-    for item in order.get_order_items():
-        items.append({
-            'product_name': item.product_name,
-            'product_image': item.product_image or '',  # lien complet si possible
-            'product_sku': item.product_sku,
-            'quantity': item.quantity,
-            'unit_price': float(item.unit_price),
-            'total_price': float(item.total_price),
-        })
-
-    # Données client
-    customer = order.customer
-    customer_info = {
-        'email': customer.email,
-        'name': f"{customer.first_name} {customer.last_name}".strip() or customer.username,
-        'date_joined': customer.date_joined.strftime("%d %b %Y"),
-        'orders_count': customer.orders.count(),
-        'image': customer.profile_picture_url
-    }
-
-    # Notes
-    notes_data = []
-    for note in order.notes.all():
-        notes_data.append({
-            'user': note.user.get_full_name() if note.user else 'Système',
-            'note': note.note,
-            'date': note.created_at.strftime("%d %b %Y %H:%M"),
-            'attachment': note.attachment.url if note.attachment else None
-        })
-
-    data = {
-        'success': True,
-        'order': {
-            'id': order.id,
-            'order_number': order.order_number,
-            'status': order.status,
-            'status_display': order.get_status_display(),
-            'payment_status': order.payment_status,
-            'payment_status_display': order.get_payment_status_display(),
-            'payment_method': order.payment_method,
-            'payment_method_display': order.get_payment_method_display(),
-            'tracking_number': order.tracking_number,
-            'created_at': order.created_at.strftime("%d %b %Y %H:%M"),
-            'estimated_delivery_date': order.estimated_delivery_date.strftime("%d %b %Y") if order.estimated_delivery_date else None,
-            'shipping_address': order.shipping_address_text,
-            'billing_address': order.billing_address_text,
-            'subtotal': float(order.subtotal),
-            'tax_amount': float(order.tax_amount),
-            'shipping_cost': float(order.shipping_cost),
-            'total_amount': float(order.total_amount),
-            'items': items,
-            'customer': customer_info,
-            'notes': notes_data,
-        }
-    }
-
-    return JsonResponse(data)
@@ -3,12 +3,19 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from .models import Order, OrderItem, OrderNote
+from . import idempotency
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .pagination import OrderCursorPagination, OrderSortFilter, paginate_ranked
+from .search import filter_orders_by_text, search_order_ids
 from .serializers import OrderSerializer, OrderItemSerializer, OrderNoteSerializer
 
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
+    filter_backends = [OrderSortFilter]
 
     def get_queryset(self):
         # Restreindre les commandes à celles de l'utilisateur connecté, sauf pour les superusers
@@ -16,6 +23,70 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Order.objects.all()
         return Order.objects.filter(customer=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        # ?q= : recherche classée par pertinence parmi les commandes visibles (au plus ORDER_SEARCH_LIMIT
+        # résultats, paginés par position dans le classement)
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_queryset()
+        matching_ids = search_order_ids(query, queryset)
+        if matching_ids is None:
+            # Recherche trop courte pour l'index : filtre simple et pagination habituelle
+            page = self.paginate_queryset(self.filter_queryset(filter_orders_by_text(queryset, query)))
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        page = paginate_ranked(queryset, matching_ids, request.query_params.get('cursor', ''), self.paginator.page_size)
+        serializer = self.get_serializer(page.object_list, many=True)
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'cursor', page.next_cursor) if page.has_next() else None,
+            'previous': (
+                replace_query_param(url, 'cursor', page.previous_cursor) if page.previous_cursor != '0'
+                else remove_query_param(url, 'cursor')
+            ) if page.has_previous() else None,
+            'results': serializer.data,
+        })
+
+    def create(self, request, *args, **kwargs):
+        # En-tête Idempotency-Key : un nouvel essai renvoie la réponse de la première création
+        key = request.headers.get('Idempotency-Key', '').strip()[:64]
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        previous = idempotency.lookup(request.user, idempotency.API_ORDER_CREATE_SCOPE, key)
+        if previous:
+            return self._replay(previous)
+
+        try:
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                idempotency.remember(
+                    request.user,
+                    idempotency.API_ORDER_CREATE_SCOPE,
+                    key,
+                    order=self.created_order,
+                    response_status=response.status_code,
+                    response_body=response.data
+                )
+        except idempotency.IdempotencyConflict:
+            previous = idempotency.lookup(request.user, idempotency.API_ORDER_CREATE_SCOPE, key)
+            if previous is None:
+                # Requête concurrente pas encore validée (ou clé expirée entre-temps) : le client réessaiera
+                return Response({'error': 'request in progress'}, status=409)
+            return self._replay(previous)
+        return response
+
+    def perform_create(self, serializer):
+        self.created_order = serializer.save()
+
+    def _replay(self, previous):
+        response = Response(previous['response_body'], status=previous['response_status'])
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         order = self.get_object()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, ProductMedia
+from .models import Category, Product, ProductMedia, StockReservation
 
 class ProductMediaInline(admin.TabularInline):
     model = ProductMedia
@@ -44,3 +44,10 @@ class ProductAdmin(admin.ModelAdmin):
 class ProductMediaAdmin(admin.ModelAdmin):
     list_display = ('product', 'media_type', 'file')
     list_filter = ('media_type',)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('product', 'user', 'quantity', 'status', 'created_at', 'expires_at')
+    list_filter = ('status',)
+    search_fields = ('product__name', 'user__email')
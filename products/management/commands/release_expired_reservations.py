@@ -0,0 +1,10 @@
+# products/management/commands/release_expired_reservations.py
+from django.core.management.base import BaseCommand
+from products.reservations import release_expired_reservations
+
+class Command(BaseCommand):
+    help = 'Libère les réservations de stock expirées'
+
+    def handle(self, *args, **kwargs):
+        released = release_expired_reservations()
+        self.stdout.write(self.style.SUCCESS(f"{released} réservation(s) libérée(s)"))
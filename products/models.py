@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 class Category(models.Model):
@@ -17,6 +20,21 @@ class Category(models.Model):
         verbose_name = "Catégorie"
         verbose_name_plural = "Catégories"
 
+def active_holds_subquery(exclude_user=None):
+    """Somme des réservations actives du produit courant (OuterRef('pk')), 0 si aucune"""
+    holds = StockReservation.objects.active().filter(product=OuterRef('pk'))
+    if exclude_user is not None:
+        holds = holds.exclude(user=exclude_user)
+    holds = holds.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(holds), Value(0))
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_available_stock(self, exclude_user=None):
+        """Annote available_stock = stock - réservations actives (hors celles de exclude_user)"""
+        return self.annotate(available_stock=F('stock') - active_holds_subquery(exclude_user))
+
+
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="products", verbose_name="Catégorie")
     name = models.CharField(max_length=255, unique=True, verbose_name="Nom du produit")
@@ -40,6 +58,8 @@ class Product(models.Model):
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de mise à jour")
 
+    objects = ProductQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -67,4 +87,49 @@ class ProductMedia(models.Model):
 
     class Meta:
         verbose_name = "Média du produit"
-        verbose_name_plural = "Médias des produits"
\ No newline at end of file
+        verbose_name_plural = "Médias des produits"
+
+
+class StockReservationQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status='active', expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(status='active', expires_at__lte=timezone.now())
+
+
+class StockReservation(models.Model):
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('converted', 'Convertie en vente'),
+        ('released', 'Libérée'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reservations", verbose_name="Produit")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stock_reservations",
+        verbose_name="Utilisateur"
+    )
+    quantity = models.PositiveIntegerField(verbose_name="Quantité réservée")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active', verbose_name="Statut")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    expires_at = models.DateTimeField(verbose_name="Date d'expiration")
+
+    objects = StockReservationQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Réservation de stock"
+        verbose_name_plural = "Réservations de stock"
+        indexes = [
+            # Agrégat des réservations actives par produit
+            models.Index(fields=['product', 'status', 'expires_at']),
+            # Conversion / libération des réservations d'un client
+            models.Index(fields=['user', 'status']),
+            # Balayage des réservations expirées
+            models.Index(fields=['status', 'expires_at']),
+        ]
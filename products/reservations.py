@@ -0,0 +1,71 @@
+# products/reservations.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+# Durée d'une réservation prise à l'ouverture de la page de paiement
+STOCK_RESERVATION_TTL = getattr(settings, 'STOCK_RESERVATION_TTL', timedelta(minutes=15))
+
+
+def reserve_stock(user, quantities):
+    """
+    Remplace les réservations actives de l'utilisateur par de nouvelles réservations
+    pour {product_id: quantité}. Chaque réservation est plafonnée au stock disponible.
+    Retourne (expires_at, shortages) où shortages liste les produits insuffisants.
+    """
+    expires_at = timezone.now() + STOCK_RESERVATION_TTL
+    shortages = []
+
+    with transaction.atomic():
+        StockReservation.objects.filter(user=user, status='active').update(status='released')
+
+        products = (
+            Product.objects.select_for_update()
+            .with_available_stock(exclude_user=user)
+            .in_bulk(quantities.keys())
+        )
+
+        reservations = []
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            held = min(quantity, max(product.available_stock, 0))
+            if held < quantity:
+                shortages.append({
+                    'id': product.id,
+                    'name': product.name,
+                    'requested': quantity,
+                    'available': max(product.available_stock, 0),
+                })
+            if held:
+                reservations.append(StockReservation(
+                    product=product,
+                    user=user,
+                    quantity=held,
+                    expires_at=expires_at
+                ))
+        StockReservation.objects.bulk_create(reservations)
+
+    return expires_at, shortages
+
+
+def convert_reservations(user, product_ids):
+    """Transforme les réservations de l'utilisateur en vente (appelé par la commande)"""
+    return StockReservation.objects.filter(
+        user=user, product_id__in=product_ids, status='active'
+    ).update(status='converted')
+
+
+def release_reservations(user):
+    """Libère les réservations actives de l'utilisateur (panier vidé, déconnexion)"""
+    return StockReservation.objects.filter(user=user, status='active').update(status='released')
+
+
+def release_expired_reservations():
+    """Libère en une requête toutes les réservations arrivées à expiration"""
+    return StockReservation.objects.expired().update(status='released')
@@ -1,3 +1,129 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from cart.carts import clear_cart
+from cart.models import Cart
+from orders.checkout import InsufficientStockError, place_order
+from .models import Category, Product, StockReservation
+from .reservations import release_expired_reservations, reserve_stock
+
+
+def make_user(email):
+    return User.objects.create_user(email=email, password='secret', first_name='Awa', last_name='Diop')
+
+
+def make_product(name, stock=5, price='10.00'):
+    category = Category.objects.get_or_create(name='Bijoux', defaults={'icon': 'fas fa-gem'})[0]
+    return Product.objects.create(category=category, name=name, price=Decimal(price), stock=stock, sku=name)
+
+
+def available(product, exclude_user=None):
+    return Product.objects.with_available_stock(exclude_user).get(pk=product.pk).available_stock
+
+
+class StockReservationTests(TestCase):
+    """Réservations prises à l'ouverture de la page de paiement"""
+
+    def setUp(self):
+        self.buyer = make_user('buyer@example.com')
+        self.other = make_user('other@example.com')
+        self.product = make_product('Collier', stock=5)
+
+    def checkout(self, customer, quantity, order_number):
+        line = {'product_id': self.product.id, 'name': '', 'sku': '', 'quantity': quantity, 'price': Decimal('0'), 'options': None}
+        return place_order(
+            [line], customer=customer, order_number=order_number, payment_method='card',
+            shipping_address_text='1 rue A, 75001 Paris, France', billing_address_text='1 rue A'
+        )
+
+    def test_hold_reduces_stock_for_other_customers_only(self):
+        expires_at, shortages = reserve_stock(self.buyer, {self.product.id: 3})
+
+        self.assertEqual(shortages, [])
+        self.assertGreater(expires_at, timezone.now())
+        self.assertEqual(available(self.product), 2)
+        self.assertEqual(available(self.product, exclude_user=self.buyer), 5)
+
+    def test_hold_is_capped_at_available_stock(self):
+        reserve_stock(self.other, {self.product.id: 4})
+        expires_at, shortages = reserve_stock(self.buyer, {self.product.id: 3})
+
+        self.assertEqual(shortages, [{'id': self.product.id, 'name': 'Collier', 'requested': 3, 'available': 1}])
+        self.assertEqual(StockReservation.objects.get(user=self.buyer, status='active').quantity, 1)
+
+    def test_new_hold_replaces_previous_one(self):
+        reserve_stock(self.buyer, {self.product.id: 3})
+        reserve_stock(self.buyer, {self.product.id: 1})
+
+        self.assertEqual(StockReservation.objects.filter(user=self.buyer, status='active').count(), 1)
+        self.assertEqual(available(self.product), 4)
+
+    def test_other_customer_cannot_buy_held_stock(self):
+        reserve_stock(self.buyer, {self.product.id: 4})
+
+        with self.assertRaises(InsufficientStockError):
+            self.checkout(self.other, 2, 'CMD-OTHER')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_checkout_converts_own_hold(self):
+        reserve_stock(self.buyer, {self.product.id: 4})
+        self.checkout(self.buyer, 4, 'CMD-BUYER')
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertEqual(StockReservation.objects.get().status, 'converted')
+        self.assertEqual(available(self.product), 1)
+
+    def test_expired_holds_no_longer_count_and_are_swept(self):
+        reserve_stock(self.buyer, {self.product.id: 4})
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(available(self.product), 5)
+        self.assertEqual(release_expired_reservations(), 1)
+        self.assertEqual(StockReservation.objects.get().status, 'released')
+        self.assertEqual(release_expired_reservations(), 0)
+
+    def test_sweeper_command(self):
+        reserve_stock(self.buyer, {self.product.id: 2})
+        reserve_stock(self.other, {self.product.id: 1})
+        StockReservation.objects.filter(user=self.buyer).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        call_command('release_expired_reservations', stdout=StringIO())
+
+        self.assertEqual(
+            dict(StockReservation.objects.values_list('user__email', 'status')),
+            {'buyer@example.com': 'released', 'other@example.com': 'active'}
+        )
+
+    def test_clearing_cart_releases_holds(self):
+        reserve_stock(self.buyer, {self.product.id: 2})
+        clear_cart(Cart.objects.create(user=self.buyer))
+
+        self.assertEqual(StockReservation.objects.get().status, 'released')
+
+    def test_logout_releases_holds(self):
+        reserve_stock(self.buyer, {self.product.id: 2})
+        self.client.force_login(self.buyer)
+        self.client.get(reverse('logout'))
+
+        self.assertEqual(StockReservation.objects.get().status, 'released')
+
+    def test_reserve_stock_view(self):
+        self.client.force_login(self.buyer)
+        response = self.client.post(
+            reverse('reserve_stock'),
+            data={'items': [{'id': self.product.id, 'quantity': 2}, {'id': 'x'}]},
+            content_type='application/json'
+        )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
@@ -26,6 +26,7 @@ urlpatterns = [
     path('products/', views.products_page, name='products'),
     path('products/<int:product_id>/', views.products_detail, name='product_detail'),
     path('products/<int:product_id>/check-stock/', views.check_stock, name='check_stock'),
+    path('products/reserve-stock/', views.reserve_stock, name='reserve_stock'),
     path('', include(router.urls)),
 
 ]
@@ -1,4 +1,5 @@
 from sqlite3 import IntegrityError
+import json
 import uuid
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
@@ -10,6 +11,8 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.core.paginator import Paginator
 from .models import Product, Category
+from .reservations import reserve_stock as reserve_stock_for_user
+from django.views.decorators.http import require_http_methods
 
 
 # 🌟 Affichage des catégories
@@ -271,8 +274,8 @@ def delete_product_image(request, image_id):
 
 # 🌟 Affichage des produits chez le client
 def products_page(request):
-    # Commencer avec tous les produits actifs et en stock
-    products_list = Product.objects.filter(status='active', stock__gt=0)
+    # Commencer avec tous les produits actifs et disponibles (stock moins réservations en cours)
+    products_list = Product.objects.with_available_stock().filter(status='active', available_stock__gt=0)
     print("Nombre de produits actifs et en stock:", products_list.count())
 
     # Récupérer les paramètres de filtrage
@@ -361,5 +364,34 @@ def products_detail(request, product_id):
 
 
 def check_stock(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    return JsonResponse({"stock": product.stock})
\ No newline at end of file
+    # Les réservations du client courant ne réduisent pas son propre disponible
+    exclude_user = request.user if request.user.is_authenticated else None
+    product = get_object_or_404(Product.objects.with_available_stock(exclude_user), id=product_id)
+    return JsonResponse({"stock": max(product.available_stock, 0)})
+
+
+@login_required
+@require_http_methods(["POST"])
+def reserve_stock(request):
+    """Réserve le stock du panier pour une durée limitée (appelé à l'ouverture de la page de paiement)"""
+    try:
+        items = json.loads(request.body or '{}').get('items', [])
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Données invalides'}, status=400)
+
+    quantities = {}
+    for item in items:
+        try:
+            product_id = int(item.get('id'))
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError, AttributeError):
+            continue
+        if product_id > 0 and quantity > 0:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    expires_at, shortages = reserve_stock_for_user(request.user, quantities)
+    return JsonResponse({
+        'success': not shortages,
+        'expires_at': expires_at.isoformat(),
+        'shortages': shortages
+    })
\ No newline at end of file
@@ -5,7 +5,9 @@ document.addEventListener('DOMContentLoaded', function () {
 
     // Éléments du DOM
     const searchInput = document.querySelector('.search-box input');
-    const statusFilter = document.querySelector('.filter-select');
+    const statusFilter = document.querySelector('.filter-select[name="status"]');
+    const sortSelect = document.querySelector('.sort-select');
+    const minSpentInput = document.querySelector('.min-spent-input');
     const customerModal = document.getElementById('customerModal');
     const closeModalBtn = document.querySelector('.close-modal');
     const viewCustomerBtns = document.querySelectorAll('.view-customer');
@@ -25,6 +27,8 @@ document.addEventListener('DOMContentLoaded', function () {
             const searchParams = new URLSearchParams(window.location.search);
             searchParams.set('search', searchInput.value.trim());
             searchParams.set('status', statusFilter.value);
+            if (sortSelect) searchParams.set('sort', sortSelect.value);
+            if (minSpentInput) searchParams.set('min_spent', minSpentInput.value.trim());
             window.location.href = `${window.location.pathname}?${searchParams.toString()}`;
         }
 
@@ -37,6 +41,10 @@ document.addEventListener('DOMContentLoaded', function () {
 
         // Filtrage par statut
         statusFilter.addEventListener('change', submitSearch);
+
+        // Tri et montant dépensé minimum
+        if (sortSelect) sortSelect.addEventListener('change', submitSearch);
+        if (minSpentInput) minSpentInput.addEventListener('change', submitSearch);
     }
 
     // Affichage des détails client
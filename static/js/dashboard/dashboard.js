@@ -69,27 +69,8 @@ document.addEventListener('DOMContentLoaded', function () {
             fetch('/notifications/unread/')
                 .then(response => response.json())
                 .then(data => {
-                    // Récupérer le badge de notification
-                    let notificationBadge = document.getElementById('notification-badge');
-                    
-                    // Si le badge n'existe pas (car la variable template unread_count n'était pas définie)
-                    // alors on le crée dynamiquement
-                    if (!notificationBadge && notificationTrigger) {
-                        notificationBadge = document.createElement('span');
-                        notificationBadge.id = 'notification-badge';
-                        notificationBadge.className = 'notification-badge';
-                        notificationTrigger.appendChild(notificationBadge);
-                    }
-                    
-                    // Mettre à jour le badge sur toutes les pages
-                    if (notificationBadge) {
-                        if (data.unread_count && data.unread_count > 0) {
-                            notificationBadge.textContent = data.unread_count;
-                            notificationBadge.style.display = 'flex';
-                        } else {
-                            notificationBadge.style.display = 'none';
-                        }
-                    }
+                    // Mettre à jour le badge sur toutes les pages (créé s'il n'existe pas encore)
+                    updateBadge(data.unread_count || 0);
 
                     // Si le dropdown est ouvert, mettre à jour aussi son contenu
                     if (notificationList && notificationCenter.classList.contains('active')) {
@@ -193,9 +174,80 @@ document.addEventListener('DOMContentLoaded', function () {
 
         // Charger les notifications au démarrage de chaque page
         fetchNotifications();
-        
-        // Charger les notifications périodiquement (toutes les 30 secondes)
-        setInterval(fetchNotifications, 30000); // Réduit de 120000 à 30000 pour une mise à jour plus fréquente
+
+        // Mise à jour en direct par Server-Sent Events si le serveur l'active ; sinon, interrogation toutes les 30 secondes
+        listenToNotifications();
+
+        function startPolling() {
+            return setInterval(fetchNotifications, 30000);
+        }
+
+        function listenToNotifications() {
+            const streamUrl = notificationCenter.dataset.streamUrl;
+            if (!streamUrl || typeof EventSource === 'undefined') {
+                startPolling();
+                return;
+            }
+
+            const stream = new EventSource(streamUrl);
+            let fallback = null;
+
+            function useFallback() {
+                if (fallback) return;
+                stream.close();
+                fallback = startPolling();
+            }
+
+            // Le serveur envoie 'unread' dès l'ouverture : sans réponse, le flux est bloqué
+            let watchdog = setTimeout(useFallback, 10000);
+
+            stream.addEventListener('unread', function(event) {
+                clearTimeout(watchdog);
+                const data = JSON.parse(event.data);
+                if (data.unread_count === null) {
+                    // Nombre inconnu côté serveur : le redemander
+                    fetchNotifications();
+                } else {
+                    updateBadge(data.unread_count);
+                }
+            });
+
+            stream.addEventListener('notification', function() {
+                // Rafraîchir la liste si elle est ouverte (le badge suit l'événement 'unread')
+                if (notificationCenter.classList.contains('active')) {
+                    fetchNotifications();
+                }
+            });
+
+            stream.addEventListener('error', function() {
+                // Le navigateur se reconnecte seul ; si le flux est définitivement fermé, revenir à l'interrogation
+                if (stream.readyState === EventSource.CLOSED) {
+                    useFallback();
+                } else {
+                    // Reconnexion en cours : elle doit renvoyer 'unread' à temps
+                    clearTimeout(watchdog);
+                    watchdog = setTimeout(useFallback, 10000);
+                }
+            });
+        }
+
+        function updateBadge(count) {
+            let notificationBadge = document.getElementById('notification-badge');
+            if (!notificationBadge && notificationTrigger) {
+                notificationBadge = document.createElement('span');
+                notificationBadge.id = 'notification-badge';
+                notificationBadge.className = 'notification-badge';
+                notificationTrigger.appendChild(notificationBadge);
+            }
+            if (notificationBadge) {
+                if (count > 0) {
+                    notificationBadge.textContent = count;
+                    notificationBadge.style.display = 'flex';
+                } else {
+                    notificationBadge.style.display = 'none';
+                }
+            }
+        }
     }
 
     /** ========== 3️⃣ GESTION DU MENU PROFIL ========== */
@@ -8,10 +8,15 @@ document.addEventListener('DOMContentLoaded', function() {
     const markAllReadBtn = document.getElementById('markAllReadBtn');
     const notificationItems = document.querySelectorAll('.notification-item');
     const confirmModal = document.getElementById('confirmModal');
+    const selectAllCheckbox = document.getElementById('selectAllNotifications');
+    const notificationCheckboxes = document.querySelectorAll('.notification-checkbox');
+    const bulkButtons = document.querySelectorAll('[data-bulk-action]');
+    const bulkSelectedCount = document.getElementById('bulkSelectedCount');
     
     // Initialisation
     initNotificationFilters();
     initNotificationActions();
+    initBulkActions();
     
     /**
      * Initialise les filtres de la page des notifications
@@ -52,8 +57,8 @@ document.addEventListener('DOMContentLoaded', function() {
         // Marquer une notification comme lue au clic
         notificationItems.forEach(item => {
             item.addEventListener('click', function(e) {
-                // Ignorer si on clique sur un bouton d'action
-                if (e.target.closest('.notification-action')) return;
+                // Ignorer si on clique sur un bouton d'action ou sur la case de sélection
+                if (e.target.closest('.notification-action') || e.target.closest('.notification-select')) return;
                 
                 const notifId = this.dataset.id;
                 markAsRead(notifId);
@@ -127,6 +132,137 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    /**
+     * Initialise la sélection multiple et les actions groupées (lu, archivé, supprimé)
+     */
+    function initBulkActions() {
+        if (!notificationCheckboxes.length) return;
+        
+        notificationCheckboxes.forEach(checkbox => {
+            checkbox.addEventListener('change', updateBulkBar);
+        });
+        
+        if (selectAllCheckbox) {
+            selectAllCheckbox.addEventListener('change', function() {
+                notificationCheckboxes.forEach(checkbox => {
+                    checkbox.checked = this.checked;
+                });
+                updateBulkBar();
+            });
+        }
+        
+        bulkButtons.forEach(button => {
+            button.addEventListener('click', function() {
+                const action = this.dataset.bulkAction;
+                const ids = getSelectedIds();
+                if (!ids.length) return;
+                
+                if (action === 'delete') {
+                    if (confirmModal) {
+                        showConfirmModal(() => runBulkAction(action, ids), `Supprimer ${ids.length} notification(s) ?`);
+                    } else if (confirm(`Supprimer ${ids.length} notification(s) ?`)) {
+                        runBulkAction(action, ids);
+                    }
+                } else {
+                    runBulkAction(action, ids);
+                }
+            });
+        });
+    }
+    
+    /**
+     * Identifiants des notifications cochées
+     */
+    function getSelectedIds() {
+        return Array.from(notificationCheckboxes)
+            .filter(checkbox => checkbox.checked)
+            .map(checkbox => parseInt(checkbox.value, 10));
+    }
+    
+    /**
+     * Met à jour le nombre de notifications sélectionnées et l'état des boutons
+     */
+    function updateBulkBar() {
+        const selected = getSelectedIds().length;
+        if (bulkSelectedCount) bulkSelectedCount.textContent = `${selected} sélectionnée(s)`;
+        bulkButtons.forEach(button => {
+            button.disabled = selected === 0;
+        });
+        if (selectAllCheckbox) {
+            selectAllCheckbox.checked = selected > 0 && selected === notificationCheckboxes.length;
+        }
+    }
+    
+    /**
+     * Envoie une action groupée au serveur (une seule requête pour toute la sélection)
+     * @param {string} action - read, archive ou delete
+     * @param {Array<number>} ids - Les identifiants des notifications
+     * @returns {Promise}
+     */
+    function sendBulkAction(action, ids) {
+        const csrfToken = document.querySelector('input[name=csrfmiddlewaretoken]');
+        if (!csrfToken) {
+            console.error('CSRF token not found');
+            return Promise.reject(new Error('CSRF token not found'));
+        }
+        
+        return fetch('/bulk-action/', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrfToken.value,
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ action: action, ids: ids })
+        })
+        .then(response => response.json());
+    }
+    
+    /**
+     * Applique une action groupée à la sélection et met à jour l'interface
+     */
+    function runBulkAction(action, ids) {
+        sendBulkAction(action, ids)
+            .then(data => {
+                if (!data.success) {
+                    showToast(data.error || 'Une erreur est survenue', 'error');
+                    return;
+                }
+                
+                ids.forEach(id => {
+                    const item = document.querySelector(`.notification-item[data-id="${id}"]`);
+                    if (!item) return;
+                    if (action === 'read') {
+                        item.classList.remove('unread');
+                        const dot = item.querySelector('.unread-dot');
+                        if (dot) dot.remove();
+                        const checkbox = item.querySelector('.notification-checkbox');
+                        if (checkbox) checkbox.checked = false;
+                    } else {
+                        // Archivées ou supprimées : elles quittent la boîte de réception
+                        item.remove();
+                    }
+                });
+                
+                updateUnreadCount(data.unread_count);
+                updateBulkBar();
+                
+                const labels = { read: 'marquée(s) comme lue(s)', archive: 'archivée(s)', delete: 'supprimée(s)' };
+                showToast(`${data.count} notification(s) ${labels[action]}`, 'success');
+            })
+            .catch(error => console.error('Erreur AJAX:', error));
+    }
+    
+    /**
+     * Met à jour le compteur de l'onglet "Non lues"
+     */
+    function updateUnreadCount(unreadCount) {
+        document.querySelectorAll('.count').forEach(count => {
+            if (count.closest('.filter-tab[data-filter="unread"]')) {
+                count.textContent = unreadCount;
+            }
+        });
+    }
+    
     /**
      * Filtre les notifications selon le critère sélectionné
      * @param {string} filter - Le filtre à appliquer (all, unread, type)
@@ -181,36 +317,16 @@ document.addEventListener('DOMContentLoaded', function() {
         const notification = document.querySelector(`.notification-item[data-id="${id}"]`);
         if (!notification || !notification.classList.contains('unread')) return;
         
-        const csrfToken = document.querySelector('input[name=csrfmiddlewaretoken]');
-        if (!csrfToken) {
-            console.error('CSRF token not found');
-            return;
-        }
-        
-        fetch(`/notifications/mark-read/${id}/`, {
-            method: 'POST',
-            headers: {
-                'X-CSRFToken': csrfToken.value,
-                'Content-Type': 'application/json'
-            }
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                notification.classList.remove('unread');
-                const dot = notification.querySelector('.unread-dot');
-                if (dot) dot.remove();
-                
-                // Mettre à jour les compteurs
-                const unreadCount = document.querySelectorAll('.notification-item.unread').length;
-                document.querySelectorAll('.count').forEach(count => {
-                    if (count.closest('.filter-tab[data-filter="unread"]')) {
-                        count.textContent = unreadCount;
-                    }
-                });
-            }
-        })
-        .catch(error => console.error('Erreur AJAX:', error));
+        sendBulkAction('read', [parseInt(id, 10)])
+            .then(data => {
+                if (data.success) {
+                    notification.classList.remove('unread');
+                    const dot = notification.querySelector('.unread-dot');
+                    if (dot) dot.remove();
+                    updateUnreadCount(data.unread_count);
+                }
+            })
+            .catch(error => console.error('Erreur AJAX:', error));
     }
 
     /**
@@ -120,6 +120,7 @@ document.addEventListener('DOMContentLoaded', function () {
     initOptionsButtons();
     initOrderDetailActions();
     initBatchActions();
+    initExportLinks();
 
     // Dans initOrderDetailActions()
     const paymentStatusChangeBtn = document.querySelector('.payment-status-btn');
@@ -211,6 +212,21 @@ document.addEventListener('DOMContentLoaded', function () {
             DOM.searchInput.addEventListener('input', debounce(() => {
                 filterOrders();
             }, CONFIG.debounceDelay));
+
+            // Entrée : recherche sur toutes les commandes (index côté serveur)
+            DOM.searchInput.addEventListener('keydown', function (e) {
+                if (e.key !== 'Enter') return;
+                e.preventDefault();
+                const params = new URLSearchParams(window.location.search);
+                params.delete('cursor');
+                params.delete('search');
+                if (this.value.trim()) {
+                    params.set('q', this.value.trim());
+                } else {
+                    params.delete('q');
+                }
+                window.location.search = params.toString();
+            });
         }
 
         // Filtres
@@ -792,7 +808,9 @@ document.addEventListener('DOMContentLoaded', function () {
                 `Client depuis ${order.customer.date_joined}` : '';
         }
         if (DOM.orderCount) {
-            DOM.orderCount.textContent = order.customer?.orders_count || '1';
+            // Statistique du client, hors de l'instantané de la commande : lue sur la ligne du tableau
+            const row = document.querySelector(`tr[data-id="${order.id}"]`);
+            DOM.orderCount.textContent = row?.dataset.customerOrders || '1';
         }
 
         // Photo de profil du client
@@ -857,7 +875,7 @@ document.addEventListener('DOMContentLoaded', function () {
         // Timeline
         if (DOM.orderTimeline) {
             DOM.orderTimeline.innerHTML = '';
-            const timelineEvents = generateTimelineFromStatus(order.status, order.created_at);
+            const timelineEvents = generateTimelineFromStatus(order.status, order.created_at, order.status_events);
 
             timelineEvents.forEach(event => {
                 const template = DOM.timelineItemTemplate;
@@ -944,10 +962,16 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // Générer une timeline basée sur le statut actuel de la commande
-    function generateTimelineFromStatus(status, createdAt) {
+    function generateTimelineFromStatus(status, createdAt, statusEvents = []) {
         // Date de création de la commande ou date actuelle
         const orderDate = createdAt ? new Date(createdAt) : new Date();
 
+        // Dates réelles des changements de statut, quand elles sont connues
+        const reachedAt = {};
+        statusEvents.forEach(event => {
+            reachedAt[event.status] = formatDate(new Date(event.created_at));
+        });
+
         // Événements de la timeline
         const events = [
             {
@@ -960,21 +984,21 @@ document.addEventListener('DOMContentLoaded', function () {
             {
                 title: 'En traitement',
                 icon: 'fa-box',
-                date: status === 'pending' ? 'À venir' : formatDate(addDays(orderDate, 1)),
+                date: reachedAt['processing'] || (status === 'pending' ? 'À venir' : formatDate(addDays(orderDate, 1))),
                 current: status === 'processing',
                 order: 2
             },
             {
                 title: 'Expédiée',
                 icon: 'fa-truck',
-                date: ['pending', 'processing'].includes(status) ? 'À venir' : formatDate(addDays(orderDate, 3)),
+                date: reachedAt['shipped'] || (['pending', 'processing'].includes(status) ? 'À venir' : formatDate(addDays(orderDate, 3))),
                 current: status === 'shipped',
                 order: 3
             },
             {
                 title: 'Livrée',
                 icon: 'fa-check-circle',
-                date: ['pending', 'processing', 'shipped'].includes(status) ? 'À venir' : formatDate(addDays(orderDate, 5)),
+                date: reachedAt['delivered'] || (['pending', 'processing', 'shipped'].includes(status) ? 'À venir' : formatDate(addDays(orderDate, 5))),
                 current: status === 'delivered',
                 order: 4
             }
@@ -985,7 +1009,7 @@ document.addEventListener('DOMContentLoaded', function () {
             events.push({
                 title: 'Commande annulée',
                 icon: 'fa-times-circle',
-                date: formatDate(new Date()),
+                date: reachedAt['cancelled'] || formatDate(new Date()),
                 current: true,
                 order: 5
             });
@@ -1497,6 +1521,64 @@ document.addEventListener('DOMContentLoaded', function () {
         };
     }
 
+    // Exports Excel/PDF générés en arrière-plan : demande, suivi puis téléchargement
+    function initExportLinks() {
+        document.querySelectorAll('.export-link[data-format="xls"], .export-link[data-format="pdf"]').forEach(link => {
+            link.addEventListener('click', function (e) {
+                e.preventDefault();
+
+                const params = new URLSearchParams();
+                if (DOM.statusFilter && DOM.statusFilter.value) {
+                    params.append('status', DOM.statusFilter.value);
+                }
+
+                fetch(this.href, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/x-www-form-urlencoded',
+                        'X-CSRFToken': CSRF_TOKEN
+                    },
+                    body: params.toString()
+                })
+                    .then(response => response.json())
+                    .then(data => {
+                        if (data.success) {
+                            showToast('Export en cours de génération...', 'info');
+                            pollExportJob(data);
+                        } else {
+                            showToast(`Erreur: ${data.error}`, 'error');
+                        }
+                    })
+                    .catch(error => {
+                        console.error("Erreur lors de la demande d'export:", error);
+                        showToast('Erreur de communication avec le serveur', 'error');
+                    });
+            });
+        });
+    }
+
+    function pollExportJob(data) {
+        if (data.status === 'done') {
+            showToast(`Export prêt (${data.row_count} commande(s))`, 'success');
+            window.location.href = data.download_url;
+            return;
+        }
+        if (data.status === 'failed') {
+            showToast(`Échec de l'export: ${data.error}`, 'error');
+            return;
+        }
+
+        setTimeout(() => {
+            fetch(data.status_url)
+                .then(response => response.json())
+                .then(pollExportJob)
+                .catch(error => {
+                    console.error("Erreur lors du suivi de l'export:", error);
+                    showToast('Erreur de communication avec le serveur', 'error');
+                });
+        }, 2000);
+    }
+
     // Afficher un toast de notification
     function showToast(message, type = 'info', duration = 3000) {
         // Chercher un conteneur de toast existant ou en créer un
@@ -158,6 +158,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (newQuantity <= item.stock) {
                     item.quantity = newQuantity;
                     localStorage.setItem('cart', JSON.stringify(cart));
+                    if (window.scheduleCartSync) window.scheduleCartSync();
                     
                     // Mettre à jour l'affichage
                     const cartItem = document.querySelector(`.cart-item[data-id="${itemId}"]`);
@@ -198,6 +199,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (newQuantity <= item.stock) {
                     item.quantity = newQuantity;
                     localStorage.setItem('cart', JSON.stringify(cart));
+                    if (window.scheduleCartSync) window.scheduleCartSync();
                     
                     // Mettre à jour l'affichage
                     const cartItem = document.querySelector(`.cart-item[data-id="${itemId}"]`);
@@ -248,6 +250,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     // Filtrer le panier
                     cart = cart.filter(item => item.id != itemId);
                     localStorage.setItem('cart', JSON.stringify(cart));
+                    if (window.scheduleCartSync) window.scheduleCartSync();
                     
                     // Mettre à jour l'affichage
                     if (cart.length === 0) {
@@ -264,27 +267,37 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Appliquer un code promo
+    // Le code est vérifié par le serveur, qui calcule la remise sur le panier synchronisé
     function applyPromoCode(code) {
-        // Simuler l'application d'un code promo
-        if (code.toUpperCase() === 'WELCOME') {
-            const cart = JSON.parse(localStorage.getItem('cart')) || [];
-            const discount = 0.1; // 10% de réduction
-            
-            updateTotals(cart, discount);
-            window.showNotification('Code promo appliqué : 10% de réduction');
-            
-            // Désactiver l'input et le bouton
-            if (promoCodeInput) promoCodeInput.disabled = true;
-            if (applyPromoBtn) applyPromoBtn.disabled = true;
-        } else {
-            window.showNotification('Code promo invalide', 'error');
-        }
+        window.syncServerCart()
+            .then(() => fetch('/cart/api/coupon/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: JSON.stringify({ code: code })
+            }))
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    window.showNotification(data.error || 'Code promo invalide', 'error');
+                    return;
+                }
+                const cart = JSON.parse(localStorage.getItem('cart')) || [];
+                updateTotals(cart, data.cart.discount_amount);
+                window.showNotification(`Code promo ${data.cart.coupon_code} appliqué`);
+
+                // Désactiver l'input et le bouton
+                if (promoCodeInput) promoCodeInput.disabled = true;
+                if (applyPromoBtn) applyPromoBtn.disabled = true;
+            })
+            .catch(error => console.error("Erreur lors de l'application du code promo:", error));
     }
 
-    // Mettre à jour les totaux
-    function updateTotals(cart, discount = 0) {
+    // Mettre à jour les totaux (discountAmount : remise calculée par le serveur)
+    function updateTotals(cart, discountAmount = 0) {
         const subtotal = cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-        const discountAmount = subtotal * discount;
         const total = subtotal - discountAmount;
         
         if (subtotalElement) subtotalElement.textContent = formatPrice(subtotal);
@@ -292,7 +305,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Afficher le montant de la remise si elle existe
         const discountLine = document.querySelector('.discount-line');
-        if (discount > 0) {
+        if (discountAmount > 0) {
             if (!discountLine) {
                 const discountHTML = `
                     <div class="summary-line discount-line">
@@ -355,6 +368,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Sauvegarder le panier mis à jour
         localStorage.setItem('cart', JSON.stringify(cart));
+        if (window.scheduleCartSync) window.scheduleCartSync();
         
         // Mettre à jour l'affichage
         updateCartCount();
@@ -377,6 +391,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // Vider le panier
     window.clearCart = function() {
         localStorage.removeItem('cart');
+        if (window.scheduleCartSync) window.scheduleCartSync();
         updateCartCount();
         if (cartItemsContainer) {
             renderEmptyCart();
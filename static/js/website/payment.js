@@ -44,6 +44,8 @@ document.addEventListener('DOMContentLoaded', function () {
     // Initialisation
     function init() {
         loadCartItems();
+        syncCartTotals();
+        reserveCartStock();
         setupEventListeners();
         updatePaymentForm();
         restoreFormData();
@@ -118,6 +120,36 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
+    // Réserver le stock du panier le temps du paiement
+    function reserveCartStock() {
+        const cart = JSON.parse(localStorage.getItem('cart')) || [];
+        const reserveUrl = paymentForm ? paymentForm.dataset.reserveUrl : null;
+        if (!reserveUrl || cart.length === 0) {
+            return;
+        }
+
+        const csrfToken = document.querySelector('meta[name="csrf-token"]');
+        fetch(reserveUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken ? csrfToken.content : ''
+            },
+            body: JSON.stringify({
+                items: cart.map(item => ({ id: item.id, quantity: parseInt(item.quantity) || 1 }))
+            })
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.shortages && data.shortages.length > 0 && window.showNotification) {
+                    data.shortages.forEach(shortage => {
+                        window.showNotification(`Il ne reste que ${shortage.available} exemplaire(s) de ${shortage.name}.`, 'warning');
+                    });
+                }
+            })
+            .catch(error => console.error('Erreur lors de la réservation du stock:', error));
+    }
+
     // Charger les articles du panier et mettre à jour le récapitulatif
     function loadCartItems() {
         console.log('Chargement des articles du panier...');
@@ -157,9 +189,36 @@ document.addEventListener('DOMContentLoaded', function () {
             .join(', ');
     }
 
+    // Montants estimés à partir du panier local, en attendant ceux du serveur
     function updatePriceDetails(subtotal) {
         const taxAmount = subtotal * TAX_RATE;
-        const total = subtotal + taxAmount + SHIPPING_COST;
+        renderPriceDetails(subtotal, taxAmount, SHIPPING_COST, subtotal + taxAmount + SHIPPING_COST);
+    }
+
+    // Le panier serveur fait foi : ce sont ses montants qui seront facturés
+    function syncCartTotals() {
+        if (!window.syncServerCart) return;
+        window.syncServerCart().then(cart => {
+            if (cart) {
+                renderPriceDetails(cart.subtotal, cart.tax_amount, cart.shipping_cost, cart.total_amount);
+                renderDiscount(cart.discount_amount, cart.coupon_code);
+                if (cart.coupon_error && window.showNotification) {
+                    window.showNotification(cart.coupon_error, 'warning');
+                }
+            }
+        });
+    }
+
+    // Remise du code promo appliqué au panier serveur
+    function renderDiscount(discountAmount, couponCode) {
+        const discountRow = document.querySelector('.discount-row');
+        if (!discountRow) return;
+        discountRow.style.display = discountAmount > 0 ? '' : 'none';
+        discountRow.querySelector('.discount').textContent = `-${formatPrice(discountAmount)}`;
+        discountRow.querySelector('.coupon-code').textContent = couponCode ? `(${couponCode})` : '';
+    }
+
+    function renderPriceDetails(subtotal, taxAmount, shippingCost, total) {
         const subtotalElem = document.querySelector('.subtotal');
         const taxElem = document.querySelector('.tax');
         const shippingElem = document.querySelector('.shipping');
@@ -167,18 +226,9 @@ document.addEventListener('DOMContentLoaded', function () {
 
         if (subtotalElem) subtotalElem.textContent = formatPrice(subtotal);
         if (taxElem) taxElem.textContent = formatPrice(taxAmount);
-        if (shippingElem) shippingElem.textContent = SHIPPING_COST === 0 ? 'Gratuite' : formatPrice(SHIPPING_COST);
+        if (shippingElem) shippingElem.textContent = shippingCost === 0 ? 'Gratuite' : formatPrice(shippingCost);
         if (totalElem) totalElem.textContent = formatPrice(total);
 
-        const subtotalInput = document.getElementById('subtotal-input');
-        const taxInput = document.getElementById('tax-amount-input');
-        const shippingInput = document.getElementById('shipping-cost-input');
-        const totalInput = document.getElementById('total-amount-input');
-        if (subtotalInput) subtotalInput.value = subtotal;
-        if (taxInput) taxInput.value = taxAmount;
-        if (shippingInput) shippingInput.value = SHIPPING_COST;
-        if (totalInput) totalInput.value = total;
-
         updateButtonText();
     }
 
@@ -429,19 +479,27 @@ document.addEventListener('DOMContentLoaded', function () {
             return;
         }
 
-        // Préparer les données du panier
-        prepareCartData();
-
-        // Obtenir le mode de paiement sélectionné
-        const selectedPaymentMethod = document.querySelector('input[name="payment_method"]:checked').value;
-
         // Désactiver le bouton et afficher le spinner
         payButton.disabled = true;
         const originalText = payButton.innerHTML;
         payButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Traitement en cours...';
 
-        // Soumettre le formulaire directement - solution la plus simple pour CSRF
-        paymentForm.submit();
+        // Le serveur facture son propre panier : y envoyer d'abord les dernières modifications
+        const cartSynced = window.flushCartSync ? window.flushCartSync() : Promise.resolve(true);
+        cartSynced.then(cart => {
+            if (!cart) {
+                payButton.disabled = false;
+                payButton.innerHTML = originalText;
+                showErrors(['Impossible de mettre à jour votre panier. Veuillez réessayer.']);
+                return;
+            }
+
+            // Préparer les données du panier
+            prepareCartData();
+
+            // Soumettre le formulaire directement - solution la plus simple pour CSRF
+            paymentForm.submit();
+        });
     }
 
     function formatPrice(price) {
@@ -482,7 +540,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 return itemWithSku;
             });
 
-            // IMPORTANT: Ajouter d'abord une représentation JSON complète du panier avec SKU
+            // Représentation JSON du panier, utilisée seulement si le panier serveur est vide
             const fullCartInput = document.createElement('input');
             fullCartInput.type = 'hidden';
             fullCartInput.name = 'full_cart_json';
@@ -490,48 +548,6 @@ document.addEventListener('DOMContentLoaded', function () {
             cartItemsContainer.appendChild(fullCartInput);
             console.log('Panier complet ajouté au formulaire avec SKU par défaut');
 
-            // Ajouter chaque élément du panier comme input séparé
-            cartWithDefaultSku.forEach((item, index) => {
-                console.log(`Ajout de l'article ${index}:`, item);
-
-                // Assurez-vous que toutes les valeurs sont dans des formats valides
-                const cleanItem = {
-                    id: item.id ? String(item.id) : '',
-                    name: item.name || 'Produit sans nom',
-                    price: parseFloat(item.price) || 0,
-                    quantity: parseInt(item.quantity) || 1,
-                    options: item.options || null,
-                    sku: item.sku, // SKU déjà défini ci-dessus
-                    image: item.image || null
-                };
-
-                // S'assurer que la valeur JSON est correctement formatée
-                const jsonValue = JSON.stringify(cleanItem);
-                
-                // Ajouter l'article avec index numérique
-                const input = document.createElement('input');
-                input.type = 'hidden';
-                input.name = `cart_items[${index}]`;
-                input.value = jsonValue;
-                cartItemsContainer.appendChild(input);
-
-                // Ajouter aussi l'article avec l'ancienne notation pour compatibilité
-                const inputLegacy = document.createElement('input');
-                inputLegacy.type = 'hidden';
-                inputLegacy.name = 'cart_items[]';
-                inputLegacy.value = jsonValue;
-                cartItemsContainer.appendChild(inputLegacy);
-
-                console.log(`Article ${index} ajouté avec SKU: ${cleanItem.sku}`);
-            });
-
-            // Ajouter un champ caché pour indiquer le nombre d'articles
-            const countInput = document.createElement('input');
-            countInput.type = 'hidden';
-            countInput.name = 'cart_item_count';
-            countInput.value = cart.length;
-            cartItemsContainer.appendChild(countInput);
-            
             console.log(`Préparation terminée: ${cart.length} articles prêts à être envoyés`);
         } else {
             console.error('Conteneur cart-items-container non trouvé!');
@@ -542,6 +558,8 @@ document.addEventListener('DOMContentLoaded', function () {
         if (paymentForm) {
             const formData = new FormData(paymentForm);
             const data = Object.fromEntries(formData.entries());
+            // La clé d'idempotence est propre à chaque affichage du formulaire
+            delete data.idempotency_key;
             sessionStorage.setItem('payment_form_data', JSON.stringify(data));
         }
     }
@@ -552,6 +570,9 @@ document.addEventListener('DOMContentLoaded', function () {
             try {
                 const data = JSON.parse(savedData);
                 Object.entries(data).forEach(([key, value]) => {
+                    if (key === 'idempotency_key') {
+                        return;
+                    }
                     const input = paymentForm.querySelector(`[name="${key}"]`);
                     if (input) {
                         if (input.type === 'radio') {
@@ -1,5 +1,52 @@
 // script.js - Code commun pour toutes les pages
 
+// ====== PANIER SERVEUR ======
+// Le panier du navigateur (localStorage) est recopié dans le panier serveur,
+// qui fait foi pour les prix et la commande.
+function getCookie(name) {
+    const match = document.cookie.split(';').map(c => c.trim()).find(c => c.startsWith(name + '='));
+    return match ? decodeURIComponent(match.substring(name.length + 1)) : '';
+}
+
+// Les synchronisations sont enchaînées : chacune part après la précédente et envoie le panier du moment
+let cartSyncQueue = Promise.resolve(null);
+window.syncServerCart = function() {
+    cartSyncQueue = cartSyncQueue.then(() => {
+        const cart = JSON.parse(localStorage.getItem('cart')) || [];
+        return fetch('/cart/api/sync/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: JSON.stringify({
+                items: cart.map(item => ({ id: item.id, quantity: parseInt(item.quantity) || 1, options: item.options || null }))
+            })
+        })
+            .then(response => response.json())
+            .then(data => data.success ? data.cart : null)
+            .catch(error => {
+                console.error('Erreur lors de la synchronisation du panier:', error);
+                return null;
+            });
+    });
+    return cartSyncQueue;
+};
+
+// Regroupe les modifications rapprochées en une seule synchronisation
+let cartSyncTimer = null;
+window.scheduleCartSync = function() {
+    clearTimeout(cartSyncTimer);
+    cartSyncTimer = setTimeout(window.syncServerCart, 500);
+};
+
+// Synchronise tout de suite (sans attendre le délai) ; résolu une fois le panier serveur à jour, null en cas d'échec
+window.flushCartSync = function() {
+    clearTimeout(cartSyncTimer);
+    cartSyncTimer = null;
+    return window.syncServerCart();
+};
+
 document.addEventListener('DOMContentLoaded', function() {
     // ====== NAVIGATION ET UI COMMUN ======
     initNavigation();
@@ -94,6 +141,7 @@ document.addEventListener('DOMContentLoaded', function() {
             }
 
             localStorage.setItem('cart', JSON.stringify(window.cart));
+            window.scheduleCartSync();
             updateCartCount();
             window.showNotification(`${name} a été ajouté au panier`);
             animateAddToCart();